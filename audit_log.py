@@ -0,0 +1,166 @@
+"""
+管理者操作ログの非同期バッチ書き込み
+
+log_admin_action() は AdminLog の行をメモリ上のキューに積むだけで戻り、
+バックグラウンドタスクが件数または経過時間のしきい値で複数行をまとめて INSERT する。
+シャットダウン時には残りを書き出してから停止する。
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+from sqlalchemy import insert
+
+from database import SessionLocal
+from db_control.models import AdminLog
+
+logger = logging.getLogger(__name__)
+
+# キューの上限（超えた分は破棄して dropped に計上）
+AUDIT_QUEUE_MAX = int(os.getenv("AUDIT_QUEUE_MAX", "10000"))
+# 1回の INSERT にまとめる最大件数（この件数に達したら即時書き込み）
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "100"))
+# キューが少量でもこの秒数ごとに書き込む
+AUDIT_FLUSH_INTERVAL_SECONDS = float(os.getenv("AUDIT_FLUSH_INTERVAL_SECONDS", "1.0"))
+
+
+def build_admin_log_row(
+    admin_user_id: str,
+    action: str,
+    target_type: Optional[str] = None,
+    target_id: Optional[str] = None,
+    details: Optional[str] = None,
+    ip_address: Optional[str] = None,
+    user_agent: Optional[str] = None
+) -> Dict[str, Any]:
+    """admin_logs に INSERT する1行分の値"""
+    return {
+        "id": str(uuid4()),
+        "admin_user_id": admin_user_id,
+        "action": action,
+        "target_type": target_type,
+        "target_id": target_id,
+        "details": details,
+        "ip_address": ip_address,
+        "user_agent": user_agent,
+        "created_at": datetime.utcnow(),
+    }
+
+
+class AuditLogWriter:
+    """AdminLog をまとめて書き込むライター"""
+
+    def __init__(self, max_queue: int, batch_size: int, flush_interval: float):
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: deque = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._counters = {"enqueued": 0, "written": 0, "dropped": 0, "failed": 0, "batches": 0}
+        self._last_flush_at: Optional[datetime] = None
+        self._last_error: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def enqueue(self, row: Dict[str, Any]) -> bool:
+        """1件をキューに追加（キューが満杯なら破棄して False）"""
+        with self._lock:
+            if len(self._queue) >= self.max_queue:
+                self._counters["dropped"] += 1
+                return False
+            self._queue.append(row)
+            self._counters["enqueued"] += 1
+            full = len(self._queue) >= self.batch_size
+        if full and self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+        return True
+
+    def _take_batch(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            count = min(len(self._queue), self.batch_size)
+            return [self._queue.popleft() for _ in range(count)]
+
+    def flush(self) -> int:
+        """キューの内容をすべて書き出す（同期処理。戻り値は書き込んだ件数）"""
+        written = 0
+        with self._flush_lock:
+            while True:
+                batch = self._take_batch()
+                if not batch:
+                    break
+                db = SessionLocal()
+                try:
+                    db.execute(insert(AdminLog), batch)
+                    db.commit()
+                    written += len(batch)
+                    with self._lock:
+                        self._counters["written"] += len(batch)
+                        self._counters["batches"] += 1
+                except Exception as e:
+                    db.rollback()
+                    # 書き込みに失敗したバッチは再送せず、件数を記録して継続
+                    logger.exception("admin log batch insert failed (%d rows)", len(batch))
+                    with self._lock:
+                        self._counters["failed"] += len(batch)
+                        self._last_error = str(e)
+                finally:
+                    db.close()
+            self._last_flush_at = datetime.utcnow()
+        return written
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await loop.run_in_executor(None, self.flush)
+
+    def start(self):
+        """バックグラウンドでの書き込みを開始（起動時に呼ぶ）"""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """バックグラウンドタスクを停止し、残りを書き出す（シャットダウン時に呼ぶ）"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._loop = None
+        self._wake = None
+        await asyncio.get_running_loop().run_in_executor(None, self.flush)
+
+    def stats(self) -> Dict[str, Any]:
+        """キューの状態と累計カウンタ"""
+        with self._lock:
+            return {
+                "queued": len(self._queue),
+                **self._counters,
+                "running": self.running,
+                "last_flush_at": self._last_flush_at,
+                "last_error": self._last_error,
+            }
+
+
+audit_writer = AuditLogWriter(AUDIT_QUEUE_MAX, AUDIT_BATCH_SIZE, AUDIT_FLUSH_INTERVAL_SECONDS)
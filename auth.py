@@ -7,10 +7,10 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 import os
 from dotenv import load_dotenv
-import uuid
 
 from database import get_db
-from db_control.models import User, AdminUser, AdminLog
+from db_control.models import User, AdminUser
+from audit_log import audit_writer, build_admin_log_row
 
 load_dotenv()
 
@@ -165,31 +165,28 @@ async def log_admin_action(
     request: Optional[Request] = None,
     db: Session = Depends(get_db)
 ):
-    """管理者の操作をログに記録"""
-    try:
-        ip_address = None
-        user_agent = None
-        
-        if request:
-            ip_address = request.client.host if request.client else None
-            user_agent = request.headers.get("user-agent")
-        
-        admin_log = AdminLog(
-            id=str(uuid.uuid4()),
-            admin_user_id=admin_user_id,
-            action=action,
-            target_type=target_type,
-            target_id=target_id,
-            details=details,
-            ip_address=ip_address,
-            user_agent=user_agent,
-            created_at=datetime.utcnow()
-        )
-        
-        db.add(admin_log)
-        db.commit()
-        
-    except Exception as e:
-        # ログ記録に失敗しても処理は続行
-        print(f"Admin log recording failed: {e}")
-        pass 
\ No newline at end of file
+    """管理者の操作をログに記録
+
+    ログはキューに積まれ、audit_log のバックグラウンドタスクがまとめて書き込む。
+    db 引数は既存の呼び出しとの互換のために残している。
+    """
+    ip_address = None
+    user_agent = None
+    
+    if request:
+        ip_address = request.client.host if request.client else None
+        user_agent = request.headers.get("user-agent")
+    
+    audit_writer.enqueue(build_admin_log_row(
+        admin_user_id=admin_user_id,
+        action=action,
+        target_type=target_type,
+        target_id=target_id,
+        details=details,
+        ip_address=ip_address,
+        user_agent=user_agent
+    ))
+    
+    # バックグラウンドの書き込みが動いていない場合（スクリプト等）はその場で書き込む
+    if not audit_writer.running:
+        audit_writer.flush()
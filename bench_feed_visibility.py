@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+フィードの公開範囲フィルタのベンチマーク
+
+一時的な SQLite データベースに承認済みの投稿を用意し、却下・通報済みの投稿を段階的に
+増やしながらフィード1ページの取得時間を計測する。post_feed.visible_post_ids()
+（ステータスごとのインデックス + UNION ALL）と、同じ条件を OR でまとめた単純なクエリを比較する。
+
+使い方:
+    python bench_feed_visibility.py
+    python bench_feed_visibility.py --backlogs 0 20000 100000 --repeat 50
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from sqlalchemy import create_engine, insert, or_, and_, select
+from sqlalchemy.orm import sessionmaker
+
+from db_control.models import Base, Post, PostStatus, User
+from post_feed import visible_post_ids
+
+PAGE_SIZE = 20
+
+
+def _post_rows(count, user_id, status, start, step_seconds):
+    return [
+        {
+            "id": str(uuid4()),
+            "user_id": user_id,
+            "content": f"bench {status.value} {i}",
+            "status": status,
+            "report_count": 0,
+            "created_at": start + timedelta(seconds=i * step_seconds),
+            "updated_at": start,
+        }
+        for i in range(count)
+    ]
+
+
+def _insert(db, rows, batch_size=5000):
+    for i in range(0, len(rows), batch_size):
+        db.execute(insert(Post), rows[i:i + batch_size])
+    db.commit()
+
+
+def _naive_ids(db, viewer_id):
+    """公開範囲を OR でまとめた単純なクエリ（比較用）"""
+    return db.execute(
+        select(Post.id).where(or_(
+            Post.status == PostStatus.approved,
+            and_(Post.user_id == viewer_id, Post.status == PostStatus.pending)
+        )).order_by(Post.created_at.desc(), Post.id.desc()).limit(PAGE_SIZE)
+    ).all()
+
+
+def _measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="フィードの公開範囲フィルタのベンチマーク")
+    parser.add_argument("--approved", type=int, default=5000, help="承認済みの投稿数")
+    parser.add_argument("--backlogs", type=int, nargs="+", default=[0, 10000, 50000, 100000],
+                        help="計測する却下・通報済み投稿の件数（累計）")
+    parser.add_argument("--repeat", type=int, default=30, help="各計測の繰り返し回数（中央値を表示）")
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine, tables=[User.__table__, Post.__table__])
+    db = sessionmaker(bind=engine)()
+
+    try:
+        viewer_id, author_id = str(uuid4()), str(uuid4())
+        db.execute(insert(User), [
+            {"id": viewer_id, "email": "viewer@example.com", "password_hash": "x"},
+            {"id": author_id, "email": "author@example.com", "password_hash": "x"},
+        ])
+        start = datetime(2025, 1, 1)
+        _insert(db, _post_rows(args.approved, author_id, PostStatus.approved, start, 60))
+        _insert(db, _post_rows(10, viewer_id, PostStatus.pending, start, 3600))
+
+        print(f"承認済み {args.approved} 件、1ページ {PAGE_SIZE} 件、{args.repeat} 回の中央値 (ms)")
+        print(f"{'非表示の投稿数':>14} {'indexed union':>14} {'naive OR':>10}")
+        hidden = 0
+        for backlog in sorted(args.backlogs):
+            if backlog > hidden:
+                # 非表示の投稿は承認済みより新しい日時にして、新しい順の走査で先に現れるようにする
+                rows_start = start + timedelta(days=365, seconds=hidden)
+                added = backlog - hidden
+                rows = _post_rows(added // 2, author_id, PostStatus.rejected, rows_start, 2)
+                rows += _post_rows(added - added // 2, author_id, PostStatus.reported, rows_start + timedelta(seconds=1), 2)
+                _insert(db, rows)
+                hidden = backlog
+
+            indexed = _measure(lambda: visible_post_ids(db, viewer_id, limit=PAGE_SIZE), args.repeat)
+            naive = _measure(lambda: _naive_ids(db, viewer_id), args.repeat)
+            print(f"{hidden:>14} {indexed:>14.2f} {naive:>10.2f}")
+    finally:
+        db.close()
+        engine.dispose()
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+営業スケジュールのコンパイル済みキャッシュ
+
+business_hours（曜日ルール）と special_holidays（日付指定の上書き）を読み込み、
+任意の日付について営業有無・営業時間・次の営業開始を O(1) で答えられる形に変換して
+プロセス内に保持する。営業時間・特別休業日の更新時に invalidate_schedule() で破棄する。
+"""
+
+import os
+import threading
+import time as time_module
+from dataclasses import dataclass
+from datetime import datetime, date, time, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from db_control.models import BusinessHour, SpecialHoliday
+from entry_analytics import DAY_NAMES, sql_day_of_week, to_local
+
+# 他ワーカーでの更新を反映するまでの最大秒数
+SCHEDULE_TTL_SECONDS = int(os.getenv("SCHEDULE_TTL_SECONDS", "60"))
+
+
+@dataclass(frozen=True)
+class DayHours:
+    """ある日付の営業情報"""
+    date: date
+    day_of_week: int  # 0:日曜, 1:月曜, ..., 6:土曜
+    is_open: bool
+    open_time: Optional[time] = None
+    close_time: Optional[time] = None
+    note: Optional[str] = None
+    is_holiday: bool = False
+    holiday_name: Optional[str] = None
+    configured: bool = True  # 曜日の営業時間が未設定の場合は False
+
+    @property
+    def day_name(self) -> str:
+        return DAY_NAMES[self.day_of_week]
+
+    def contains(self, moment: time) -> bool:
+        """指定時刻が営業時間内か（開始・終了が未設定なら終日営業として扱う）"""
+        if not self.is_open:
+            return False
+        if self.open_time and moment < self.open_time:
+            return False
+        if self.close_time and moment >= self.close_time:
+            return False
+        return True
+
+
+@dataclass(frozen=True)
+class _Rule:
+    is_open: bool
+    open_time: Optional[time]
+    close_time: Optional[time]
+    note: Optional[str]
+    holiday_name: Optional[str] = None
+
+
+class CompiledSchedule:
+    """曜日ルールと特別休業日をまとめた参照専用のスケジュール"""
+
+    def __init__(self, weekly: Dict[int, _Rule], holidays: Dict[date, _Rule]):
+        self._weekly: List[Optional[_Rule]] = [weekly.get(dow) for dow in range(7)]
+        self._holidays = holidays
+
+        # 曜日ルールのみで見た「次の営業日までの日数」（営業日がなければ None）
+        self._weekly_offsets: List[Optional[int]] = []
+        for dow in range(7):
+            offset = next(
+                (k for k in range(7) if self._weekly_open((dow + k) % 7)), None
+            )
+            self._weekly_offsets.append(offset)
+
+        # 特別休業日を含む期間は日ごとの「次の営業日までの日数」を事前計算する
+        self._range_start: Optional[date] = None
+        self._offsets: List[Optional[int]] = []
+        if holidays:
+            self._range_start = min(holidays)
+            range_end = max(holidays) + timedelta(days=7)
+            size = (range_end - self._range_start).days + 1
+            after_end = self._weekly_offset_from(range_end + timedelta(days=1))
+            offsets: List[Optional[int]] = [None] * size
+            following = after_end
+            for i in range(size - 1, -1, -1):
+                day = self._range_start + timedelta(days=i)
+                if self.hours_for(day).is_open:
+                    following = 0
+                elif following is not None:
+                    following += 1
+                offsets[i] = following
+            self._offsets = offsets
+
+    def _weekly_open(self, dow: int) -> bool:
+        rule = self._weekly[dow]
+        return bool(rule and rule.is_open)
+
+    def _weekly_offset_from(self, day: date) -> Optional[int]:
+        return self._weekly_offsets[sql_day_of_week(day)]
+
+    def hours_for(self, day: date) -> DayHours:
+        """指定日の営業情報（特別休業日が曜日ルールより優先）"""
+        dow = sql_day_of_week(day)
+        holiday = self._holidays.get(day)
+        if holiday:
+            return DayHours(
+                date=day, day_of_week=dow, is_open=holiday.is_open,
+                open_time=holiday.open_time if holiday.is_open else None,
+                close_time=holiday.close_time if holiday.is_open else None,
+                note=holiday.note, is_holiday=True, holiday_name=holiday.holiday_name
+            )
+        rule = self._weekly[dow]
+        if rule is None:
+            return DayHours(
+                date=day, day_of_week=dow, is_open=False,
+                note="営業時間が設定されていません", configured=False
+            )
+        return DayHours(
+            date=day, day_of_week=dow, is_open=rule.is_open,
+            open_time=rule.open_time if rule.is_open else None,
+            close_time=rule.close_time if rule.is_open else None,
+            note=rule.note
+        )
+
+    def next_open_day(self, day: date) -> Optional[date]:
+        """指定日以降で最初の営業日（指定日を含む）"""
+        start = self._range_start
+        if start is not None and start <= day < start + timedelta(days=len(self._offsets)):
+            offset = self._offsets[(day - start).days]
+            return day + timedelta(days=offset) if offset is not None else None
+
+        offset = self._weekly_offset_from(day)
+        candidate = day + timedelta(days=offset) if offset is not None else None
+        if start is not None and day < start and (candidate is None or start <= candidate):
+            # 期間開始までは曜日ルールで休業が続くので、期間内の事前計算結果を使う
+            return self.next_open_day(start)
+        return candidate
+
+    def is_open_at(self, moment: datetime) -> bool:
+        """指定日時（現地時刻）に営業中か"""
+        return self.hours_for(moment.date()).contains(moment.time())
+
+    def next_opening(self, moment: datetime) -> Optional[datetime]:
+        """指定日時（現地時刻）以降の次の営業開始日時（営業中ならその時刻を返す）"""
+        today = self.hours_for(moment.date())
+        if today.contains(moment.time()):
+            return moment
+        if today.is_open and today.open_time and moment.time() < today.open_time:
+            return datetime.combine(today.date, today.open_time)
+
+        next_day = self.next_open_day(moment.date() + timedelta(days=1))
+        if next_day is None:
+            return None
+        hours = self.hours_for(next_day)
+        return datetime.combine(next_day, hours.open_time or time.min)
+
+
+def compile_schedule(db: Session) -> CompiledSchedule:
+    """DBからスケジュールを構築（2クエリ）"""
+    weekly = {
+        bh.day_of_week: _Rule(bool(bh.is_open), bh.open_time, bh.close_time, bh.special_note)
+        for bh in db.query(BusinessHour).all()
+    }
+    holidays = {
+        h.holiday_date: _Rule(bool(h.is_open), h.open_time, h.close_time, h.note, h.holiday_name)
+        for h in db.query(SpecialHoliday).all()
+    }
+    return CompiledSchedule(weekly, holidays)
+
+
+_schedule: Optional[CompiledSchedule] = None
+_compiled_at = 0.0
+_lock = threading.Lock()
+
+
+def get_schedule(db: Session) -> CompiledSchedule:
+    """コンパイル済みスケジュールを取得（未構築・期限切れの場合のみDBを参照）"""
+    global _schedule, _compiled_at
+    schedule = _schedule
+    if schedule is not None and time_module.monotonic() - _compiled_at < SCHEDULE_TTL_SECONDS:
+        return schedule
+    with _lock:
+        if _schedule is None or time_module.monotonic() - _compiled_at >= SCHEDULE_TTL_SECONDS:
+            _schedule = compile_schedule(db)
+            _compiled_at = time_module.monotonic()
+        return _schedule
+
+
+def invalidate_schedule():
+    """スケジュールを破棄（営業時間・特別休業日の更新後に呼ぶ）"""
+    global _schedule
+    with _lock:
+        _schedule = None
+
+
+def park_now() -> datetime:
+    """ドッグランの現地時刻"""
+    return to_local(datetime.utcnow())
@@ -0,0 +1,51 @@
+"""
+プロセス内キャッシュの世代番号管理
+
+更新処理は bump_version() をデータ更新と同じトランザクションで呼び、
+各ワーカーは get_version() をポーリングして自分のキャッシュが古くなったことを検知する。
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from db_control.models import CacheVersion
+
+
+def bump_version(db: Session, name: str):
+    """世代番号を1つ進める（コミットは呼び出し元で行う）"""
+    now = datetime.utcnow()
+    updated = db.query(CacheVersion).filter(CacheVersion.name == name).update(
+        {CacheVersion.version: CacheVersion.version + 1, CacheVersion.updated_at: now},
+        synchronize_session=False
+    )
+    if updated:
+        return
+    try:
+        with db.begin_nested():
+            db.add(CacheVersion(name=name, version=1, updated_at=now))
+    except IntegrityError:
+        # 別リクエストが先に作成した場合は加算に切り替える
+        db.query(CacheVersion).filter(CacheVersion.name == name).update(
+            {CacheVersion.version: CacheVersion.version + 1, CacheVersion.updated_at: now},
+            synchronize_session=False
+        )
+
+
+def get_version(db: Session, name: str) -> int:
+    """現在の世代番号（未登録なら 0）"""
+    version = db.query(CacheVersion.version).filter(CacheVersion.name == name).scalar()
+    return version or 0
+
+
+def get_versions(db: Session, names: Iterable[str]) -> Dict[str, int]:
+    """複数の世代番号を1クエリで取得"""
+    names = list(names)
+    versions = dict.fromkeys(names, 0)
+    for name, version in db.query(CacheVersion.name, CacheVersion.version).filter(
+        CacheVersion.name.in_(names)
+    ).all():
+        versions[name] = version or 0
+    return versions
@@ -0,0 +1,199 @@
+"""
+月間カレンダーの生成とキャッシュ
+
+営業時間（曜日ルール）と特別休業日を日ごとにマージし、イベント件数・残り枠と合わせて
+calendar_days にマテリアライズする。営業時間・休業日・イベントの変更時に
+該当する月を無効化し、次回アクセス時に再生成する。
+
+取得できる年は今年の前後 CALENDAR_YEAR_RANGE 年まで。calendar_days に保存するのは
+今月の前後 CALENDAR_PERSIST_MONTHS か月のみで、それより前後の月は保存せずに毎回生成する。
+"""
+
+import calendar
+import os
+import threading
+import time as time_module
+from collections import OrderedDict
+from datetime import datetime, date
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import uuid4
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from business_schedule import compile_schedule
+from db_control.models import Event, EventRegistration, EventStatus, CalendarDay
+
+# 他ワーカーでの無効化を取りこぼさないよう、プロセス内キャッシュは短時間で失効させる
+CACHE_TTL_SECONDS = int(os.getenv("CALENDAR_CACHE_TTL_SECONDS", "60"))
+
+# プロセス内キャッシュに保持する月数（古く使われたものから破棄）
+CACHE_MAX_MONTHS = int(os.getenv("CALENDAR_CACHE_MAX_MONTHS", "48"))
+# 取得できる年の範囲（今年の前後の年数）
+CALENDAR_YEAR_RANGE = int(os.getenv("CALENDAR_YEAR_RANGE", "5"))
+# calendar_days に保存する月の範囲（今月の前後の月数）
+CALENDAR_PERSIST_MONTHS = int(os.getenv("CALENDAR_PERSIST_MONTHS", "24"))
+
+_cache: "OrderedDict[Tuple[int, int], Tuple[float, dict]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def calendar_year_range() -> Tuple[int, int]:
+    """取得できる年の範囲（両端を含む）"""
+    this_year = date.today().year
+    return this_year - CALENDAR_YEAR_RANGE, this_year + CALENDAR_YEAR_RANGE
+
+
+def _is_persisted(year: int, month: int) -> bool:
+    today = date.today()
+    offset = (year - today.year) * 12 + (month - today.month)
+    return abs(offset) <= CALENDAR_PERSIST_MONTHS
+
+
+def _month_range(year: int, month: int) -> Tuple[date, date]:
+    last_day = calendar.monthrange(year, month)[1]
+    return date(year, month, 1), date(year, month, last_day)
+
+
+def _format_time(value) -> Optional[str]:
+    return value.strftime("%H:%M") if value else None
+
+
+def _build(db: Session, year: int, month: int) -> List[CalendarDay]:
+    """営業時間・特別休業日・イベントから1か月分の行を生成（保存はしない）"""
+    first_day, last_day = _month_range(year, month)
+
+    # 生成結果は永続化されるため、キャッシュではなく最新のスケジュールから構築する
+    schedule = compile_schedule(db)
+
+    # イベントごとの参加登録数を1クエリで取得
+    events = db.query(
+        Event.event_date, Event.capacity, Event.status, func.count(EventRegistration.id)
+    ).outerjoin(
+        EventRegistration, EventRegistration.event_id == Event.id
+    ).filter(
+        Event.event_date.between(first_day, last_day)
+    ).group_by(Event.id, Event.event_date, Event.capacity, Event.status).all()
+
+    event_counts: Dict[date, int] = {}
+    remaining: Dict[date, int] = {}
+    for event_date, capacity, event_status, registered in events:
+        event_counts[event_date] = event_counts.get(event_date, 0) + 1
+        if capacity and event_status == EventStatus.reception:
+            remaining[event_date] = remaining.get(event_date, 0) + max(capacity - registered, 0)
+
+    now = datetime.utcnow()
+    rows = []
+    for day in range(1, last_day.day + 1):
+        current = date(year, month, day)
+        hours = schedule.hours_for(current)
+        rows.append(CalendarDay(
+            id=str(uuid4()),
+            calendar_date=current,
+            year=year,
+            month=month,
+            day_of_week=hours.day_of_week,
+            is_open=hours.is_open,
+            open_time=hours.open_time,
+            close_time=hours.close_time,
+            is_holiday=hours.is_holiday,
+            holiday_name=hours.holiday_name,
+            note=hours.note,
+            event_count=event_counts.get(current, 0),
+            remaining_capacity=remaining.get(current),
+            refreshed_at=now
+        ))
+    return rows
+
+
+def _materialize(db: Session, year: int, month: int) -> List[CalendarDay]:
+    """1か月分の行を生成して保存"""
+    rows = _build(db, year, month)
+    db.query(CalendarDay).filter(
+        CalendarDay.year == year, CalendarDay.month == month
+    ).delete(synchronize_session=False)
+    db.add_all(rows)
+    try:
+        db.commit()
+    except IntegrityError:
+        # 他のリクエストが同じ月を同時に生成した場合はそちらを使う
+        db.rollback()
+        return _load(db, year, month)
+    return rows
+
+
+def _load(db: Session, year: int, month: int) -> List[CalendarDay]:
+    return db.query(CalendarDay).filter(
+        CalendarDay.year == year, CalendarDay.month == month
+    ).order_by(CalendarDay.calendar_date).all()
+
+
+def _render(year: int, month: int, rows: List[CalendarDay]) -> dict:
+    return {
+        "year": year,
+        "month": month,
+        "days": [
+            {
+                "date": row.calendar_date,
+                "day_of_week": row.day_of_week,
+                "is_open": row.is_open,
+                "open_time": _format_time(row.open_time),
+                "close_time": _format_time(row.close_time),
+                "is_holiday": row.is_holiday,
+                "holiday_name": row.holiday_name,
+                "note": row.note,
+                "event_count": row.event_count or 0,
+                "remaining_capacity": row.remaining_capacity,
+            }
+            for row in rows
+        ],
+    }
+
+
+def get_calendar_month(db: Session, year: int, month: int) -> dict:
+    """月間カレンダーを取得（プロセス内キャッシュ → calendar_days → 再生成の順）
+
+    保存範囲外の月は calendar_days を使わずに生成する。
+    """
+    key = (year, month)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached:
+            _cache.move_to_end(key)
+    if cached and time_module.monotonic() - cached[0] < CACHE_TTL_SECONDS:
+        return cached[1]
+
+    if _is_persisted(year, month):
+        rows = _load(db, year, month)
+        if len(rows) != calendar.monthrange(year, month)[1]:
+            rows = _materialize(db, year, month)
+    else:
+        rows = _build(db, year, month)
+
+    rendered = _render(year, month, rows)
+    with _cache_lock:
+        _cache[key] = (time_module.monotonic(), rendered)
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_MAX_MONTHS:
+            _cache.popitem(last=False)
+    return rendered
+
+
+def invalidate_calendar_dates(db: Session, dates: Iterable[Optional[date]]):
+    """指定日を含む月を無効化（呼び出し元のトランザクションでコミットする）"""
+    months = {(d.year, d.month) for d in dates if d}
+    for year, month in months:
+        db.query(CalendarDay).filter(
+            CalendarDay.year == year, CalendarDay.month == month
+        ).delete(synchronize_session=False)
+    with _cache_lock:
+        for key in months:
+            _cache.pop(key, None)
+
+
+def invalidate_calendar_all(db: Session):
+    """全月を無効化（曜日ごとの営業時間が変わった場合）"""
+    db.query(CalendarDay).delete(synchronize_session=False)
+    with _cache_lock:
+        _cache.clear()
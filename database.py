@@ -73,4 +73,32 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def upsert_rows(db, table, rows, key_columns, update_columns) -> int:
+    """一意キーが重複する行は更新する一括INSERT
+
+    MySQL は INSERT ... ON DUPLICATE KEY UPDATE、SQLite / PostgreSQL は
+    INSERT ... ON CONFLICT DO UPDATE を1文で発行する。コミットは呼び出し元で行う。
+    """
+    if not rows:
+        return 0
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(table).values(rows)
+        stmt = stmt.on_duplicate_key_update({c: stmt.inserted[c] for c in update_columns})
+    elif dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(table).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=key_columns,
+            set_={c: stmt.excluded[c] for c in update_columns}
+        )
+    else:
+        raise NotImplementedError(f"{dialect} では一括UPSERTに対応していません")
+    db.execute(stmt)
+    return len(rows)
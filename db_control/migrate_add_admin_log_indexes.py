@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+admin_logs インデックス追加マイグレーション
+
+このスクリプトは以下を行います：
+1. 操作ログ検索API（/admin/logs）用の複合インデックスを admin_logs に作成
+"""
+
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import inspect
+from dotenv import load_dotenv
+from db_control.models import AdminLog
+from database import engine
+
+load_dotenv()
+
+
+def create_indexes():
+    """admin_logs のインデックスを作成"""
+    print("=== インデックス作成 ===")
+    existing = {ix["name"] for ix in inspect(engine).get_indexes("admin_logs")}
+    try:
+        for index in AdminLog.__table__.indexes:
+            if index.name in existing:
+                print(f"⚠️ {index.name} は既に存在します")
+                continue
+            index.create(bind=engine)
+            print(f"✅ {index.name}")
+    except Exception as e:
+        print(f"❌ インデックス作成エラー: {e}")
+        return False
+    return True
+
+
+def main():
+    """メイン処理"""
+    print("\n========================================")
+    print("admin_logs インデックス追加マイグレーション開始")
+    print("========================================\n")
+
+    if not create_indexes():
+        print("\n❌ マイグレーション失敗")
+        sys.exit(1)
+
+    print("\n✅ マイグレーション完了!")
+    print("========================================\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+重複検出用フィンガープリント追加マイグレーション
+
+このスクリプトは以下を行います：
+1. users / applications にフィンガープリントのカラムを追加
+2. フィンガープリント検索用のインデックスを作成
+3. 既存のユーザー・申請のフィンガープリントを計算して保存
+"""
+
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import inspect, text, update
+from dotenv import load_dotenv
+from db_control.models import Application, User
+from database import engine, SessionLocal
+from fingerprints import application_fingerprints, user_fingerprints
+
+load_dotenv()
+
+# 追加するカラム（テーブル名 → カラム名の一覧）
+NEW_COLUMNS = {
+    "users": ["email_normalized", "phone_hash", "address_hash"],
+    "applications": ["email_normalized", "phone_hash", "address_hash", "dog_hash", "duplicate_candidates"],
+}
+MODELS = {"users": User, "applications": Application}
+BATCH_SIZE = 1000
+
+
+def add_columns():
+    """カラムを追加（既存のカラムはスキップ）"""
+    print("=== カラム追加 ===")
+    inspector = inspect(engine)
+    try:
+        with engine.begin() as conn:
+            for table_name, columns in NEW_COLUMNS.items():
+                existing = {c["name"] for c in inspector.get_columns(table_name)}
+                table = MODELS[table_name].__table__
+                for name in columns:
+                    if name in existing:
+                        print(f"⚠️ {table_name}.{name} は既に存在します")
+                        continue
+                    column_type = table.c[name].type.compile(dialect=engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {name} {column_type}"))
+                    print(f"✅ {table_name}.{name}")
+    except Exception as e:
+        print(f"❌ カラム追加エラー: {e}")
+        return False
+    return True
+
+
+def create_indexes():
+    """フィンガープリントのインデックスを作成"""
+    print("\n=== インデックス作成 ===")
+    inspector = inspect(engine)
+    try:
+        for table_name, model in MODELS.items():
+            existing = {ix["name"] for ix in inspector.get_indexes(table_name)}
+            for index in model.__table__.indexes:
+                if not any(c.name in NEW_COLUMNS[table_name] for c in index.columns):
+                    continue
+                if index.name in existing:
+                    print(f"⚠️ {index.name} は既に存在します")
+                    continue
+                index.create(bind=engine)
+                print(f"✅ {index.name}")
+    except Exception as e:
+        print(f"❌ インデックス作成エラー: {e}")
+        return False
+    return True
+
+
+def _backfill(db, model, build_values) -> int:
+    # 読み込み中のカーソルと同じ接続で UPDATE しないよう、先に値を計算しておく
+    rows = [{"id": row.id, **build_values(row)} for row in db.query(model).all()]
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.execute(update(model), rows[start:start + BATCH_SIZE])
+    return len(rows)
+
+
+def backfill():
+    """既存データのフィンガープリントを計算
+
+    重複候補（duplicate_candidates）は申請時にのみ抽出するため、既存の申請には設定しない。
+    """
+    print("\n=== 既存データの更新 ===")
+    db = SessionLocal()
+    try:
+        users = _backfill(db, User, lambda u: user_fingerprints(u.email, u.phone_number, u.address))
+        print(f"✅ users: {users}件")
+        applications = _backfill(db, Application, lambda a: application_fingerprints(
+            a.user_email, a.user_phone, a.user_address, a.dog_name, a.dog_breed, a.user_city
+        ))
+        print(f"✅ applications: {applications}件")
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"❌ 既存データ更新エラー: {e}")
+        return False
+    finally:
+        db.close()
+    return True
+
+
+def main():
+    """メイン処理"""
+    print("\n========================================")
+    print("重複検出用フィンガープリント追加マイグレーション開始")
+    print("========================================\n")
+
+    if not add_columns() or not create_indexes() or not backfill():
+        print("\n❌ マイグレーション失敗")
+        sys.exit(1)
+
+    print("\n✅ マイグレーション完了!")
+    print("========================================\n")
+
+
+if __name__ == "__main__":
+    main()
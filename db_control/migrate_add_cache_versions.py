@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+キャッシュ世代番号テーブルの作成マイグレーション
+
+このスクリプトは以下を行います：
+1. cache_versions テーブルの作成（システム設定などのプロセス内キャッシュの変更検知に使用）
+"""
+
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from dotenv import load_dotenv
+from db_control.models import Base, CacheVersion
+from database import engine
+
+load_dotenv()
+
+
+def create_tables():
+    """世代番号テーブルを作成"""
+    print("=== キャッシュ世代番号テーブル作成 ===")
+    try:
+        Base.metadata.create_all(bind=engine, tables=[CacheVersion.__table__])
+        print("✅ テーブル作成完了:")
+        print("  - cache_versions")
+    except Exception as e:
+        print(f"❌ テーブル作成エラー: {e}")
+        return False
+    return True
+
+
+def main():
+    """メイン処理"""
+    print("\n========================================")
+    print("キャッシュ世代番号テーブル作成マイグレーション開始")
+    print("========================================\n")
+
+    if not create_tables():
+        print("\n❌ マイグレーション失敗")
+        sys.exit(1)
+
+    print("\n✅ マイグレーション完了!")
+    print("========================================\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+月間カレンダー（マテリアライズドビュー）テーブルの作成マイグレーション
+
+このスクリプトは以下のテーブルを作成します：
+1. calendar_days - 日ごとの営業時間・イベント件数・残り枠
+
+※ 行はアクセス時に calendar_service が生成するため、初期データは不要です
+"""
+
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from dotenv import load_dotenv
+from db_control.models import Base, CalendarDay
+from database import engine
+
+load_dotenv()
+
+
+def main():
+    """メイン処理"""
+    print("=== カレンダーテーブル作成開始 ===")
+    try:
+        Base.metadata.create_all(bind=engine, tables=[CalendarDay.__table__])
+        print("✅ テーブル作成完了:")
+        print("  - calendar_days")
+    except Exception as e:
+        print(f"❌ テーブル作成エラー: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+event_registrations 登録日時追加マイグレーション
+
+このスクリプトは以下を行います：
+1. event_registrations に registered_at カラムを追加
+2. 既存の登録の registered_at をイベントの作成日時で補完（正確な登録日時は記録がないため）
+3. 参加者一覧（登録順）用のインデックスを作成
+"""
+
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from dotenv import load_dotenv
+from sqlalchemy import func, inspect, select, text, update
+from db_control.models import Event, EventRegistration
+from database import engine
+
+load_dotenv()
+
+
+def add_column():
+    """registered_at カラムを追加"""
+    print("=== カラム追加 ===")
+    existing = {c["name"] for c in inspect(engine).get_columns("event_registrations")}
+    if "registered_at" in existing:
+        print("⚠️ event_registrations.registered_at は既に存在します")
+        return True
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE event_registrations ADD COLUMN registered_at DATETIME"))
+        print("✅ event_registrations.registered_at を追加しました")
+    except Exception as e:
+        print(f"❌ カラム追加エラー: {e}")
+        return False
+    return True
+
+
+def backfill():
+    """未設定の registered_at をイベントの作成日時で補完"""
+    print("\n=== 既存データの補完 ===")
+    try:
+        with engine.begin() as conn:
+            event_created_at = select(Event.created_at).where(
+                Event.id == EventRegistration.event_id
+            ).scalar_subquery()
+            count = conn.execute(
+                update(EventRegistration).where(
+                    EventRegistration.registered_at.is_(None)
+                ).values(registered_at=func.coalesce(event_created_at, datetime.utcnow()))
+            ).rowcount
+        print(f"✅ {count}件を補完しました")
+    except Exception as e:
+        print(f"❌ 補完エラー: {e}")
+        return False
+    return True
+
+
+def create_indexes():
+    """event_registrations のインデックスを作成"""
+    print("\n=== インデックス作成 ===")
+    existing = {ix["name"] for ix in inspect(engine).get_indexes("event_registrations")}
+    try:
+        for index in EventRegistration.__table__.indexes:
+            if index.name in existing:
+                print(f"⚠️ {index.name} は既に存在します")
+                continue
+            index.create(bind=engine)
+            print(f"✅ {index.name}")
+    except Exception as e:
+        print(f"❌ インデックス作成エラー: {e}")
+        return False
+    return True
+
+
+def main():
+    """メイン処理"""
+    print("\n========================================")
+    print("event_registrations 登録日時追加マイグレーション開始")
+    print("========================================\n")
+
+    if not add_column() or not backfill() or not create_indexes():
+        print("\n❌ マイグレーション失敗")
+        sys.exit(1)
+
+    print("\n✅ マイグレーション完了!")
+    print("========================================\n")
+
+
+if __name__ == "__main__":
+    main()
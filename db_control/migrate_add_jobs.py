@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+ジョブキューテーブルの作成マイグレーション
+
+このスクリプトは以下を行います：
+1. jobs テーブルの作成（通知などコミット後の副作用処理の実行待ち・リトライ・デッドレターを管理）
+"""
+
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from dotenv import load_dotenv
+from db_control.models import Base, Job
+from database import engine
+
+load_dotenv()
+
+
+def create_tables():
+    """ジョブキューテーブルを作成"""
+    print("=== ジョブキューテーブル作成 ===")
+    try:
+        Base.metadata.create_all(bind=engine, tables=[Job.__table__])
+        print("✅ テーブル作成完了:")
+        print("  - jobs")
+    except Exception as e:
+        print(f"❌ テーブル作成エラー: {e}")
+        return False
+    return True
+
+
+def main():
+    """メイン処理"""
+    print("\n========================================")
+    print("ジョブキューテーブル作成マイグレーション開始")
+    print("========================================\n")
+
+    if not create_tables():
+        print("\n❌ マイグレーション失敗")
+        sys.exit(1)
+
+    print("\n✅ マイグレーション完了!")
+    print("========================================\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+お知らせの受信箱マイグレーション
+
+このスクリプトは以下を行います：
+1. notice_receipts テーブルの作成（ユーザーごとのお知らせの配信・既読状態）
+2. users.unread_notice_count カラムの追加
+3. 公開中のお知らせを全ユーザーに配信（未読として登録）し、未読数を再計算
+"""
+
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from dotenv import load_dotenv
+from sqlalchemy import and_, exists, func, inspect, literal, select, text, update
+from db_control.models import Base, Notice, NoticeReceipt, NoticeStatus, User
+from database import engine
+
+load_dotenv()
+
+
+def create_tables():
+    """受信箱テーブルを作成"""
+    print("=== 受信箱テーブル作成 ===")
+    try:
+        Base.metadata.create_all(bind=engine, tables=[NoticeReceipt.__table__])
+        print("✅ テーブル作成完了:")
+        print("  - notice_receipts")
+    except Exception as e:
+        print(f"❌ テーブル作成エラー: {e}")
+        return False
+    return True
+
+
+def add_unread_count_column():
+    """users に未読数のカラムを追加"""
+    print("\n=== 未読数カラム追加 ===")
+    existing = {c["name"] for c in inspect(engine).get_columns("users")}
+    if "unread_notice_count" in existing:
+        print("⚠️ users.unread_notice_count は既に存在します")
+        return True
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE users ADD COLUMN unread_notice_count INTEGER NOT NULL DEFAULT 0"))
+        print("✅ users.unread_notice_count を追加しました")
+    except Exception as e:
+        print(f"❌ カラム追加エラー: {e}")
+        return False
+    return True
+
+
+def backfill_receipts():
+    """公開中のお知らせを未配信のユーザーに配信し、未読数を再計算"""
+    print("\n=== 公開中のお知らせの配信 ===")
+    try:
+        with engine.begin() as conn:
+            notices = conn.execute(
+                select(Notice.id, Notice.created_at).where(Notice.status == NoticeStatus.published)
+            ).all()
+            delivered = 0
+            for notice_id, created_at in notices:
+                already_delivered = exists().where(and_(
+                    NoticeReceipt.user_id == User.id, NoticeReceipt.notice_id == notice_id
+                ))
+                delivered += conn.execute(
+                    NoticeReceipt.__table__.insert().from_select(
+                        ["user_id", "notice_id", "created_at"],
+                        select(User.id, literal(notice_id), literal(created_at or datetime.utcnow())).where(~already_delivered)
+                    )
+                ).rowcount
+            unread = select(func.count()).select_from(NoticeReceipt).where(
+                NoticeReceipt.user_id == User.id, NoticeReceipt.read_at.is_(None)
+            ).scalar_subquery()
+            conn.execute(update(User).values(unread_notice_count=unread))
+        print(f"✅ お知らせ{len(notices)}件を配信しました（受信 {delivered}件）")
+    except Exception as e:
+        print(f"❌ 配信エラー: {e}")
+        return False
+    return True
+
+
+def main():
+    """メイン処理"""
+    print("\n========================================")
+    print("お知らせの受信箱マイグレーション開始")
+    print("========================================\n")
+
+    if not create_tables() or not add_unread_count_column() or not backfill_receipts():
+        print("\n❌ マイグレーション失敗")
+        sys.exit(1)
+
+    print("\n✅ マイグレーション完了!")
+    print("========================================\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+通知テーブルの作成マイグレーション
+
+このスクリプトは以下を行います：
+1. notifications テーブルの作成（イベント参加者などへの一斉通知の本文）
+2. notification_deliveries テーブルの作成（宛先ごとの送信状況）
+"""
+
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from dotenv import load_dotenv
+from db_control.models import Base, Notification, NotificationDelivery
+from database import engine
+
+load_dotenv()
+
+
+def create_tables():
+    """通知テーブルを作成"""
+    print("=== 通知テーブル作成 ===")
+    try:
+        Base.metadata.create_all(
+            bind=engine,
+            tables=[Notification.__table__, NotificationDelivery.__table__]
+        )
+        print("✅ テーブル作成完了:")
+        print("  - notifications")
+        print("  - notification_deliveries")
+    except Exception as e:
+        print(f"❌ テーブル作成エラー: {e}")
+        return False
+    return True
+
+
+def main():
+    """メイン処理"""
+    print("\n========================================")
+    print("通知テーブル作成マイグレーション開始")
+    print("========================================\n")
+
+    if not create_tables():
+        print("\n❌ マイグレーション失敗")
+        sys.exit(1)
+
+    print("\n✅ マイグレーション完了!")
+    print("========================================\n")
+
+
+if __name__ == "__main__":
+    main()
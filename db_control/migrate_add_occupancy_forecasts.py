@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+混雑予測テーブルの作成マイグレーション
+
+このスクリプトは以下を行います：
+1. occupancy_forecasts テーブルの作成
+2. entry_hourly_rollups からの初回学習
+
+※ 事前に migrate_entry_logs_partitioning.py を実行して集計テーブルを作成してください
+"""
+
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from dotenv import load_dotenv
+from db_control.models import Base, OccupancyForecast
+from database import engine, SessionLocal
+from occupancy_forecast import train_incremental
+
+load_dotenv()
+
+
+def create_tables():
+    """予測テーブルを作成"""
+    print("=== 混雑予測テーブル作成 ===")
+    try:
+        Base.metadata.create_all(bind=engine, tables=[OccupancyForecast.__table__])
+        print("✅ テーブル作成完了:")
+        print("  - occupancy_forecasts")
+    except Exception as e:
+        print(f"❌ テーブル作成エラー: {e}")
+        return False
+    return True
+
+
+def initial_training():
+    """初回学習"""
+    print("\n=== 初回学習 ===")
+    session = SessionLocal()
+    try:
+        trained_days = train_incremental(session)
+        print(f"✅ {trained_days}日分の実績を学習しました")
+    except Exception as e:
+        session.rollback()
+        print(f"❌ 学習エラー: {e}")
+        return False
+    finally:
+        session.close()
+    return True
+
+
+def main():
+    """メイン処理"""
+    print("\n========================================")
+    print("混雑予測テーブル作成マイグレーション開始")
+    print("========================================\n")
+
+    if not create_tables():
+        print("\n❌ マイグレーション失敗")
+        sys.exit(1)
+
+    if not initial_training():
+        print("⚠️ 初回学習に失敗しました（アプリ起動後に自動で再学習されます）")
+
+    print("\n✅ マイグレーション完了!")
+    print("========================================\n")
+
+
+if __name__ == "__main__":
+    main()
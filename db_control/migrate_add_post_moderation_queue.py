@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+投稿モデレーションキュー用マイグレーション
+
+このスクリプトは以下を行います：
+1. posts に確保（claim）用のカラムを追加
+2. モデレーションキュー用の (status, created_at, id) インデックスを作成
+"""
+
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import inspect, text
+from dotenv import load_dotenv
+from db_control.models import Post
+from database import engine
+
+load_dotenv()
+
+NEW_COLUMNS = ["claimed_by", "claim_expires_at"]
+
+
+def add_columns():
+    """カラムを追加（既存のカラムはスキップ）"""
+    print("=== カラム追加 ===")
+    existing = {c["name"] for c in inspect(engine).get_columns("posts")}
+    try:
+        with engine.begin() as conn:
+            for name in NEW_COLUMNS:
+                if name in existing:
+                    print(f"⚠️ posts.{name} は既に存在します")
+                    continue
+                column_type = Post.__table__.c[name].type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE posts ADD COLUMN {name} {column_type}"))
+                print(f"✅ posts.{name}")
+    except Exception as e:
+        print(f"❌ カラム追加エラー: {e}")
+        return False
+    return True
+
+
+def create_indexes():
+    """posts のインデックスを作成"""
+    print("\n=== インデックス作成 ===")
+    existing = {ix["name"] for ix in inspect(engine).get_indexes("posts")}
+    try:
+        for index in Post.__table__.indexes:
+            if index.name in existing:
+                print(f"⚠️ {index.name} は既に存在します")
+                continue
+            index.create(bind=engine)
+            print(f"✅ {index.name}")
+    except Exception as e:
+        print(f"❌ インデックス作成エラー: {e}")
+        return False
+    return True
+
+
+def main():
+    """メイン処理"""
+    print("\n========================================")
+    print("投稿モデレーションキュー マイグレーション開始")
+    print("========================================\n")
+
+    if not add_columns() or not create_indexes():
+        print("\n❌ マイグレーション失敗")
+        sys.exit(1)
+
+    print("\n✅ マイグレーション完了!")
+    print("========================================\n")
+
+
+if __name__ == "__main__":
+    main()
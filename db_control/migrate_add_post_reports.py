@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+投稿通報機能のマイグレーション
+
+このスクリプトは以下を行います：
+1. post_reports テーブルの作成
+2. posts に通報数（report_count）カラムと通報数順のインデックスを追加
+3. 自動非表示のしきい値（post_report_auto_hide_threshold）を system_settings に追加
+"""
+
+import sys
+from datetime import datetime
+from pathlib import Path
+from uuid import uuid4
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import inspect, text
+from dotenv import load_dotenv
+from db_control.models import Base, Post, PostReport, SystemSetting
+from database import engine, SessionLocal
+from settings_store import REGISTRY
+
+load_dotenv()
+
+THRESHOLD_KEY = "post_report_auto_hide_threshold"
+
+
+def create_tables():
+    """通報テーブルを作成"""
+    print("=== 通報テーブル作成 ===")
+    try:
+        Base.metadata.create_all(bind=engine, tables=[PostReport.__table__])
+        print("✅ テーブル作成完了:")
+        print("  - post_reports")
+    except Exception as e:
+        print(f"❌ テーブル作成エラー: {e}")
+        return False
+    return True
+
+
+def add_report_count():
+    """posts.report_count とインデックスを追加"""
+    print("\n=== 通報数カラム追加 ===")
+    inspector = inspect(engine)
+    try:
+        if "report_count" in {c["name"] for c in inspector.get_columns("posts")}:
+            print("⚠️ posts.report_count は既に存在します")
+        else:
+            with engine.begin() as conn:
+                conn.execute(text("ALTER TABLE posts ADD COLUMN report_count INTEGER NOT NULL DEFAULT 0"))
+            print("✅ posts.report_count")
+
+        existing = {ix["name"] for ix in inspector.get_indexes("posts")}
+        for index in Post.__table__.indexes:
+            if index.name != "ix_posts_status_report_count":
+                continue
+            if index.name in existing:
+                print(f"⚠️ {index.name} は既に存在します")
+                continue
+            index.create(bind=engine)
+            print(f"✅ {index.name}")
+    except Exception as e:
+        print(f"❌ カラム追加エラー: {e}")
+        return False
+    return True
+
+
+def insert_setting():
+    """自動非表示のしきい値の設定を追加"""
+    print("\n=== 設定追加 ===")
+    db = SessionLocal()
+    try:
+        if db.query(SystemSetting).filter(SystemSetting.setting_key == THRESHOLD_KEY).first():
+            print(f"⚠️ {THRESHOLD_KEY} は既に存在します")
+            return True
+        definition = REGISTRY[THRESHOLD_KEY]
+        db.add(SystemSetting(
+            id=str(uuid4()),
+            setting_key=THRESHOLD_KEY,
+            setting_value=str(definition.default),
+            setting_type=definition.setting_type,
+            category=definition.category,
+            description=definition.description,
+            is_public=False,
+            created_at=datetime.utcnow(),
+            updated_at=datetime.utcnow()
+        ))
+        db.commit()
+        print(f"✅ {THRESHOLD_KEY} = {definition.default}")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ 設定追加エラー: {e}")
+        return False
+    finally:
+        db.close()
+    return True
+
+
+def main():
+    """メイン処理"""
+    print("\n========================================")
+    print("投稿通報機能マイグレーション開始")
+    print("========================================\n")
+
+    if not create_tables() or not add_report_count() or not insert_setting():
+        print("\n❌ マイグレーション失敗")
+        sys.exit(1)
+
+    print("\n✅ マイグレーション完了!")
+    print("========================================\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+entry_logs の月次パーティション化と入退場集計テーブルの作成マイグレーション
+
+このスクリプトは以下を行います：
+1. entry_hourly_rollups / entry_daily_rollups テーブルの作成
+2. entry_logs へのインデックス追加
+3. MySQL: entry_logs を occurred_at の月単位 RANGE パーティションに変換
+   SQLite: 古い月を entry_logs_YYYYMM テーブルへ移動（月別テーブル方式）
+4. 既存の entry_logs から集計テーブルを再構築
+
+注意（MySQL）:
+- パーティション表は外部キーを持てないため、entry_logs.user_id の外部キー制約を削除します
+- パーティションキーを主キーに含める必要があるため、主キーを (id, occurred_at) に変更します
+"""
+
+import sys
+from datetime import date
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import func, text, inspect
+from dotenv import load_dotenv
+from db_control.models import Base, EntryLog, EntryHourlyRollup, EntryDailyRollup
+from database import engine, SessionLocal
+from entry_analytics import (
+    monthly_partition_bounds, rebuild_rollups, archive_sqlite_entry_logs, to_local
+)
+
+load_dotenv()
+
+
+def create_tables():
+    """集計テーブルを作成"""
+    print("=== 集計テーブル作成 ===")
+    try:
+        Base.metadata.create_all(
+            bind=engine,
+            tables=[EntryHourlyRollup.__table__, EntryDailyRollup.__table__]
+        )
+        print("✅ テーブル作成完了:")
+        print("  - entry_hourly_rollups")
+        print("  - entry_daily_rollups")
+    except Exception as e:
+        print(f"❌ テーブル作成エラー: {e}")
+        return False
+    return True
+
+
+def create_indexes():
+    """entry_logs のインデックスを作成"""
+    print("\n=== インデックス作成 ===")
+    existing = {ix["name"] for ix in inspect(engine).get_indexes("entry_logs")}
+    try:
+        for index in EntryLog.__table__.indexes:
+            if index.name in existing:
+                print(f"⚠️ {index.name} は既に存在します")
+                continue
+            index.create(bind=engine)
+            print(f"✅ {index.name}")
+    except Exception as e:
+        print(f"❌ インデックス作成エラー: {e}")
+        return False
+    return True
+
+
+def partition_mysql(session):
+    """MySQL: entry_logs を月次パーティション表に変換"""
+    partitioned = session.execute(text("""
+        SELECT COUNT(*) FROM INFORMATION_SCHEMA.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE()
+        AND TABLE_NAME = 'entry_logs'
+        AND PARTITION_NAME IS NOT NULL
+    """)).scalar()
+    if partitioned:
+        print("⚠️ entry_logs は既にパーティション化されています")
+        return
+
+    oldest = session.execute(text("SELECT MIN(occurred_at) FROM entry_logs")).scalar()
+    first_month = (oldest.date() if oldest else date.today()).replace(day=1)
+
+    # 外部キー制約の削除（パーティション表では使用不可）
+    foreign_keys = session.execute(text("""
+        SELECT CONSTRAINT_NAME FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
+        WHERE TABLE_SCHEMA = DATABASE()
+        AND TABLE_NAME = 'entry_logs'
+        AND REFERENCED_TABLE_NAME IS NOT NULL
+    """)).fetchall()
+    for (constraint_name,) in foreign_keys:
+        print(f"Dropping foreign key {constraint_name}...")
+        session.execute(text(f"ALTER TABLE entry_logs DROP FOREIGN KEY {constraint_name}"))
+
+    # パーティションキーは主キーに含める必要がある（NULL不可）
+    session.execute(text(
+        "UPDATE entry_logs SET occurred_at = '1970-01-01 00:00:00' WHERE occurred_at IS NULL"
+    ))
+    session.execute(text("ALTER TABLE entry_logs MODIFY occurred_at DATETIME NOT NULL"))
+    session.execute(text(
+        "ALTER TABLE entry_logs DROP PRIMARY KEY, ADD PRIMARY KEY (id, occurred_at)"
+    ))
+
+    partitions = [
+        f"PARTITION p_old VALUES LESS THAN (TO_DAYS('{first_month.isoformat()}'))"
+    ] + [
+        f"PARTITION {name} VALUES LESS THAN (TO_DAYS('{upper.isoformat()}'))"
+        for name, upper in monthly_partition_bounds(first_month, months_ahead=3)
+    ] + [
+        "PARTITION pmax VALUES LESS THAN MAXVALUE"
+    ]
+    print(f"Partitioning entry_logs into {len(partitions)} partitions...")
+    session.execute(text(
+        "ALTER TABLE entry_logs PARTITION BY RANGE (TO_DAYS(occurred_at)) ("
+        + ", ".join(partitions) + ")"
+    ))
+    print("✅ パーティション化完了")
+
+
+def partition_tables():
+    """DBの種類に応じてパーティション化を実行"""
+    print("\n=== entry_logs パーティション化 ===")
+    session = SessionLocal()
+    try:
+        dialect = engine.dialect.name
+        if dialect == "mysql":
+            partition_mysql(session)
+        elif dialect == "sqlite":
+            archived = archive_sqlite_entry_logs(session)
+            print(f"✅ 月別テーブルへ移動: {', '.join(archived) if archived else 'なし'}")
+        else:
+            print(f"⚠️ {dialect} はパーティション化の対象外です")
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        print(f"❌ パーティション化エラー: {e}")
+        return False
+    finally:
+        session.close()
+    return True
+
+
+def backfill_rollups():
+    """既存の入退場ログから集計テーブルを構築"""
+    print("\n=== 集計テーブル初期投入 ===")
+    session = SessionLocal()
+    try:
+        oldest, newest = session.query(
+            func.min(EntryLog.occurred_at), func.max(EntryLog.occurred_at)
+        ).one()
+        if oldest is None:
+            print("⚠️ entry_logs にデータがありません")
+            return True
+
+        processed = rebuild_rollups(session, to_local(oldest).date(), to_local(newest).date())
+        session.commit()
+        print(f"✅ {processed}件の入退場ログを集計しました")
+    except Exception as e:
+        session.rollback()
+        print(f"❌ 集計テーブル初期投入エラー: {e}")
+        return False
+    finally:
+        session.close()
+    return True
+
+
+def main():
+    """メイン処理"""
+    print("\n========================================")
+    print("entry_logs パーティション化マイグレーション開始")
+    print("========================================\n")
+
+    if not create_tables():
+        print("\n❌ マイグレーション失敗")
+        sys.exit(1)
+
+    if not create_indexes():
+        print("⚠️ インデックス作成に失敗しました")
+
+    # 集計はパーティション化（SQLiteでは旧月の移動）より前に行う
+    if not backfill_rollups():
+        print("⚠️ 集計テーブルの初期投入に失敗しました")
+
+    if not partition_tables():
+        print("⚠️ パーティション化に失敗しました")
+
+    print("\n✅ マイグレーション完了!")
+    print("========================================\n")
+
+
+if __name__ == "__main__":
+    main()
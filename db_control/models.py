@@ -11,6 +11,9 @@ from sqlalchemy import (
     Enum,
     ForeignKey,
     Boolean,
+    Float,
+    Index,
+    UniqueConstraint,
 )
 from sqlalchemy.ext.declarative import declarative_base
 import enum
@@ -50,6 +53,17 @@ class NoticeStatus(enum.Enum):
     published = "published"          # 公開中
     archived = "archived"            # アーカイブ
 
+class JobStatus(enum.Enum):
+    pending = "pending"              # 実行待ち（リトライ待ちを含む）
+    running = "running"              # 実行中
+    succeeded = "succeeded"          # 完了
+    dead = "dead"                    # リトライ上限に達して停止（デッドレター）
+
+class DeliveryStatus(enum.Enum):
+    pending = "pending"              # 送信待ち
+    sent = "sent"                    # 送信済み
+    failed = "failed"                # 送信失敗（ジョブのリトライで再送）
+
 class NoticePriority(enum.Enum):
     low = "low"                      # 低
     normal = "normal"                # 通常
@@ -61,6 +75,12 @@ class NoticePriority(enum.Enum):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # 申請時の重複チェック用（fingerprints.py）
+        Index("ix_users_email_normalized", "email_normalized"),
+        Index("ix_users_phone_hash", "phone_hash"),
+        Index("ix_users_address_hash", "address_hash"),
+    )
     id            = Column(String(36), primary_key=True)
     email         = Column(String(255), unique=True, nullable=False)
     password_hash = Column(String(255), nullable=False)
@@ -75,6 +95,12 @@ class User(Base):
     building      = Column(String(255))
     phone_number  = Column(String(20))
     avatar_url    = Column(String(255))
+    # 重複検出用フィンガープリント
+    email_normalized = Column(String(255))
+    phone_hash    = Column(String(64))
+    address_hash  = Column(String(64))
+    # 未読のお知らせ数（notice_inbox.py で既読・配信時に増減）
+    unread_notice_count = Column(Integer, nullable=False, default=0, server_default="0")
     created_at    = Column(DateTime)
     updated_at    = Column(DateTime)
 
@@ -97,6 +123,13 @@ class AdminUser(Base):
 
 class AdminLog(Base):
     __tablename__ = "admin_logs"
+    __table_args__ = (
+        # /admin/logs の絞り込み + 新しい順のキーセットページネーション用
+        Index("ix_admin_logs_created_id", "created_at", "id"),
+        Index("ix_admin_logs_admin_created", "admin_user_id", "created_at", "id"),
+        Index("ix_admin_logs_action_created", "action", "created_at", "id"),
+        Index("ix_admin_logs_target_created", "target_type", "target_id", "created_at", "id"),
+    )
     id            = Column(String(36), primary_key=True)
     admin_user_id = Column(String(36), ForeignKey("admin_users.id"), nullable=False)
     action        = Column(String(100), nullable=False)
@@ -110,6 +143,22 @@ class AdminLog(Base):
 
 class Application(Base):
     __tablename__ = "applications"
+    __table_args__ = (
+        # 審査待ちキュー・一覧の新しい順キーセットページネーション用
+        Index("ix_applications_status_created", "status", "created_at", "id"),
+        Index("ix_applications_created", "created_at", "id"),
+        Index("ix_applications_request_date", "request_date"),
+        # 前方一致検索用
+        Index("ix_applications_user_email", "user_email"),
+        Index("ix_applications_user_last_name", "user_last_name"),
+        Index("ix_applications_user_first_name", "user_first_name"),
+        Index("ix_applications_dog_name", "dog_name"),
+        # 重複チェック・重複候補の抽出用（fingerprints.py）
+        Index("ix_applications_email_normalized_status", "email_normalized", "status"),
+        Index("ix_applications_phone_hash", "phone_hash"),
+        Index("ix_applications_address_hash", "address_hash"),
+        Index("ix_applications_dog_hash", "dog_hash"),
+    )
     id                    = Column(String(36), primary_key=True)
     user_id               = Column(String(36), ForeignKey("users.id"), nullable=True)  # NULL許可に変更
     # ユーザー情報（申請時に保存）
@@ -136,6 +185,12 @@ class Application(Base):
     approved_by           = Column(String(36), ForeignKey("admin_users.id"))
     approved_at           = Column(DateTime)
     rejection_reason      = Column(Text)         # 却下理由
+    # 重複検出用フィンガープリント
+    email_normalized      = Column(String(255))
+    phone_hash            = Column(String(64))
+    address_hash          = Column(String(64))
+    dog_hash              = Column(String(64))
+    duplicate_candidates  = Column(Text)         # 申請時に抽出した重複候補（JSON）
     created_at            = Column(DateTime)
     updated_at            = Column(DateTime)
 
@@ -186,12 +241,53 @@ class VaccinationRecord(Base):
 
 class EntryLog(Base):
     __tablename__ = "entry_logs"
+    # 本番(MySQL)では occurred_at による月次パーティション表
+    # （db_control/migrate_entry_logs_partitioning.py を参照）
+    __table_args__ = (
+        Index("ix_entry_logs_user_occurred", "user_id", "occurred_at"),
+        Index("ix_entry_logs_occurred", "occurred_at"),
+    )
     id          = Column(String(36), primary_key=True)
     user_id     = Column(String(36), ForeignKey("users.id"), nullable=False)
     action      = Column(Enum(EntryAction), nullable=False)
     occurred_at = Column(DateTime)
 
 
+# ── 入退場集計（ロールアップ）テーブル ──────────────────────────
+# 時刻はすべて現地時刻（entry_analytics.PARK_TZ_OFFSET）で集計する
+
+class EntryHourlyRollup(Base):
+    __tablename__ = "entry_hourly_rollups"
+    __table_args__ = (
+        Index("ix_entry_hourly_rollups_date", "bucket_date"),
+        Index("ix_entry_hourly_rollups_dow_hour", "day_of_week", "hour_of_day"),
+    )
+    id                 = Column(String(36), primary_key=True)
+    bucket_start       = Column(DateTime, nullable=False, unique=True)  # 1時間枠の開始時刻
+    bucket_date        = Column(Date, nullable=False)
+    hour_of_day        = Column(Integer, nullable=False)  # 0-23
+    day_of_week        = Column(Integer, nullable=False)  # 0:日曜, 1:月曜, ..., 6:土曜
+    entries            = Column(Integer, nullable=False, default=0)
+    exits              = Column(Integer, nullable=False, default=0)
+    unique_visitors    = Column(Integer, nullable=False, default=0)
+    completed_stays    = Column(Integer, nullable=False, default=0)  # 入場枠基準の退場済み滞在数
+    total_stay_seconds = Column(Integer, nullable=False, default=0)
+    updated_at         = Column(DateTime)
+
+
+class EntryDailyRollup(Base):
+    __tablename__ = "entry_daily_rollups"
+    id                 = Column(String(36), primary_key=True)
+    bucket_date        = Column(Date, nullable=False, unique=True)
+    day_of_week        = Column(Integer, nullable=False)  # 0:日曜, 1:月曜, ..., 6:土曜
+    entries            = Column(Integer, nullable=False, default=0)
+    exits              = Column(Integer, nullable=False, default=0)
+    unique_visitors    = Column(Integer, nullable=False, default=0)
+    completed_stays    = Column(Integer, nullable=False, default=0)
+    total_stay_seconds = Column(Integer, nullable=False, default=0)
+    updated_at         = Column(DateTime)
+
+
 class Event(Base):
     __tablename__ = "events"
     id           = Column(String(36), primary_key=True)
@@ -210,10 +306,15 @@ class Event(Base):
 
 class EventRegistration(Base):
     __tablename__ = "event_registrations"
+    __table_args__ = (
+        # イベントごとの参加者一覧（登録順）用
+        Index("ix_event_registrations_event_registered", "event_id", "registered_at"),
+    )
     id      = Column(String(36), primary_key=True)
     user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
     event_id= Column(String(36), ForeignKey("events.id"), nullable=False)
     dog_id  = Column(String(36), ForeignKey("dogs.id"))
+    registered_at = Column(DateTime)
 
 
 class Announcement(Base):
@@ -228,15 +329,41 @@ class Announcement(Base):
 
 class Post(Base):
     __tablename__ = "posts"
+    __table_args__ = (
+        # モデレーションキュー・公開フィード（ステータスごとの新しい順/古い順）用
+        Index("ix_posts_status_created", "status", "created_at", "id"),
+        # フィードに含める自分の審査待ち投稿用
+        Index("ix_posts_user_status_created", "user_id", "status", "created_at"),
+        # 通報の多い順の審査用
+        Index("ix_posts_status_report_count", "status", "report_count"),
+    )
     id          = Column(String(36), primary_key=True)
     user_id     = Column(String(36), ForeignKey("users.id"), nullable=False)
     content     = Column(Text)
     status      = Column(Enum(PostStatus), default=PostStatus.pending)
     admin_notes = Column(Text)         # 管理者メモ
+    # モデレーションキューの確保（期限切れの確保は他の管理者が取得できる）
+    claimed_by       = Column(String(36), ForeignKey("admin_users.id"))
+    claim_expires_at = Column(DateTime)
+    report_count     = Column(Integer, nullable=False, default=0, server_default="0")  # post_reports の件数
     created_at  = Column(DateTime)
     updated_at  = Column(DateTime)
 
 
+class PostReport(Base):
+    __tablename__ = "post_reports"
+    __table_args__ = (
+        # 同じユーザーによる同じ投稿への通報は1件のみ
+        UniqueConstraint("post_id", "user_id", name="uq_post_reports_post_user"),
+    )
+    id          = Column(String(36), primary_key=True)
+    post_id     = Column(String(36), ForeignKey("posts.id"), nullable=False)
+    user_id     = Column(String(36), ForeignKey("users.id"), nullable=False)
+    reason      = Column(String(50), nullable=False)  # spam, inappropriate, harassment, other
+    comment     = Column(Text)
+    created_at  = Column(DateTime)
+
+
 class PostImage(Base):
     __tablename__ = "post_images"
     id          = Column(String(36), primary_key=True)
@@ -282,6 +409,26 @@ class Bookmark(Base):
     created_at  = Column(DateTime)
 
 
+class OccupancyForecast(Base):
+    __tablename__ = "occupancy_forecasts"
+    __table_args__ = (
+        UniqueConstraint("day_of_week", "hour_of_day", name="uq_occupancy_forecasts_slot"),
+    )
+    id                 = Column(String(36), primary_key=True)
+    day_of_week        = Column(Integer, nullable=False)  # 0:日曜, 1:月曜, ..., 6:土曜
+    hour_of_day        = Column(Integer, nullable=False)  # 0-23（現地時刻）
+    # 学習用の累積値（日ごとに減衰させた重み付き合計）
+    entries_sum        = Column(Float, nullable=False, default=0)
+    completed_stays_sum= Column(Float, nullable=False, default=0)
+    stay_seconds_sum   = Column(Float, nullable=False, default=0)
+    sample_days        = Column(Float, nullable=False, default=0)
+    # 予測値
+    expected_entries   = Column(Float, nullable=False, default=0)
+    expected_occupancy = Column(Float, nullable=False, default=0)
+    trained_through    = Column(Date)      # この日付までの集計を学習済み
+    trained_at         = Column(DateTime)
+
+
 # ── 営業時間管理テーブル ──────────────────────────────────
 
 class BusinessHour(Base):
@@ -309,6 +456,28 @@ class SpecialHoliday(Base):
     updated_at    = Column(DateTime)
 
 
+class CalendarDay(Base):
+    """月間カレンダーのマテリアライズドビュー（calendar_service が管理）"""
+    __tablename__ = "calendar_days"
+    __table_args__ = (
+        Index("ix_calendar_days_year_month", "year", "month"),
+    )
+    id                 = Column(String(36), primary_key=True)
+    calendar_date      = Column(Date, nullable=False, unique=True)
+    year               = Column(Integer, nullable=False)
+    month              = Column(Integer, nullable=False)
+    day_of_week        = Column(Integer, nullable=False)  # 0:日曜, 1:月曜, ..., 6:土曜
+    is_open            = Column(Boolean, default=False)
+    open_time          = Column(Time)
+    close_time         = Column(Time)
+    is_holiday         = Column(Boolean, default=False)
+    holiday_name       = Column(String(100))
+    note               = Column(Text)
+    event_count        = Column(Integer, default=0)
+    remaining_capacity = Column(Integer)  # 受付中イベントの残り枠合計（定員なしのみの日はNULL）
+    refreshed_at       = Column(DateTime)
+
+
 # ── お知らせ・タグテーブル ──────────────────────────────────
 
 class Notice(Base):
@@ -323,6 +492,21 @@ class Notice(Base):
     updated_at  = Column(DateTime)
 
 
+class NoticeReceipt(Base):
+    """ユーザーごとのお知らせの受信箱（公開時に配信し、既読状態を保持）"""
+    __tablename__ = "notice_receipts"
+    __table_args__ = (
+        # 受信箱の新しい順キーセットページネーション用
+        Index("ix_notice_receipts_user_created", "user_id", "created_at", "notice_id"),
+        # お知らせのアーカイブ・削除時の取り消し用
+        Index("ix_notice_receipts_notice", "notice_id"),
+    )
+    user_id     = Column(String(36), ForeignKey("users.id"), primary_key=True)
+    notice_id   = Column(String(36), ForeignKey("notices.id"), primary_key=True)
+    created_at  = Column(DateTime, nullable=False)  # 配信日時
+    read_at     = Column(DateTime)                  # 未読の場合は NULL
+
+
 class Tag(Base):
     __tablename__ = "tags"
     id     = Column(String(36), primary_key=True)
@@ -342,3 +526,73 @@ class SystemSetting(Base):
     is_public     = Column(Boolean, default=False)  # 一般ユーザーにも公開するか
     created_at    = Column(DateTime)
     updated_at    = Column(DateTime)
+
+
+class CacheVersion(Base):
+    """プロセス内キャッシュの世代番号（更新時に加算し、各ワーカーがポーリングで検知する）"""
+    __tablename__ = "cache_versions"
+    name       = Column(String(50), primary_key=True)  # system_settings など
+    version    = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime)
+
+
+class Job(Base):
+    """コミット後の副作用処理（通知など）のジョブキュー（job_queue.py）"""
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # ワーカーが実行可能なジョブを取り出す用
+        Index("ix_jobs_status_run_at", "status", "run_at"),
+        Index("ix_jobs_type_status", "job_type", "status"),
+    )
+    id           = Column(String(36), primary_key=True)
+    job_type     = Column(String(100), nullable=False)
+    payload      = Column(Text)                       # JSON
+    status       = Column(Enum(JobStatus), nullable=False, default=JobStatus.pending)
+    attempts     = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_at       = Column(DateTime, nullable=False)   # この時刻以降に実行（リトライ時はバックオフ後の時刻）
+    locked_by    = Column(String(64))                 # 実行中のワーカー
+    locked_at    = Column(DateTime)
+    last_error   = Column(Text)
+    created_at   = Column(DateTime)
+    updated_at   = Column(DateTime)
+    finished_at  = Column(DateTime)
+
+
+class Notification(Base):
+    """参加者などへの一斉通知（notifications.py）"""
+    __tablename__ = "notifications"
+    __table_args__ = (
+        Index("ix_notifications_created", "created_at", "id"),
+        Index("ix_notifications_event_created", "event_id", "created_at"),
+    )
+    id              = Column(String(36), primary_key=True)
+    kind            = Column(String(50), nullable=False)    # event_cancelled, event_notification, application_approved
+    subject         = Column(String(255), nullable=False)
+    body            = Column(Text, nullable=False)
+    event_id        = Column(String(36), ForeignKey("events.id"))
+    created_by      = Column(String(36), ForeignKey("admin_users.id"))
+    recipient_count = Column(Integer, nullable=False, default=0)
+    created_at      = Column(DateTime)
+
+
+class NotificationDelivery(Base):
+    """通知の宛先ごとの送信状況"""
+    __tablename__ = "notification_deliveries"
+    __table_args__ = (
+        # 同じ通知を同じユーザーに重複して送らない
+        UniqueConstraint("notification_id", "user_id", name="uq_notification_deliveries_notification_user"),
+        # 通知ごとのステータス別集計・一覧用
+        Index("ix_notification_deliveries_notification_status", "notification_id", "status"),
+    )
+    id              = Column(String(36), primary_key=True)
+    notification_id = Column(String(36), ForeignKey("notifications.id"), nullable=False)
+    user_id         = Column(String(36), ForeignKey("users.id"), nullable=False)
+    channel         = Column(String(20))                   # 送信に使ったシンク（log / file / smtp）
+    recipient       = Column(String(255))                  # 送信先（送信時点のメールアドレス）
+    status          = Column(Enum(DeliveryStatus), nullable=False, default=DeliveryStatus.pending)
+    attempts        = Column(Integer, nullable=False, default=0)
+    last_error      = Column(Text)
+    sent_at         = Column(DateTime)
+    created_at      = Column(DateTime)
+    updated_at      = Column(DateTime)
@@ -0,0 +1,197 @@
+"""
+関連データを含めた一括削除
+
+モデルの外部キー定義から削除対象の依存関係をたどって削除計画を作り、子テーブルから順に
+集合単位の DELETE / UPDATE で処理する。
+
+- NULL 不可の外部キーで参照している行は削除する（さらにその子もたどる）
+- NULL 可の外部キーで参照している行は残し、参照を NULL にする（申請の user_id など）
+- 削除した行が参照していたアップロードファイルはコミット後にジョブで削除する
+- 件数を非正規化して持つ親の行（posts.report_count など）は同じトランザクションで数え直す
+
+通常は1トランザクションで実行する（コミットは呼び出し元）。件数の多いユーザーなどは
+run_batched() でステップごとに一定件数ずつ削除・コミットするバックグラウンド実行ができる。
+"""
+
+import logging
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import Table, func, select, tuple_, update
+from sqlalchemy.orm import Session
+
+from db_control.models import Base
+from job_queue import enqueue_job, job_handler
+
+logger = logging.getLogger(__name__)
+
+# バックグラウンド実行で1回に削除する行数
+DELETION_BATCH_SIZE = int(os.getenv("DELETION_BATCH_SIZE", "1000"))
+
+# アップロードファイルを参照するカラム（テーブル名 → カラム名）
+FILE_COLUMNS = {
+    "users": "avatar_url",
+    "dogs": "avatar_url",
+    "vaccination_records": "image_url",
+    "post_images": "image_url",
+    "applications": "vaccine_certificate",
+}
+
+# 子テーブルの件数を保持するカラム（子テーブル名 → (外部キーのカラム名, 親テーブル名, 件数のカラム名)）
+COUNTER_COLUMNS = {
+    "post_reports": ("post_id", "posts", "report_count"),
+}
+
+
+@dataclass
+class DeletionStep:
+    """削除計画の1ステップ（where の条件に一致する行を削除、または column を NULL に更新）"""
+    action: str            # delete / nullify
+    table: Table
+    where: Any
+    path: str              # 削除対象からのたどり方（表示用）
+    column: Optional[str] = None  # nullify の場合に NULL にするカラム
+
+
+def _referencing_foreign_keys(table: Table):
+    """table を参照している外部キーの一覧"""
+    for child in Base.metadata.sorted_tables:
+        for fk in child.foreign_keys:
+            if fk.column.table is table:
+                yield child, fk
+
+
+def plan_deletion(table_name: str, ids: Sequence[str]) -> List[DeletionStep]:
+    """table_name の ids の行を削除するための計画（子から順に並んだステップ）"""
+    table = Base.metadata.tables[table_name]
+    steps: List[DeletionStep] = []
+
+    def visit(current: Table, where, path: str, ancestors: tuple):
+        for child, fk in _referencing_foreign_keys(current):
+            child_column = fk.parent
+            child_where = child_column.in_(select(fk.column).where(where))
+            child_path = f"{path} > {child.name}.{child_column.name}"
+            if child_column.nullable:
+                steps.append(DeletionStep("nullify", child, child_where, child_path, child_column.name))
+            elif child.name in ancestors:
+                # 循環参照はたどらない（現在のモデルには存在しない）
+                continue
+            else:
+                visit(child, child_where, child_path, ancestors + (child.name,))
+        steps.append(DeletionStep("delete", current, where, path))
+
+    visit(table, table.c.id.in_(list(ids)), table_name, (table_name,))
+    return steps
+
+
+def count_plan(db: Session, steps: List[DeletionStep]) -> List[Dict[str, Any]]:
+    """各ステップの対象行数（削除前の確認用）"""
+    return [
+        {
+            "action": step.action,
+            "table": step.table.name,
+            "path": step.path,
+            "rows": db.execute(
+                select(func.count()).select_from(step.table).where(step.where)
+            ).scalar(),
+        }
+        for step in steps
+    ]
+
+
+def _file_urls(db: Session, step: DeletionStep, where) -> List[str]:
+    column = FILE_COLUMNS.get(step.table.name)
+    if step.action != "delete" or column is None:
+        return []
+    return [
+        url for (url,) in db.execute(select(step.table.c[column]).where(where))
+        if url
+    ]
+
+
+def _apply(db: Session, step: DeletionStep, where) -> int:
+    if step.action == "nullify":
+        statement = update(step.table).where(where).values({step.column: None})
+        return db.execute(statement).rowcount
+
+    counter = COUNTER_COLUMNS.get(step.table.name)
+    parent_ids = []
+    if counter:
+        parent_ids = list(db.execute(select(step.table.c[counter[0]]).where(where).distinct()).scalars())
+    count = db.execute(step.table.delete().where(where)).rowcount
+    if parent_ids:
+        _recount(db, step.table, counter, parent_ids)
+    return count
+
+
+def _recount(db: Session, child: Table, counter, parent_ids: List[str]):
+    """削除で件数が変わった親の行の件数カラムを数え直す"""
+    fk_column, parent_name, count_column = counter
+    parent = Base.metadata.tables[parent_name]
+    db.execute(
+        update(parent).where(parent.c.id.in_(parent_ids)).values({
+            count_column: select(func.count()).select_from(child).where(
+                child.c[fk_column] == parent.c.id
+            ).scalar_subquery()
+        })
+    )
+
+
+def _enqueue_file_deletion(db: Session, urls: List[str]):
+    if urls:
+        enqueue_job(db, "delete_upload_files", {"urls": urls})
+
+
+def execute_plan(db: Session, steps: List[DeletionStep]) -> Dict[str, int]:
+    """計画を1ステップ1文で実行（コミットは呼び出し元で行う。戻り値はテーブルごとの削除件数）"""
+    deleted: Dict[str, int] = {}
+    urls: List[str] = []
+    for step in steps:
+        urls.extend(_file_urls(db, step, step.where))
+        count = _apply(db, step, step.where)
+        if step.action == "delete":
+            deleted[step.table.name] = deleted.get(step.table.name, 0) + count
+    _enqueue_file_deletion(db, urls)
+    return deleted
+
+
+def delete_rows(db: Session, table_name: str, ids: Sequence[str]) -> Dict[str, int]:
+    """ids の行と依存する行をまとめて削除（コミットは呼び出し元で行う）"""
+    if not ids:
+        return {}
+    return execute_plan(db, plan_deletion(table_name, ids))
+
+
+def run_batched(db: Session, table_name: str, ids: Sequence[str], batch_size: int = DELETION_BATCH_SIZE) -> Dict[str, int]:
+    """ステップごとに batch_size 件ずつ削除してコミット
+
+    途中で失敗しても、再実行すれば残りの行から続きを処理する。
+    """
+    deleted: Dict[str, int] = {}
+    for step in plan_deletion(table_name, ids):
+        keys = list(step.table.primary_key.columns)
+        while True:
+            batch_keys = [
+                tuple(row) for row in db.execute(select(*keys).where(step.where).limit(batch_size))
+            ]
+            if not batch_keys:
+                break
+            if len(keys) == 1:
+                where = keys[0].in_([key for (key,) in batch_keys])
+            else:
+                # 複合主キーのテーブル（notice_receipts など）
+                where = tuple_(*keys).in_(batch_keys)
+            _enqueue_file_deletion(db, _file_urls(db, step, where))
+            count = _apply(db, step, where)
+            db.commit()
+            if step.action == "delete":
+                deleted[step.table.name] = deleted.get(step.table.name, 0) + count
+    return deleted
+
+
+@job_handler("delete_rows")
+def delete_rows_in_background(db: Session, payload: Dict[str, Any]):
+    """バックグラウンドでの一括削除"""
+    deleted = run_batched(db, payload["table"], payload["ids"])
+    logger.info("background deletion of %s %s finished: %s", payload["table"], payload["ids"], deleted)
@@ -0,0 +1,437 @@
+"""
+入退場ログの集計（ロールアップ）とパーティション管理
+
+entry_logs を直接スキャンせずに混雑状況・滞在時間を答えられるよう、
+入場・退場のたびに時間別／日別の集計テーブルを差分更新する。
+"""
+
+import logging
+import os
+import re
+from datetime import datetime, date, timedelta
+from typing import Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from sqlalchemy import func, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from db_control.models import (
+    EntryLog, EntryAction, EntryHourlyRollup, EntryDailyRollup
+)
+
+logger = logging.getLogger(__name__)
+
+# entry_logs.occurred_at は UTC で保存されている。集計は現地時刻（既定: JST）で行う
+PARK_TZ_OFFSET = timedelta(hours=int(os.getenv("PARK_TZ_OFFSET_HOURS", "9")))
+
+DAY_NAMES = ["日曜日", "月曜日", "火曜日", "水曜日", "木曜日", "金曜日", "土曜日"]
+
+_COUNTER_COLUMNS = (
+    "entries", "exits", "unique_visitors", "completed_stays", "total_stay_seconds"
+)
+
+
+def to_local(dt: datetime) -> datetime:
+    """UTCの日時を現地時刻に変換"""
+    return dt + PARK_TZ_OFFSET
+
+
+def to_utc(dt: datetime) -> datetime:
+    """現地時刻をUTCに変換"""
+    return dt - PARK_TZ_OFFSET
+
+
+def sql_day_of_week(d: date) -> int:
+    """日付を business_hours と同じ曜日形式（日曜=0）に変換"""
+    return (d.weekday() + 1) % 7
+
+
+def _hour_bucket(occurred_at: datetime) -> datetime:
+    return to_local(occurred_at).replace(minute=0, second=0, microsecond=0)
+
+
+def _bump(db: Session, model, key_column, key_value, fields: dict, increments: Dict[str, int]):
+    """集計行を加算更新し、存在しなければ作成する（UPDATE → INSERT の順）"""
+    now = datetime.utcnow()
+    values = {
+        getattr(model, name): getattr(model, name) + amount
+        for name, amount in increments.items() if amount
+    }
+    values[model.updated_at] = now
+
+    updated = db.query(model).filter(key_column == key_value).update(
+        values, synchronize_session=False
+    )
+    if updated:
+        return
+
+    row = model(id=str(uuid4()), updated_at=now, **fields)
+    for name in _COUNTER_COLUMNS:
+        setattr(row, name, increments.get(name, 0))
+    try:
+        with db.begin_nested():
+            db.add(row)
+    except IntegrityError:
+        # 別リクエストが同じ枠を先に作成した場合は加算に切り替える
+        db.query(model).filter(key_column == key_value).update(
+            values, synchronize_session=False
+        )
+
+
+def _bump_hour(db: Session, bucket_start: datetime, increments: Dict[str, int]):
+    bucket_date = bucket_start.date()
+    _bump(
+        db, EntryHourlyRollup, EntryHourlyRollup.bucket_start, bucket_start,
+        fields={
+            "bucket_start": bucket_start,
+            "bucket_date": bucket_date,
+            "hour_of_day": bucket_start.hour,
+            "day_of_week": sql_day_of_week(bucket_date),
+        },
+        increments=increments,
+    )
+
+
+def _bump_day(db: Session, bucket_date: date, increments: Dict[str, int]):
+    _bump(
+        db, EntryDailyRollup, EntryDailyRollup.bucket_date, bucket_date,
+        fields={
+            "bucket_date": bucket_date,
+            "day_of_week": sql_day_of_week(bucket_date),
+        },
+        increments=increments,
+    )
+
+
+def record_entry(db: Session, user_id: str, occurred_at: datetime):
+    """入場を集計に反映（呼び出し元のトランザクション内で実行）"""
+    hour_start = _hour_bucket(occurred_at)
+    day_start = hour_start.replace(hour=0)
+
+    # 同じ日の直前の入場（インデックス user_id, occurred_at で1件引き）
+    previous_entry = db.query(func.max(EntryLog.occurred_at)).filter(
+        EntryLog.user_id == user_id,
+        EntryLog.action == EntryAction.entry,
+        EntryLog.occurred_at >= to_utc(day_start),
+        EntryLog.occurred_at < occurred_at
+    ).scalar()
+
+    new_in_day = previous_entry is None
+    new_in_hour = new_in_day or previous_entry < to_utc(hour_start)
+
+    _bump_hour(db, hour_start, {"entries": 1, "unique_visitors": int(new_in_hour)})
+    _bump_day(db, hour_start.date(), {"entries": 1, "unique_visitors": int(new_in_day)})
+
+
+def record_exit(db: Session, user_id: str, entered_at: datetime, exited_at: datetime):
+    """退場と滞在時間を集計に反映（滞在時間は入場した枠に計上）"""
+    exit_hour = _hour_bucket(exited_at)
+    _bump_hour(db, exit_hour, {"exits": 1})
+    _bump_day(db, exit_hour.date(), {"exits": 1})
+
+    stay_seconds = max(int((exited_at - entered_at).total_seconds()), 0)
+    entry_hour = _hour_bucket(entered_at)
+    stay = {"completed_stays": 1, "total_stay_seconds": stay_seconds}
+    _bump_hour(db, entry_hour, stay)
+    _bump_day(db, entry_hour.date(), stay)
+
+
+def rebuild_rollups(db: Session, start_date: date, end_date: date) -> int:
+    """指定期間（現地日付）の集計を entry_logs から再構築（初期投入・修復用）"""
+    range_start = to_utc(datetime.combine(start_date, datetime.min.time()))
+    range_end = to_utc(datetime.combine(end_date + timedelta(days=1), datetime.min.time()))
+
+    hourly: Dict[datetime, Dict[str, int]] = {}
+    daily: Dict[date, Dict[str, int]] = {}
+    seen_hour = set()
+    seen_day = set()
+    open_entries: Dict[str, datetime] = {}
+
+    def counters(table, key):
+        return table.setdefault(key, dict.fromkeys(_COUNTER_COLUMNS, 0))
+
+    logs = db.query(EntryLog.user_id, EntryLog.action, EntryLog.occurred_at).filter(
+        EntryLog.occurred_at >= range_start,
+        EntryLog.occurred_at < range_end
+    ).order_by(EntryLog.occurred_at).yield_per(1000)
+
+    processed = 0
+    for user_id, action, occurred_at in logs:
+        processed += 1
+        hour_start = _hour_bucket(occurred_at)
+        day = hour_start.date()
+        if action == EntryAction.entry:
+            counters(hourly, hour_start)["entries"] += 1
+            counters(daily, day)["entries"] += 1
+            if (user_id, hour_start) not in seen_hour:
+                seen_hour.add((user_id, hour_start))
+                counters(hourly, hour_start)["unique_visitors"] += 1
+            if (user_id, day) not in seen_day:
+                seen_day.add((user_id, day))
+                counters(daily, day)["unique_visitors"] += 1
+            open_entries[user_id] = occurred_at
+        else:
+            counters(hourly, hour_start)["exits"] += 1
+            counters(daily, day)["exits"] += 1
+            entered_at = open_entries.pop(user_id, None)
+            if entered_at is not None:
+                entry_hour = _hour_bucket(entered_at)
+                stay_seconds = max(int((occurred_at - entered_at).total_seconds()), 0)
+                for table, key in ((hourly, entry_hour), (daily, entry_hour.date())):
+                    counters(table, key)["completed_stays"] += 1
+                    counters(table, key)["total_stay_seconds"] += stay_seconds
+
+    db.query(EntryHourlyRollup).filter(
+        EntryHourlyRollup.bucket_date.between(start_date, end_date)
+    ).delete(synchronize_session=False)
+    db.query(EntryDailyRollup).filter(
+        EntryDailyRollup.bucket_date.between(start_date, end_date)
+    ).delete(synchronize_session=False)
+
+    now = datetime.utcnow()
+    db.bulk_insert_mappings(EntryHourlyRollup, [
+        dict(
+            id=str(uuid4()), bucket_start=hour_start, bucket_date=hour_start.date(),
+            hour_of_day=hour_start.hour, day_of_week=sql_day_of_week(hour_start.date()),
+            updated_at=now, **values
+        )
+        for hour_start, values in hourly.items()
+    ])
+    db.bulk_insert_mappings(EntryDailyRollup, [
+        dict(
+            id=str(uuid4()), bucket_date=day, day_of_week=sql_day_of_week(day),
+            updated_at=now, **values
+        )
+        for day, values in daily.items()
+    ])
+    return processed
+
+
+def _average_minutes(total_seconds: Optional[int], stays: Optional[int]) -> Optional[float]:
+    if not stays:
+        return None
+    return round((total_seconds or 0) / stays / 60, 1)
+
+
+def get_visit_analytics(db: Session, start_date: date, end_date: date) -> dict:
+    """混雑時間帯・平均滞在時間などの分析結果を集計テーブルから取得"""
+    H = EntryHourlyRollup
+    D = EntryDailyRollup
+
+    hourly_rows = db.query(
+        H.hour_of_day,
+        func.sum(H.entries),
+        func.sum(H.unique_visitors),
+        func.sum(H.completed_stays),
+        func.sum(H.total_stay_seconds)
+    ).filter(
+        H.bucket_date.between(start_date, end_date)
+    ).group_by(H.hour_of_day).all()
+
+    daily_rows = db.query(D).filter(
+        D.bucket_date.between(start_date, end_date)
+    ).order_by(D.bucket_date).all()
+
+    busiest_hours = sorted(
+        (
+            {
+                "hour": hour,
+                "entries": int(entries or 0),
+                "unique_visitors": int(visitors or 0),
+                "average_stay_minutes": _average_minutes(stay_seconds, stays),
+            }
+            for hour, entries, visitors, stays, stay_seconds in hourly_rows
+        ),
+        key=lambda h: (-h["entries"], h["hour"])
+    )
+
+    weekday_totals: Dict[int, List[int]] = {}
+    totals = dict.fromkeys(_COUNTER_COLUMNS, 0)
+    daily = []
+    for row in daily_rows:
+        for name in _COUNTER_COLUMNS:
+            totals[name] += getattr(row, name) or 0
+        bucket = weekday_totals.setdefault(row.day_of_week, [0, 0, 0, 0])
+        bucket[0] += row.entries or 0
+        bucket[1] += 1
+        bucket[2] += row.completed_stays or 0
+        bucket[3] += row.total_stay_seconds or 0
+        daily.append({
+            "date": row.bucket_date,
+            "entries": row.entries,
+            "exits": row.exits,
+            "unique_visitors": row.unique_visitors,
+            "average_stay_minutes": _average_minutes(row.total_stay_seconds, row.completed_stays),
+        })
+
+    weekday_stats = [
+        {
+            "day_of_week": dow,
+            "day_name": DAY_NAMES[dow],
+            "average_entries": round(entries / days, 1),
+            "average_stay_minutes": _average_minutes(stay_seconds, stays),
+        }
+        for dow, (entries, days, stays, stay_seconds) in sorted(weekday_totals.items())
+    ]
+
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "total_entries": totals["entries"],
+        "total_exits": totals["exits"],
+        "total_unique_visitors": totals["unique_visitors"],
+        "average_stay_minutes": _average_minutes(
+            totals["total_stay_seconds"], totals["completed_stays"]
+        ),
+        "busiest_hours": busiest_hours,
+        "weekday_stats": weekday_stats,
+        "daily": daily,
+    }
+
+
+# ── パーティション管理 ─────────────────────────────────────
+
+def _month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def _add_months(d: date, months: int) -> date:
+    month_index = d.year * 12 + (d.month - 1) + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"p{month:%Y%m}"
+
+
+def monthly_partition_bounds(first_month: date, months_ahead: int) -> List[Tuple[str, date]]:
+    """(パーティション名, 上限日) のリストを返す（上限日は翌月1日）"""
+    bounds = []
+    month = _month_start(first_month)
+    last_month = _add_months(_month_start(date.today()), months_ahead)
+    while month <= last_month:
+        bounds.append((partition_name(month), _add_months(month, 1)))
+        month = _add_months(month, 1)
+    return bounds
+
+
+def ensure_mysql_partitions(db: Session, months_ahead: int = 3) -> List[str]:
+    """MySQL: 先の月のパーティションを pmax から切り出して追加"""
+    existing = {
+        row[0] for row in db.execute(text("""
+            SELECT PARTITION_NAME FROM INFORMATION_SCHEMA.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE()
+            AND TABLE_NAME = 'entry_logs'
+            AND PARTITION_NAME IS NOT NULL
+        """))
+    }
+    if not existing:
+        # 未パーティション化（マイグレーション未実行）の場合は何もしない
+        return []
+
+    missing = [
+        (name, upper) for name, upper in monthly_partition_bounds(date.today(), months_ahead)
+        if name not in existing
+    ]
+    if not missing:
+        return []
+
+    definitions = ", ".join(
+        f"PARTITION {name} VALUES LESS THAN (TO_DAYS('{upper.isoformat()}'))"
+        for name, upper in missing
+    )
+    db.execute(text(
+        f"ALTER TABLE entry_logs REORGANIZE PARTITION pmax INTO "
+        f"({definitions}, PARTITION pmax VALUES LESS THAN MAXVALUE)"
+    ))
+    return [name for name, _ in missing]
+
+
+def sqlite_archive_table_name(month: date) -> str:
+    return f"entry_logs_{month:%Y%m}"
+
+
+def sqlite_archive_tables(db: Session) -> List[str]:
+    """SQLite: entry_logs_YYYYMM テーブルの一覧（新しい月順）"""
+    names = db.execute(text(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'entry_logs_%'"
+    )).scalars()
+    return sorted((name for name in names if re.fullmatch(r"entry_logs_\d{6}", name)), reverse=True)
+
+
+def archive_sqlite_entry_logs(db: Session, keep_months: int = 2) -> List[str]:
+    """SQLite: 保持期間より古い月を entry_logs_YYYYMM テーブルへ移動（月別テーブル方式）
+
+    entry_logs には直近 keep_months か月分だけが残るため、入場判定や在場者集計の対象が
+    一定量に保たれる。過去の分析は集計テーブルから、個人の履歴は user_entry_history() で
+    月別テーブルも含めて読む。起動時には実行せず、マイグレーション
+    （db_control/migrate_entry_logs_partitioning.py）から明示的に実行する。
+    """
+    cutoff_month = _add_months(_month_start(date.today()), -(keep_months - 1))
+    cutoff = datetime.combine(cutoff_month, datetime.min.time())
+
+    months = [
+        row[0] for row in db.execute(text(
+            "SELECT DISTINCT strftime('%Y%m', occurred_at) FROM entry_logs "
+            "WHERE occurred_at < :cutoff"
+        ), {"cutoff": cutoff})
+        if row[0]
+    ]
+
+    archived = []
+    for yyyymm in months:
+        month = date(int(yyyymm[:4]), int(yyyymm[4:]), 1)
+        table = sqlite_archive_table_name(month)
+        bounds = {
+            "start": datetime.combine(month, datetime.min.time()),
+            "end": datetime.combine(_add_months(month, 1), datetime.min.time()),
+        }
+        db.execute(text(f"CREATE TABLE IF NOT EXISTS {table} AS SELECT * FROM entry_logs WHERE 0"))
+        db.execute(text(
+            f"INSERT INTO {table} SELECT * FROM entry_logs "
+            f"WHERE occurred_at >= :start AND occurred_at < :end"
+        ), bounds)
+        db.execute(text(
+            "DELETE FROM entry_logs WHERE occurred_at >= :start AND occurred_at < :end"
+        ), bounds)
+        archived.append(table)
+    return archived
+
+
+def maintain_entry_log_partitions(db: Session) -> List[str]:
+    """DBの種類に応じたパーティション保守を実行（起動時に実行）
+
+    MySQL では先の月のパーティションを追加する。行の移動を伴う SQLite の月別テーブルへの
+    移動はここでは行わない（archive_sqlite_entry_logs を参照）。
+    """
+    if db.get_bind().dialect.name == "mysql":
+        changed = ensure_mysql_partitions(db)
+    else:
+        changed = []
+    db.commit()
+    if changed:
+        logger.info("entry_logs partitions maintained: %s", ", ".join(changed))
+    return changed
+
+
+def user_entry_history(db: Session, user_id: str, limit: int) -> List[EntryLog]:
+    """ユーザーの入退場ログを新しい順に limit 件取得
+
+    SQLite で古い月を entry_logs_YYYYMM へ移動している場合は、entry_logs で足りない分を
+    新しい月の月別テーブルから順に補う。
+    """
+    logs = db.query(EntryLog).filter(
+        EntryLog.user_id == user_id
+    ).order_by(EntryLog.occurred_at.desc()).limit(limit).all()
+    if len(logs) >= limit or db.get_bind().dialect.name != "sqlite":
+        return logs
+
+    for table in sqlite_archive_tables(db):
+        logs.extend(db.query(EntryLog).from_statement(text(
+            f"SELECT id, user_id, action, occurred_at FROM {table} "
+            f"WHERE user_id = :user_id ORDER BY occurred_at DESC LIMIT :limit"
+        )).params(user_id=user_id, limit=limit - len(logs)).all())
+        if len(logs) >= limit:
+            break
+    return logs
@@ -0,0 +1,57 @@
+"""
+イベント画面用の集約ビュー
+
+イベント画面は詳細・参加者一覧・自分の犬一覧をまとめて表示する。イベントと参加登録
+（参加者名・犬名）を events から LEFT JOIN する1クエリで取得し、閲覧者の犬を owner_id で
+取得して1回の応答で返す。参加登録ごとにユーザー・犬を個別に読み込むことはしない。
+"""
+
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from db_control.models import Dog, Event, EventRegistration, User
+
+# (参加登録, 姓, 名, 犬名)
+ParticipantRow = Tuple[EventRegistration, Optional[str], Optional[str], Optional[str]]
+
+
+@dataclass
+class EventView:
+    event: Event
+    participants: List[ParticipantRow] = field(default_factory=list)
+    viewer_dogs: List[Dog] = field(default_factory=list)
+
+
+def participant_rows(db: Session, event_id: str) -> List[ParticipantRow]:
+    """イベントの参加登録を参加者名・犬名付きで登録順に取得（1クエリ）"""
+    return db.query(EventRegistration, User.last_name, User.first_name, Dog.name).outerjoin(
+        User, User.id == EventRegistration.user_id
+    ).outerjoin(
+        Dog, Dog.id == EventRegistration.dog_id
+    ).filter(
+        EventRegistration.event_id == event_id
+    ).order_by(EventRegistration.registered_at, EventRegistration.id).all()
+
+
+def load_event_view(db: Session, event_id: str, viewer_id: str) -> Optional[EventView]:
+    """イベント・参加者・閲覧者の犬を取得（イベントがなければ None）"""
+    rows = db.query(Event, EventRegistration, User.last_name, User.first_name, Dog.name).outerjoin(
+        EventRegistration, EventRegistration.event_id == Event.id
+    ).outerjoin(
+        User, User.id == EventRegistration.user_id
+    ).outerjoin(
+        Dog, Dog.id == EventRegistration.dog_id
+    ).filter(Event.id == event_id).order_by(EventRegistration.registered_at, EventRegistration.id).all()
+    if not rows:
+        return None
+
+    view = EventView(event=rows[0][0])
+    view.participants = [
+        (reg, last_name, first_name, dog_name)
+        for _, reg, last_name, first_name, dog_name in rows
+        if reg is not None
+    ]
+    view.viewer_dogs = db.query(Dog).filter(Dog.owner_id == viewer_id).order_by(Dog.created_at, Dog.id).all()
+    return view
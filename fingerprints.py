@@ -0,0 +1,185 @@
+"""
+申請・ユーザーの重複検出用フィンガープリント
+
+メールアドレス・電話番号・住所・犬の情報を正規化してハッシュ化し、applications / users の
+インデックス付きカラムに保存する。申請時はこのカラムへの等価検索だけで重複チェックと
+重複候補の抽出を行い、候補は applications.duplicate_candidates に JSON で保持する。
+"""
+
+import hashlib
+import json
+import re
+import unicodedata
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from db_control.models import Application, ApplicationStatus, User
+
+# 保存する重複候補の最大件数（ユーザー・申請それぞれ）
+MAX_DUPLICATE_CANDIDATES = 20
+
+_HYPHENS = re.compile(r"[‐‑‒–—―−ーｰ－]")
+_SPACES = re.compile(r"\s+")
+
+
+def _normalize_text(value: Optional[str]) -> str:
+    if not value:
+        return ""
+    text = unicodedata.normalize("NFKC", value).lower()
+    text = _HYPHENS.sub("-", text)
+    return _SPACES.sub("", text).strip("-")
+
+
+def _hash(*parts: str) -> Optional[str]:
+    if not all(parts):
+        return None
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    """大文字小文字・全角半角・前後の空白を揃えたメールアドレス"""
+    if not email:
+        return None
+    return unicodedata.normalize("NFKC", email).strip().lower() or None
+
+
+def phone_hash(phone: Optional[str]) -> Optional[str]:
+    """数字のみを取り出し、+81 を国内表記に揃えた電話番号のハッシュ"""
+    digits = re.sub(r"\D", "", unicodedata.normalize("NFKC", phone or ""))
+    if digits.startswith("81") and (phone or "").strip().startswith("+"):
+        digits = "0" + digits[2:]
+    return _hash(digits)
+
+
+def address_hash(address: Optional[str]) -> Optional[str]:
+    """空白・ハイフンの表記ゆれを除いた住所のハッシュ"""
+    return _hash(_normalize_text(address))
+
+
+def dog_hash(dog_name: Optional[str], dog_breed: Optional[str], city: Optional[str]) -> Optional[str]:
+    """犬の名前・犬種・市区町村の組のハッシュ（同名の犬を別地域と区別する）"""
+    return _hash(_normalize_text(dog_name), _normalize_text(dog_breed), _normalize_text(city))
+
+
+def user_fingerprints(email: Optional[str], phone: Optional[str], address: Optional[str]) -> Dict[str, Optional[str]]:
+    """users に保存するフィンガープリント"""
+    return {
+        "email_normalized": normalize_email(email),
+        "phone_hash": phone_hash(phone),
+        "address_hash": address_hash(address),
+    }
+
+
+def application_fingerprints(
+    email: Optional[str],
+    phone: Optional[str],
+    address: Optional[str],
+    dog_name: Optional[str],
+    dog_breed: Optional[str],
+    city: Optional[str]
+) -> Dict[str, Optional[str]]:
+    """applications に保存するフィンガープリント"""
+    return {
+        **user_fingerprints(email, phone, address),
+        "dog_hash": dog_hash(dog_name, dog_breed, city),
+    }
+
+
+def refresh_user_fingerprints(user: User):
+    """ユーザー情報の更新後にフィンガープリントを再計算"""
+    for column, value in user_fingerprints(user.email, user.phone_number, user.address).items():
+        setattr(user, column, value)
+
+
+def _reasons(row, fingerprints: Dict[str, Optional[str]]) -> List[str]:
+    labels = {
+        "email_normalized": "email",
+        "phone_hash": "phone",
+        "address_hash": "address",
+        "dog_hash": "dog",
+    }
+    return [
+        label for column, label in labels.items()
+        if fingerprints.get(column) and getattr(row, column, None) == fingerprints[column]
+    ]
+
+
+def find_duplicate_candidates(
+    db: Session,
+    fingerprints: Dict[str, Optional[str]],
+    exclude_application_id: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """フィンガープリントが一致するユーザー・申請を取得（各テーブル1クエリ）"""
+    candidates = []
+
+    user_conditions = [
+        getattr(User, column) == fingerprints[column]
+        for column in ("email_normalized", "phone_hash", "address_hash")
+        if fingerprints.get(column)
+    ]
+    if user_conditions:
+        for user in db.query(User).filter(or_(*user_conditions)).limit(MAX_DUPLICATE_CANDIDATES):
+            candidates.append({
+                "kind": "user",
+                "id": user.id,
+                "reasons": _reasons(user, fingerprints),
+            })
+
+    application_conditions = [
+        getattr(Application, column) == fingerprints[column]
+        for column in ("email_normalized", "phone_hash", "address_hash", "dog_hash")
+        if fingerprints.get(column)
+    ]
+    if application_conditions:
+        query = db.query(Application).filter(or_(*application_conditions))
+        if exclude_application_id:
+            query = query.filter(Application.id != exclude_application_id)
+        for application in query.order_by(Application.created_at.desc()).limit(MAX_DUPLICATE_CANDIDATES):
+            candidates.append({
+                "kind": "application",
+                "id": application.id,
+                "status": application.status.value if application.status else None,
+                "reasons": _reasons(application, fingerprints),
+            })
+    return candidates
+
+
+def record_duplicate_candidates(db: Session, application: Application) -> List[Dict[str, Any]]:
+    """申請の重複候補を保存し、審査待ちの相手側の申請にもこの申請を候補として追記"""
+    fingerprints = {
+        column: getattr(application, column)
+        for column in ("email_normalized", "phone_hash", "address_hash", "dog_hash")
+    }
+    candidates = find_duplicate_candidates(db, fingerprints, exclude_application_id=application.id)
+    application.duplicate_candidates = json.dumps(candidates, ensure_ascii=False) if candidates else None
+
+    pending_ids = [
+        c["id"] for c in candidates
+        if c["kind"] == "application" and c.get("status") == ApplicationStatus.pending.value
+    ]
+    if pending_ids:
+        for other in db.query(Application).filter(Application.id.in_(pending_ids)):
+            existing = parse_duplicate_candidates(other.duplicate_candidates)
+            if any(c["id"] == application.id for c in existing):
+                continue
+            reasons = next(c["reasons"] for c in candidates if c["id"] == other.id)
+            existing.append({
+                "kind": "application",
+                "id": application.id,
+                "status": ApplicationStatus.pending.value,
+                "reasons": reasons,
+            })
+            other.duplicate_candidates = json.dumps(existing[-MAX_DUPLICATE_CANDIDATES:], ensure_ascii=False)
+    return candidates
+
+
+def parse_duplicate_candidates(raw: Optional[str]) -> List[Dict[str, Any]]:
+    """保存済みの重複候補（JSON）を読み込む"""
+    if not raw:
+        return []
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return []
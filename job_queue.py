@@ -0,0 +1,305 @@
+"""
+コミット後の副作用処理のジョブキュー
+
+通知送信などリクエストの応答に不要な処理は、enqueue_job() で jobs テーブルに登録して
+すぐに応答を返す。ジョブの INSERT は呼び出し元と同じトランザクションで行うため、
+本体の更新がロールバックされればジョブも登録されない。
+
+ジョブはプロセス内のワーカースレッドが実行し、失敗した場合は指数バックオフで再試行、
+max_attempts 回失敗すると dead（デッドレター）として停止する。run_pending_jobs() は
+実行可能なジョブを呼び出し元のスレッドで順に処理するため、ワーカーを起動しない
+スクリプトやテストでも同じ処理を確認できる。
+"""
+
+import json
+import logging
+import os
+import random
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+from uuid import uuid4
+
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from db_control.models import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+# ワーカースレッド数（0 の場合はワーカーを起動しない）
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# 新しいジョブがない場合のポーリング間隔（秒）
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "5"))
+# 既定のリトライ上限
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+# リトライ間隔（秒）: base * 2^(試行回数-1)、上限 max
+JOB_BACKOFF_BASE_SECONDS = float(os.getenv("JOB_BACKOFF_BASE_SECONDS", "10"))
+JOB_BACKOFF_MAX_SECONDS = float(os.getenv("JOB_BACKOFF_MAX_SECONDS", "3600"))
+# 実行中のまま更新がないジョブを再実行対象に戻すまでの秒数（ワーカー停止時の回収用）
+JOB_LOCK_TIMEOUT_SECONDS = int(os.getenv("JOB_LOCK_TIMEOUT_SECONDS", "600"))
+# 1回の取り出しで候補にする件数（他のワーカーと競合した場合に次の候補を試す）
+CLAIM_CANDIDATES = 10
+
+JobHandler = Callable[[Session, Dict[str, Any]], None]
+_handlers: Dict[str, JobHandler] = {}
+
+# コミット時にワーカーを起こすためのフラグ（Session.info のキー）
+_WAKE_KEY = "job_queue_wake"
+
+
+def job_handler(job_type: str):
+    """ジョブ種別の処理関数を登録するデコレーター
+
+    処理関数は (db, payload) を受け取る。コミットはキュー側で行い、例外を送出するとリトライされる。
+    """
+    def decorator(func: JobHandler) -> JobHandler:
+        _handlers[job_type] = func
+        return func
+    return decorator
+
+
+def registered_job_types() -> List[str]:
+    return sorted(_handlers)
+
+
+def _job_row(job_type: str, payload: Optional[Dict[str, Any]], run_at: datetime, max_attempts: Optional[int]) -> Dict[str, Any]:
+    if job_type not in _handlers:
+        raise ValueError(f"未登録のジョブ種別です: {job_type}")
+    now = datetime.utcnow()
+    return {
+        "id": str(uuid4()),
+        "job_type": job_type,
+        "payload": json.dumps(payload or {}, ensure_ascii=False, default=str),
+        "status": JobStatus.pending,
+        "attempts": 0,
+        "max_attempts": max_attempts or JOB_MAX_ATTEMPTS,
+        "run_at": run_at,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def enqueue_job(
+    db: Session,
+    job_type: str,
+    payload: Optional[Dict[str, Any]] = None,
+    delay_seconds: float = 0,
+    max_attempts: Optional[int] = None
+) -> str:
+    """ジョブを登録（呼び出し元のトランザクションのコミットで確定。戻り値はジョブID）"""
+    run_at = datetime.utcnow() + timedelta(seconds=delay_seconds)
+    row = _job_row(job_type, payload, run_at, max_attempts)
+    db.add(Job(**row))
+    db.info[_WAKE_KEY] = True
+    return row["id"]
+
+
+def enqueue_jobs(db: Session, job_type: str, payloads: List[Dict[str, Any]]) -> int:
+    """同じ種別のジョブを1回の INSERT でまとめて登録"""
+    if not payloads:
+        return 0
+    now = datetime.utcnow()
+    db.execute(insert(Job), [_job_row(job_type, p, now, None) for p in payloads])
+    db.info[_WAKE_KEY] = True
+    return len(payloads)
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_workers_after_commit(session: Session):
+    if session.info.pop(_WAKE_KEY, False):
+        worker_pool.wake()
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_wake_after_rollback(session: Session):
+    session.info.pop(_WAKE_KEY, None)
+
+
+def backoff_seconds(attempts: int) -> float:
+    """attempts 回目の失敗後に待つ秒数（同時に失敗したジョブが揃って再実行されないよう揺らぎを加える）"""
+    delay = min(JOB_BACKOFF_MAX_SECONDS, JOB_BACKOFF_BASE_SECONDS * (2 ** max(attempts - 1, 0)))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def recover_stale_jobs(db: Session) -> int:
+    """ロックの期限が切れた実行中ジョブを実行待ちに戻す"""
+    threshold = datetime.utcnow() - timedelta(seconds=JOB_LOCK_TIMEOUT_SECONDS)
+    count = db.query(Job).filter(
+        Job.status == JobStatus.running,
+        Job.locked_at < threshold
+    ).update(
+        {Job.status: JobStatus.pending, Job.locked_by: None, Job.locked_at: None, Job.updated_at: datetime.utcnow()},
+        synchronize_session=False
+    )
+    db.commit()
+    if count:
+        logger.warning("recovered %d stale jobs", count)
+    return count
+
+
+def claim_job(db: Session, worker_id: str) -> Optional[Job]:
+    """実行可能なジョブを1件取り出して実行中にする
+
+    条件付き UPDATE の更新件数で取得できたかを判定するため、複数のワーカー・プロセスが
+    同時に取り出しても同じジョブを二重に実行しない。
+    """
+    now = datetime.utcnow()
+    candidates = db.query(Job.id).filter(
+        Job.status == JobStatus.pending,
+        Job.run_at <= now
+    ).order_by(Job.run_at).limit(CLAIM_CANDIDATES).all()
+    for (job_id,) in candidates:
+        claimed = db.query(Job).filter(
+            Job.id == job_id,
+            Job.status == JobStatus.pending
+        ).update(
+            {
+                Job.status: JobStatus.running,
+                Job.locked_by: worker_id,
+                Job.locked_at: now,
+                Job.attempts: Job.attempts + 1,
+                Job.updated_at: now,
+            },
+            synchronize_session=False
+        )
+        db.commit()
+        if claimed:
+            return db.get(Job, job_id)
+    return None
+
+
+def _finish(db: Session, job: Job, worker_id: str, values: Dict[Any, Any]):
+    # 期限切れで回収され別のワーカーが実行中の場合は上書きしない
+    db.query(Job).filter(Job.id == job.id, Job.locked_by == worker_id).update(
+        {**values, Job.locked_by: None, Job.locked_at: None, Job.updated_at: datetime.utcnow()},
+        synchronize_session=False
+    )
+    db.commit()
+
+
+def execute_job(db: Session, job: Job, worker_id: str) -> bool:
+    """取り出したジョブを実行し、結果に応じて完了・リトライ・デッドレターにする"""
+    job_id, job_type, attempts, max_attempts = job.id, job.job_type, job.attempts, job.max_attempts
+    try:
+        handler = _handlers.get(job_type)
+        if handler is None:
+            raise LookupError(f"未登録のジョブ種別です: {job_type}")
+        handler(db, json.loads(job.payload or "{}"))
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        job = db.get(Job, job_id)
+        error = f"{type(e).__name__}: {e}"
+        if attempts >= max_attempts:
+            logger.error("job %s (%s) moved to dead letter after %d attempts: %s", job_id, job_type, attempts, error)
+            _finish(db, job, worker_id, {
+                Job.status: JobStatus.dead, Job.last_error: error, Job.finished_at: datetime.utcnow()
+            })
+        else:
+            logger.warning("job %s (%s) failed (attempt %d/%d): %s", job_id, job_type, attempts, max_attempts, error)
+            _finish(db, job, worker_id, {
+                Job.status: JobStatus.pending,
+                Job.last_error: error,
+                Job.run_at: datetime.utcnow() + timedelta(seconds=backoff_seconds(attempts)),
+            })
+        return False
+    _finish(db, job, worker_id, {Job.status: JobStatus.succeeded, Job.finished_at: datetime.utcnow()})
+    return True
+
+
+def run_next_job(worker_id: str) -> bool:
+    """ジョブを1件実行（実行するジョブがなければ False）"""
+    db = SessionLocal()
+    try:
+        job = claim_job(db, worker_id)
+        if job is None:
+            return False
+        execute_job(db, job, worker_id)
+        return True
+    finally:
+        db.close()
+
+
+def run_pending_jobs(limit: Optional[int] = None, worker_id: str = "local") -> int:
+    """実行可能なジョブを呼び出し元のスレッドで順に実行（戻り値は実行した件数）
+
+    ワーカーを起動しない環境（スクリプト・テスト）でジョブを処理するために使う。
+    リトライ待ちのジョブは run_at になるまで実行しない。
+    """
+    count = 0
+    while limit is None or count < limit:
+        if not run_next_job(worker_id):
+            break
+        count += 1
+    return count
+
+
+class JobWorkerPool:
+    """ジョブを実行するワーカースレッド群"""
+
+    def __init__(self, size: int, poll_interval: float):
+        self.size = size
+        self.poll_interval = poll_interval
+        self._threads: List[threading.Thread] = []
+        self._stopping = threading.Event()
+        self._wake = threading.Condition()
+        self._last_recovery = datetime.min
+
+    @property
+    def running(self) -> bool:
+        return any(t.is_alive() for t in self._threads)
+
+    def wake(self):
+        """待機中のワーカーを起こす（ジョブ登録のコミット後に呼ばれる）"""
+        with self._wake:
+            self._wake.notify_all()
+
+    def _recover_if_due(self):
+        now = datetime.utcnow()
+        if (now - self._last_recovery).total_seconds() < JOB_LOCK_TIMEOUT_SECONDS / 2:
+            return
+        self._last_recovery = now
+        db = SessionLocal()
+        try:
+            recover_stale_jobs(db)
+        finally:
+            db.close()
+
+    def _run(self, worker_id: str):
+        while not self._stopping.is_set():
+            try:
+                if worker_id.endswith("-0"):
+                    self._recover_if_due()
+                if run_next_job(worker_id):
+                    continue
+            except Exception:
+                logger.exception("job worker %s error", worker_id)
+            with self._wake:
+                if not self._stopping.is_set():
+                    self._wake.wait(self.poll_interval)
+
+    def start(self):
+        """ワーカースレッドを起動（起動時に呼ぶ）"""
+        if self.running or self.size <= 0:
+            return
+        self._stopping.clear()
+        prefix = f"{os.getpid()}-{uuid4().hex[:8]}"
+        self._threads = [
+            threading.Thread(target=self._run, args=(f"{prefix}-{i}",), name=f"job-worker-{i}", daemon=True)
+            for i in range(self.size)
+        ]
+        for t in self._threads:
+            t.start()
+
+    def stop(self, timeout: float = 30):
+        """実行中のジョブの完了を待って停止（シャットダウン時に呼ぶ）"""
+        self._stopping.set()
+        self.wake()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+
+
+worker_pool = JobWorkerPool(JOB_WORKERS, JOB_POLL_SECONDS)
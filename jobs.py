@@ -0,0 +1,51 @@
+"""
+ジョブキューで実行する処理
+
+各エンドポイントはコミットと同時にここで定義したジョブを登録し、通知などの副作用は
+ワーカーで実行する。ジョブはリトライされるため、同じペイロードで複数回実行されても
+結果が変わらないように書く。
+"""
+
+import logging
+from pathlib import Path
+from typing import Any, Dict
+
+from sqlalchemy.orm import Session
+
+from db_control.models import Application
+from job_queue import job_handler
+from notifications import create_notification
+
+logger = logging.getLogger(__name__)
+
+
+@job_handler("application_approved")
+def notify_application_approved(db: Session, payload: Dict[str, Any]):
+    """申請承認の通知"""
+    application = db.get(Application, payload["application_id"])
+    if application is None or application.user_id is None:
+        return
+    create_notification(
+        db, "application_approved", "利用申請が承認されました",
+        f"{application.dog_name} の利用申請が承認されました。ログインしてご利用ください。",
+        [application.user_id]
+    )
+
+
+# アップロードファイルの保存先（/uploads/... の URL と対応）
+UPLOAD_ROOT = Path("uploads")
+
+
+@job_handler("delete_upload_files")
+def delete_upload_files(db: Session, payload: Dict[str, Any]):
+    """削除したレコードが参照していたアップロードファイルを削除（既に無いファイルは無視）"""
+    root = UPLOAD_ROOT.resolve()
+    for url in payload.get("urls") or []:
+        if not url or not url.startswith("/uploads/"):
+            continue
+        path = (root / url[len("/uploads/"):]).resolve()
+        # uploads 外のパスは削除しない
+        if root not in path.parents:
+            logger.warning("skip deleting file outside uploads: %s", url)
+            continue
+        path.unlink(missing_ok=True)
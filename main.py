@@ -1,15 +1,18 @@
-from fastapi import FastAPI, HTTPException, Depends, status, File, UploadFile, Form
+from fastapi import FastAPI, HTTPException, Depends, status, File, UploadFile, Form, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from typing import List, Optional
+import asyncio
+import logging
 import uvicorn
 from datetime import datetime, date
 import os
 import shutil
 from pathlib import Path
 from dotenv import load_dotenv
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
 
 # 統一されたschemasインポート（重複を整理）
@@ -27,8 +30,48 @@ from db_control.models import EventRegistration as DbEventRegistration
 from db_control.models import EntryLog as DbEntryLog
 from db_control.models import EntryAction
 from db_control.models import EventStatus
+from db_control.models import PostStatus, PostReport
 from db_control.models import AdminUser, AdminLog, Application, ApplicationStatus, BusinessHour, SpecialHoliday, SystemSetting
-from database import engine, get_db
+from db_control.models import Job, JobStatus
+from db_control.models import Notification, NotificationDelivery, DeliveryStatus
+from db_control.models import Notice, NoticeStatus, Tag
+from database import engine, get_db, SessionLocal, upsert_rows
+from utils import parse_hhmm, parse_ical_holidays, encode_cursor, decode_cursor
+from streaming_export import streaming_export
+from entry_analytics import (
+    DAY_NAMES, record_entry, record_exit, get_visit_analytics, maintain_entry_log_partitions, to_local,
+    user_entry_history
+)
+from occupancy_forecast import get_forecast, run_retrain_loop
+from calendar_service import calendar_year_range, get_calendar_month, invalidate_calendar_dates, invalidate_calendar_all
+from business_schedule import get_schedule, invalidate_schedule, park_now
+from audit_log import audit_writer, build_admin_log_row
+from post_feed import visible_posts
+from event_view import load_event_view, participant_rows
+from moderation_queue import CLEARED_CLAIM, queue_page, claim_posts, release_posts
+from deletion_service import delete_rows, plan_deletion, count_plan
+from upload_gc import collect_orphaned_uploads, schedule_upload_gc, last_result as last_upload_gc_result, run_upload_gc_loop, UPLOAD_GC_INTERVAL_HOURS
+from notifications import notify_event, delivery_counts
+from response_cache import cached_response, invalidate as invalidate_response_cache, run_response_cache_poll_loop
+from notice_inbox import (
+    publish_notice, retract_notice, deliver_published_notices, inbox_page,
+    mark_read as mark_notice_read, mark_all_read as mark_all_notices_read
+)
+from job_queue import enqueue_job, enqueue_jobs, worker_pool, registered_job_types
+import jobs  # ジョブ処理の登録
+from post_hashtags import link_hashtags
+from fingerprints import (
+    application_fingerprints, user_fingerprints, refresh_user_fingerprints,
+    record_duplicate_candidates, parse_duplicate_candidates
+)
+from settings_store import (
+    coerce_setting_value, get_setting, load_settings, reload_settings, bump_settings_version,
+    run_version_poll_loop, plan_import, apply_import
+)
+from settings_snapshots import (
+    SNAPSHOT_DIR, create_snapshot, list_snapshots, diff_snapshots, load_snapshot, restore_snapshot,
+    SnapshotNotFoundError, SnapshotCorruptedError
+)
 from auth import (
     get_current_user, create_access_token, verify_password, get_password_hash,
     get_current_admin_user, create_admin_access_token, log_admin_action
@@ -41,33 +84,65 @@ from schemas import (
     CreateDogDbRequest, UpdateDogDbRequest, DogDbResponse,
     VaccinationRecordRequest, VaccinationRecordResponse,
     CreatePostDbRequest, PostDbResponse, PostDetailResponse, CreateCommentDbRequest, CommentDbResponse,
+    PostReportRequest, PostReportResponse, PostReportListResponse, ReportedPostResponse,
     EventResponse as EventDbResponse, EventDetailResponse, EventRegistrationRequest, EventParticipantResponse,
     QRCodeResponse, EntryRequest, EntryResponse, CurrentVisitorsResponse, EntryHistoryResponse,
+    EntryAnalyticsResponse, OccupancyForecastResponse, CalendarMonthResponse,
     # 管理者用スキーマ
-    AdminLoginRequest, AdminLoginResponse, AdminUserResponse,
+    AdminLoginRequest, AdminLoginResponse, AdminUserResponse, AuditLogStatsResponse,
+    JobResponse, JobStatsResponse, UploadGcResponse,
+    NotificationResponse, NotificationDeliveryResponse,
+    AdminLogResponse, AdminLogListResponse,
+    ApplicationBulkReviewRequest, ApplicationBulkReviewResponse, ApplicationReviewResult,
+    ApplicationListResponse,
     ApplicationResponse, ApplicationUpdateRequest, ApplicationCreateRequest, ApplicationStatusResponse,
     PostManagementResponse, PostStatusUpdateRequest,
+    PostBulkModerationRequest, PostBulkModerationResponse, PostModerationResult,
+    ModerationQueueItem, ModerationQueueResponse, ModerationClaimRequest, ModerationClaimResponse,
+    ModerationReleaseRequest,
     DashboardStatsResponse,
     # 営業時間・設定管理用スキーマ
     BusinessHourResponse, BusinessHourUpdateRequest,
     SpecialHolidayResponse, SpecialHolidayCreateRequest, SpecialHolidayUpdateRequest,
-    TodayBusinessHoursResponse,
+    TodayBusinessHoursResponse, BusinessStatusResponse,
+    BusinessHourBulkUpdateRequest, SpecialHolidayBulkRequest, SpecialHolidayBulkResponse,
     SystemSettingResponse, SystemSettingUpdateRequest, SystemSettingsCategoryResponse,
-    SystemSettingsBackupResponse, SystemSettingsImportRequest,
+    SystemSettingsBackupResponse, SystemSettingsImportRequest, SystemSettingsImportResponse,
+    SettingChangeResponse, SettingsSnapshotResponse, SettingsSnapshotDiffResponse,
+    SettingsSnapshotRestoreResponse,
     # ユーザー・イベント管理拡張スキーマ
     UserStatsResponse, UserDetailResponse, UserSuspendRequest,
     EventStatsResponse, EventRegistrationResponse, EventManagementResponse, EventCreateRequest, EventUpdateRequest,
-    NoticeManagementResponse, TagResponse
+    EventViewResponse, EventCapacityResponse, EventViewDog,
+    NoticeManagementResponse, TagResponse, TagCreateRequest,
+    NoticeCreateRequest, NoticeUpdateRequest, NoticeInboxItem, NoticeInboxResponse, NoticeUnreadCountResponse
 )
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 app = FastAPI(
     title="里山ドッグラン API",
     description="里山ドッグランの管理システムAPI",
     version="1.0.0"
 )
 
+# メンテナンスモード中も管理画面・ヘルスチェックは利用可能にする
+MAINTENANCE_EXEMPT_PREFIXES = ("/admin", "/health", "/docs", "/redoc", "/openapi.json")
+
+# CORSMiddleware より先に登録し、503 応答にもCORSヘッダーが付くようにする
+@app.middleware("http")
+async def maintenance_mode_guard(request, call_next):
+    """メンテナンスモード中は管理系以外のAPIを 503 で停止"""
+    if (
+        request.method != "OPTIONS"
+        and get_setting("maintenance_mode", False)
+        and not request.url.path.startswith(MAINTENANCE_EXEMPT_PREFIXES)
+    ):
+        return JSONResponse(status_code=503, content={"detail": get_setting("maintenance_message")})
+    return await call_next(request)
+
 # CORS設定
 default_origins = "http://localhost:3000,http://127.0.0.1:3000,http://localhost:3002,https://app-002-gen10-step3-2-node-oshima14.azurewebsites.net"
 allowed_origins = os.getenv("ALLOWED_ORIGINS", default_origins).split(",")
@@ -84,6 +159,9 @@ app.add_middleware(
 
 security = HTTPBearer()
 
+# 営業時間外の入場を拒否するか
+ENFORCE_BUSINESS_HOURS_ON_ENTRY = os.getenv("ENFORCE_BUSINESS_HOURS_ON_ENTRY", "false").lower() == "true"
+
 # アップロード用ディレクトリの作成
 UPLOAD_DIR = Path("uploads")
 POST_UPLOAD_DIR = UPLOAD_DIR / "posts"
@@ -104,6 +182,73 @@ if os.getenv("AUTO_CREATE_DB_CONTROL_TABLES", "false").lower() == "true":
     from db_control.models import Base as DbBase
     DbBase.metadata.create_all(bind=engine)
 
+
+@app.on_event("startup")
+async def maintain_partitions_on_startup():
+    """起動時に entry_logs のパーティション保守を実行"""
+    db = SessionLocal()
+    try:
+        maintain_entry_log_partitions(db)
+    except Exception:
+        # 保守に失敗してもアプリの起動は継続
+        db.rollback()
+        logger.exception("entry_logs partition maintenance failed")
+    finally:
+        db.close()
+
+# バックグラウンドタスク（シャットダウン時に停止）
+background_tasks: List[asyncio.Task] = []
+
+@app.on_event("startup")
+async def start_settings_store():
+    """システム設定を読み込み、他ワーカーでの変更検知を開始"""
+    load_settings()
+    background_tasks.append(asyncio.create_task(run_version_poll_loop()))
+
+@app.on_event("startup")
+async def start_forecast_training():
+    """混雑予測の定期再学習を開始"""
+    if os.getenv("FORECAST_RETRAIN_ENABLED", "true").lower() == "true":
+        background_tasks.append(asyncio.create_task(run_retrain_loop()))
+
+@app.on_event("startup")
+async def start_response_cache_poll():
+    """他ワーカーでのお知らせ・タグ更新を検知してレスポンスキャッシュを破棄"""
+    background_tasks.append(asyncio.create_task(run_response_cache_poll_loop()))
+
+@app.on_event("startup")
+async def start_upload_gc():
+    """参照されなくなったアップロードファイルの定期削除を開始"""
+    if UPLOAD_GC_INTERVAL_HOURS > 0:
+        background_tasks.append(asyncio.create_task(run_upload_gc_loop()))
+
+@app.on_event("startup")
+async def start_audit_log_writer():
+    """管理者操作ログのバッチ書き込みを開始"""
+    audit_writer.start()
+
+@app.on_event("startup")
+async def start_job_workers():
+    """ジョブキューのワーカーを起動"""
+    worker_pool.start()
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    """実行中のジョブの完了を待ってワーカーを停止"""
+    await asyncio.get_running_loop().run_in_executor(None, worker_pool.stop)
+
+@app.on_event("shutdown")
+async def flush_audit_log_writer():
+    """未書き込みの管理者操作ログを書き出して停止"""
+    await audit_writer.stop()
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    """バックグラウンドタスクを停止"""
+    for task in background_tasks:
+        task.cancel()
+    background_tasks.clear()
+
 # ===== 管理者用APIエンドポイント =====
 
 @app.post("/admin/auth/login", response_model=AdminLoginResponse)
@@ -182,7 +327,7 @@ async def get_dashboard_stats(
         Event.event_date >= date.today()
     ).count()
     total_notices = db.query(Notice).count()
-    published_notices = total_notices  # announcementsテーブルにはstatusカラムがないため、全件を公開済みとして扱う
+    published_notices = db.query(Notice).filter(Notice.status == NoticeStatus.published).count()
     
     return DashboardStatsResponse(
         total_users=total_users,
@@ -196,6 +341,30 @@ async def get_dashboard_stats(
     )
 
 # 申請管理
+def _application_response(app) -> ApplicationResponse:
+    # 申請データから直接情報を取得（user_idはNullの可能性がある）
+    return ApplicationResponse(
+        id=app.id,
+        user_id=app.user_id,  # Noneの場合もある
+        user_name=f"{app.user_last_name} {app.user_first_name}",
+        user_email=app.user_email,
+        user_phone=app.user_phone,
+        dog_name=app.dog_name,
+        dog_breed=app.dog_breed,
+        dog_weight=app.dog_weight,
+        vaccine_certificate=app.vaccine_certificate,
+        request_date=app.request_date,
+        request_time=app.request_time,
+        status=app.status,
+        admin_notes=app.admin_notes,
+        approved_by=app.approved_by,
+        approved_at=app.approved_at,
+        rejection_reason=app.rejection_reason,
+        duplicate_candidates=parse_duplicate_candidates(app.duplicate_candidates),
+        created_at=app.created_at,
+        updated_at=app.updated_at
+    )
+
 @app.get("/admin/applications", response_model=List[ApplicationResponse])
 async def get_applications(
     status: Optional[str] = None,
@@ -210,33 +379,112 @@ async def get_applications(
     
     applications = query.order_by(Application.created_at.desc()).all()
     
-    responses = []
-    for app in applications:
-        # 申請データから直接情報を取得（user_idはNullの可能性がある）
-        user_name = f"{app.user_last_name} {app.user_first_name}"
-        
-        responses.append(ApplicationResponse(
-            id=app.id,
-            user_id=app.user_id,  # Noneの場合もある
-            user_name=user_name,
-            user_email=app.user_email,
-            user_phone=app.user_phone,
-            dog_name=app.dog_name,
-            dog_breed=app.dog_breed,
-            dog_weight=app.dog_weight,
-            vaccine_certificate=app.vaccine_certificate,
-            request_date=app.request_date,
-            request_time=app.request_time,
-            status=app.status,
-            admin_notes=app.admin_notes,
-            approved_by=app.approved_by,
-            approved_at=app.approved_at,
-            rejection_reason=app.rejection_reason,
-            created_at=app.created_at,
-            updated_at=app.updated_at
+    return [_application_response(app) for app in applications]
+
+# 申請検索の1ページあたりの最大件数
+MAX_APPLICATION_PAGE_SIZE = 200
+
+# /admin/applications/{application_id} より前に定義する
+@app.get("/admin/applications/query", response_model=ApplicationListResponse)
+async def query_applications(
+    status: Optional[str] = None,
+    q: Optional[str] = None,
+    request_date_from: Optional[date] = None,
+    request_date_to: Optional[date] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    current_admin = Depends(get_current_admin_user),
+    db=Depends(get_db)
+):
+    """申請検索（新しい順、next_cursor によるキーセットページネーション）
+
+    q はメールアドレス・姓・名・犬の名前の前方一致。日付範囲は from を含み to を含まない。
+    """
+    limit = max(1, min(limit, MAX_APPLICATION_PAGE_SIZE))
+    query = db.query(Application)
+    
+    if status:
+        query = query.filter(Application.status == status)
+    if q and q.strip():
+        prefix = q.strip()
+        query = query.filter(or_(
+            Application.user_email.startswith(prefix, autoescape=True),
+            Application.user_last_name.startswith(prefix, autoescape=True),
+            Application.user_first_name.startswith(prefix, autoescape=True),
+            Application.dog_name.startswith(prefix, autoescape=True)
+        ))
+    if request_date_from:
+        query = query.filter(Application.request_date >= request_date_from)
+    if request_date_to:
+        query = query.filter(Application.request_date < request_date_to)
+    if created_from:
+        query = query.filter(Application.created_at >= created_from)
+    if created_to:
+        query = query.filter(Application.created_at < created_to)
+    if cursor:
+        try:
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        query = query.filter(or_(
+            Application.created_at < cursor_created_at,
+            and_(Application.created_at == cursor_created_at, Application.id < cursor_id)
         ))
     
-    return responses
+    applications = query.order_by(
+        Application.created_at.desc(), Application.id.desc()
+    ).limit(limit + 1).all()
+    next_cursor = None
+    if len(applications) > limit:
+        applications = applications[:limit]
+        last = applications[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    
+    return ApplicationListResponse(
+        items=[_application_response(app) for app in applications],
+        next_cursor=next_cursor
+    )
+
+APPLICATION_EXPORT_FIELDS = [
+    "id", "status", "created_at", "user_id", "user_last_name", "user_first_name", "user_email",
+    "user_phone", "user_postal_code", "user_prefecture", "user_city", "user_address",
+    "dog_name", "dog_breed", "dog_weight", "dog_age", "dog_gender", "request_date", "request_time",
+    "admin_notes", "approved_by", "approved_at", "rejection_reason", "updated_at"
+]
+
+# /admin/applications/{application_id} より前に定義する
+@app.get("/admin/applications/export")
+async def export_applications(
+    export_format: str = Query("csv", alias="format"),
+    status: Optional[str] = None,
+    current_admin = Depends(get_current_admin_user),
+    db=Depends(get_db)
+):
+    """申請一覧のエクスポート（CSV / NDJSON をストリーミング）"""
+    def build_query(export_db):
+        # パスワードハッシュ等は含めず、出力する列だけを取得
+        query = export_db.query(*[getattr(Application, f) for f in APPLICATION_EXPORT_FIELDS])
+        if status:
+            query = query.filter(Application.status == status)
+        return query.order_by(Application.created_at.desc())
+    
+    response = streaming_export(
+        build_query, lambda row: row._asdict(), APPLICATION_EXPORT_FIELDS, export_format, "applications"
+    )
+    
+    # 管理者ログを記録
+    await log_admin_action(
+        admin_user_id=current_admin.id,
+        action="applications_exported",
+        target_type="application",
+        target_id=None,
+        details=f"申請一覧をエクスポート（{export_format}）",
+        db=db
+    )
+    
+    return response
 
 @app.get("/admin/applications/stats")
 async def get_applications_stats(
@@ -296,6 +544,7 @@ async def get_application(
         approved_by=application.approved_by,
         approved_at=application.approved_at,
         rejection_reason=application.rejection_reason,
+        duplicate_candidates=parse_duplicate_candidates(application.duplicate_candidates),
         created_at=application.created_at,
         updated_at=application.updated_at
     )
@@ -336,10 +585,13 @@ async def approve_application(
             address=application.user_address,
             prefecture=application.user_prefecture,
             city=application.user_city,
+            **user_fingerprints(application.user_email, application.user_phone, application.user_address),
             created_at=datetime.utcnow()
         )
         db.add(new_user)
         db.flush()  # ユーザーをデータベースに反映（コミット前）
+        # 公開中のお知らせを受信箱に配信
+        deliver_published_notices(db, [new_user.id])
         
         # 犬情報も同時に登録
         if application.dog_name:
@@ -363,6 +615,8 @@ async def approve_application(
     application.approved_by = current_admin.id
     application.approved_at = datetime.utcnow()
     application.updated_at = datetime.utcnow()
+    # 承認通知はコミット後にジョブで送信
+    enqueue_job(db, "application_approved", {"application_id": application.id})
     
     db.commit()
     
@@ -415,6 +669,175 @@ async def reject_application(
     
     return {"message": "申請を却下しました"}
 
+# 一括審査で受け付ける最大件数
+MAX_BULK_REVIEW = 500
+
+@app.post("/admin/applications/bulk-review", response_model=ApplicationBulkReviewResponse)
+async def bulk_review_applications(
+    request: ApplicationBulkReviewRequest,
+    current_admin = Depends(get_current_admin_user),
+    db=Depends(get_db)
+):
+    """申請の一括承認・却下（1トランザクション、結果は申請ごとに返す）"""
+    from uuid import uuid4
+    from sqlalchemy import insert, update
+    from sqlalchemy.exc import IntegrityError
+    
+    if not request.items:
+        raise HTTPException(status_code=400, detail="審査する申請を指定してください")
+    if len(request.items) > MAX_BULK_REVIEW:
+        raise HTTPException(status_code=400, detail=f"一度に審査できるのは{MAX_BULK_REVIEW}件までです")
+    
+    # 申請と、承認で作成するユーザーのメールアドレス重複をそれぞれ1クエリで取得
+    ids = [item.application_id for item in request.items]
+    applications = {a.id: a for a in db.query(Application).filter(Application.id.in_(ids)).all()}
+    new_emails = {
+        a.user_email for a in applications.values() if a.user_id is None and a.user_email
+    }
+    taken_emails = {
+        email for (email,) in db.query(DbUser.email).filter(DbUser.email.in_(new_emails)).all()
+    } if new_emails else set()
+    
+    now = datetime.utcnow()
+    results = []
+    user_rows, dog_rows, application_rows, log_rows = [], [], [], []
+    seen = set()
+    
+    def fail(item, message):
+        results.append(ApplicationReviewResult(
+            application_id=item.application_id, decision=item.decision, success=False, message=message
+        ))
+    
+    for item in request.items:
+        application = applications.get(item.application_id)
+        if item.decision not in ("approve", "reject"):
+            fail(item, "decision は approve または reject を指定してください")
+            continue
+        if item.application_id in seen:
+            fail(item, "同じ申請が複数指定されています")
+            continue
+        seen.add(item.application_id)
+        if application is None:
+            fail(item, "申請が見つかりません")
+            continue
+        
+        if item.decision == "reject":
+            if application.status != ApplicationStatus.pending:
+                fail(item, "この申請は既に処理されています")
+                continue
+            application_rows.append({
+                "id": application.id,
+                "status": ApplicationStatus.rejected,
+                "admin_notes": item.admin_notes,
+                "rejection_reason": item.rejection_reason,
+                "approved_by": current_admin.id,
+                "approved_at": now,
+                "updated_at": now,
+            })
+            log_rows.append(build_admin_log_row(
+                admin_user_id=current_admin.id,
+                action="application_rejected",
+                target_type="application",
+                target_id=application.id,
+                details=f"申請を却下しました: {item.admin_notes or 'なし'}"
+            ))
+            results.append(ApplicationReviewResult(
+                application_id=application.id, decision=item.decision, success=True,
+                message="申請を却下しました"
+            ))
+            continue
+        
+        if application.status == ApplicationStatus.approved:
+            fail(item, "この申請は既に承認されています")
+            continue
+        
+        user_id = application.user_id
+        if user_id is None and application.user_email:
+            if application.user_email in taken_emails:
+                fail(item, "このメールアドレスは既に登録されています")
+                continue
+            # 同じバッチ内の後続の申請も重複として扱う
+            taken_emails.add(application.user_email)
+            user_id = str(uuid4())
+            user_rows.append({
+                "id": user_id,
+                "email": application.user_email,
+                "password_hash": application.user_password_hash,
+                "last_name": application.user_last_name,
+                "first_name": application.user_first_name,
+                "phone_number": application.user_phone,
+                "address": application.user_address,
+                "prefecture": application.user_prefecture,
+                "city": application.user_city,
+                **user_fingerprints(application.user_email, application.user_phone, application.user_address),
+                "created_at": now,
+            })
+            if application.dog_name:
+                dog_rows.append({
+                    "id": str(uuid4()),
+                    "owner_id": user_id,
+                    "name": application.dog_name,
+                    "breed": application.dog_breed,
+                    "birthday_at": date.today(),  # 仮の誕生日を設定（必須フィールドのため）
+                    "gender": application.dog_gender,
+                    "created_at": now,
+                })
+        
+        application_rows.append({
+            "id": application.id,
+            "user_id": user_id,
+            "status": ApplicationStatus.approved,
+            "admin_notes": item.admin_notes,
+            "approved_by": current_admin.id,
+            "approved_at": now,
+            "updated_at": now,
+        })
+        log_rows.append(build_admin_log_row(
+            admin_user_id=current_admin.id,
+            action="application_approved",
+            target_type="application",
+            target_id=application.id,
+            details=f"申請を承認しました: {item.admin_notes or 'なし'}"
+        ))
+        results.append(ApplicationReviewResult(
+            application_id=application.id, decision=item.decision, success=True,
+            message="申請を承認しました", user_id=user_id
+        ))
+    
+    # ユーザー → 犬 → 申請 → 操作ログの順にまとめて書き込む
+    try:
+        if user_rows:
+            db.execute(insert(DbUser), user_rows)
+            deliver_published_notices(db, [r["id"] for r in user_rows])
+        if dog_rows:
+            db.execute(insert(DbDog), dog_rows)
+        # 承認と却下で更新する列が異なるため分けて一括更新
+        for rows in (
+            [r for r in application_rows if r["status"] == ApplicationStatus.approved],
+            [r for r in application_rows if r["status"] == ApplicationStatus.rejected],
+        ):
+            if rows:
+                db.execute(update(Application), rows)
+        if log_rows:
+            db.execute(insert(AdminLog), log_rows)
+        enqueue_jobs(db, "application_approved", [
+            {"application_id": r["id"]} for r in application_rows if r["status"] == ApplicationStatus.approved
+        ])
+        db.commit()
+    except IntegrityError:
+        # 審査中に別の操作で同じメールアドレスが登録された場合など
+        db.rollback()
+        raise HTTPException(status_code=409, detail="一括審査中に競合が発生しました。再度お試しください")
+    
+    approved = sum(1 for r in results if r.success and r.decision == "approve")
+    rejected = sum(1 for r in results if r.success and r.decision == "reject")
+    return ApplicationBulkReviewResponse(
+        approved=approved,
+        rejected=rejected,
+        failed=len(results) - approved - rejected,
+        results=results
+    )
+
 # ユーザー管理（完全実装）
 @app.get("/admin/users", response_model=List[UserDbResponse])
 async def get_users_for_admin(
@@ -436,6 +859,40 @@ async def get_users_for_admin(
         updated_at=user.updated_at
     ) for user in users]
 
+USER_EXPORT_FIELDS = [
+    "id", "email", "last_name", "first_name", "age", "gender", "zip_code", "prefecture",
+    "city", "address", "building", "phone_number", "created_at", "updated_at"
+]
+
+# /admin/users/{user_id} より前に定義する
+@app.get("/admin/users/export")
+async def export_users(
+    export_format: str = Query("csv", alias="format"),
+    current_admin = Depends(get_current_admin_user),
+    db=Depends(get_db)
+):
+    """ユーザー一覧のエクスポート（CSV / NDJSON をストリーミング）"""
+    def build_query(export_db):
+        return export_db.query(
+            *[getattr(DbUser, f) for f in USER_EXPORT_FIELDS]
+        ).order_by(DbUser.created_at.desc())
+    
+    response = streaming_export(
+        build_query, lambda row: row._asdict(), USER_EXPORT_FIELDS, export_format, "users"
+    )
+    
+    # 管理者ログを記録
+    await log_admin_action(
+        admin_user_id=current_admin.id,
+        action="users_exported",
+        target_type="user",
+        target_id=None,
+        details=f"ユーザー一覧をエクスポート（{export_format}）",
+        db=db
+    )
+    
+    return response
+
 @app.get("/admin/users/stats", response_model=UserStatsResponse)
 async def get_users_stats(
     current_admin = Depends(get_current_admin_user),
@@ -523,6 +980,7 @@ async def update_user(
         user.prefecture = request.prefecture
     if request.city is not None:
         user.city = request.city
+    refresh_user_fingerprints(user)
     
     user.updated_at = datetime.utcnow()
     db.commit()
@@ -542,24 +1000,50 @@ async def update_user(
 @app.delete("/admin/users/{user_id}")
 async def delete_user(
     user_id: str,
+    cascade: bool = False,
+    background: bool = False,
+    dry_run: bool = False,
     current_admin = Depends(get_current_admin_user),
     db=Depends(get_db)
 ):
-    """ユーザー削除（論理削除）"""
+    """ユーザー削除
+
+    cascade=true の場合は犬・投稿などの関連データもまとめて削除する（申請は残して user_id を NULL にする）。
+    background=true の場合は削除をジョブに登録して即時に応答し、一定件数ずつ削除する。
+    dry_run=true の場合は削除せず、削除計画と対象件数を返す。
+    """
     user = db.query(DbUser).filter(DbUser.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="ユーザーが見つかりません")
     
-    # 関連データの確認
-    dogs_count = db.query(DbDog).filter(DbDog.owner_id == user_id).count()
-    posts_count = db.query(DbPost).filter(DbPost.user_id == user_id).count()
+    if dry_run:
+        return {"plan": count_plan(db, plan_deletion("users", [user_id]))}
     
-    if dogs_count > 0 or posts_count > 0:
-        # 物理削除ではなく論理削除を推奨
-        return {"message": f"このユーザーには関連データがあります（犬: {dogs_count}件、投稿: {posts_count}件）。削除する前に確認してください。"}
+    if not cascade:
+        # 関連データの確認
+        dogs_count = db.query(DbDog).filter(DbDog.owner_id == user_id).count()
+        posts_count = db.query(DbPost).filter(DbPost.user_id == user_id).count()
+        
+        if dogs_count > 0 or posts_count > 0:
+            # 物理削除ではなく論理削除を推奨
+            return {"message": f"このユーザーには関連データがあります（犬: {dogs_count}件、投稿: {posts_count}件）。削除する前に確認してください。"}
+    
+    if background:
+        job_id = enqueue_job(db, "delete_rows", {"table": "users", "ids": [user_id]})
+        db.commit()
+        await log_admin_action(
+            admin_user_id=current_admin.id,
+            action="user_deletion_scheduled",
+            target_type="user",
+            target_id=user_id,
+            details=f"ユーザーの削除を予約: {user.email}",
+            db=db
+        )
+        return {"message": "ユーザーの削除を受け付けました", "job_id": job_id}
     
-    # 物理削除
-    db.delete(user)
+    # 物理削除（入退場履歴などの関連データも含む）
+    email = user.email
+    deleted = delete_rows(db, "users", [user_id])
     db.commit()
     
     # 管理者ログを記録
@@ -568,11 +1052,11 @@ async def delete_user(
         action="user_deleted",
         target_type="user",
         target_id=user_id,
-        details=f"ユーザーを削除: {user.email}",
+        details=f"ユーザーを削除: {email}",
         db=db
     )
     
-    return {"message": "ユーザーを削除しました"}
+    return {"message": "ユーザーを削除しました", "deleted": deleted}
 
 @app.put("/admin/users/{user_id}/suspend")
 async def suspend_user(
@@ -705,6 +1189,44 @@ async def get_dogs_for_admin(
         updated_at=dog.updated_at
     ) for dog in dogs]
 
+DOG_EXPORT_FIELDS = [
+    "id", "owner_id", "owner_name", "owner_email", "name", "breed", "birthday_at",
+    "gender", "personality", "likes", "created_at", "updated_at"
+]
+
+@app.get("/admin/dogs/export")
+async def export_dogs(
+    export_format: str = Query("csv", alias="format"),
+    current_admin = Depends(get_current_admin_user),
+    db=Depends(get_db)
+):
+    """犬一覧のエクスポート（飼い主情報付き、CSV / NDJSON をストリーミング）"""
+    def build_query(export_db):
+        return export_db.query(
+            DbDog.id, DbDog.owner_id, DbUser.last_name, DbUser.first_name,
+            DbUser.email.label("owner_email"), DbDog.name, DbDog.breed, DbDog.birthday_at,
+            DbDog.gender, DbDog.personality, DbDog.likes, DbDog.created_at, DbDog.updated_at
+        ).outerjoin(DbUser, DbUser.id == DbDog.owner_id).order_by(DbDog.created_at.desc())
+    
+    def serialize(row):
+        data = row._asdict()
+        data["owner_name"] = f"{data.pop('last_name') or ''} {data.pop('first_name') or ''}".strip()
+        return data
+    
+    response = streaming_export(build_query, serialize, DOG_EXPORT_FIELDS, export_format, "dogs")
+    
+    # 管理者ログを記録
+    await log_admin_action(
+        admin_user_id=current_admin.id,
+        action="dogs_exported",
+        target_type="dog",
+        target_id=None,
+        details=f"犬一覧をエクスポート（{export_format}）",
+        db=db
+    )
+    
+    return response
+
 # イベント管理（完全実装）
 @app.get("/admin/events", response_model=List[EventManagementResponse])
 async def get_events_for_admin(
@@ -808,6 +1330,7 @@ async def create_event(
     )
     
     db.add(event)
+    invalidate_calendar_dates(db, [event.event_date])
     db.commit()
     db.refresh(event)
     
@@ -885,6 +1408,7 @@ async def update_event(
     if not event:
         raise HTTPException(status_code=404, detail="イベントが見つかりません")
     
+    previous_event_date = event.event_date
     if request.title is not None:
         event.title = request.title
     if request.description is not None:
@@ -907,6 +1431,7 @@ async def update_event(
         event.status = request.status
     
     event.updated_at = datetime.utcnow()
+    invalidate_calendar_dates(db, [previous_event_date, event.event_date])
     db.commit()
     db.refresh(event)
     
@@ -947,17 +1472,16 @@ async def delete_event(
     db=Depends(get_db)
 ):
     """イベント削除"""
-    from db_control.models import Event as DbEvent, EventRegistration
+    from db_control.models import Event as DbEvent
     
     event = db.query(DbEvent).filter(DbEvent.id == event_id).first()
     if not event:
         raise HTTPException(status_code=404, detail="イベントが見つかりません")
     
-    # 参加登録も削除
-    db.query(EventRegistration).filter(EventRegistration.event_id == event_id).delete()
-    
     event_title = event.title
-    db.delete(event)
+    invalidate_calendar_dates(db, [event.event_date])
+    # 参加登録もまとめて削除
+    delete_rows(db, "events", [event_id])
     db.commit()
     
     # 管理者ログを記録
@@ -978,34 +1502,19 @@ async def get_event_registrations(
     current_admin = Depends(get_current_admin_user),
     db=Depends(get_db)
 ):
-    """イベント参加者一覧取得"""
-    from db_control.models import EventRegistration
-    
-    registrations = db.query(EventRegistration).filter(
-        EventRegistration.event_id == event_id
-    ).all()
-    
-    responses = []
-    for reg in registrations:
-        user = db.query(DbUser).filter(DbUser.id == reg.user_id).first()
-        user_name = f"{user.last_name} {user.first_name}" if user else "不明"
-        
-        dog_name = None
-        if reg.dog_id:
-            dog = db.query(DbDog).filter(DbDog.id == reg.dog_id).first()
-            dog_name = dog.name if dog else None
-        
-        responses.append(EventRegistrationResponse(
+    """イベント参加者一覧取得（参加者名・犬名は結合して1クエリで取得）"""
+    return [
+        EventRegistrationResponse(
             id=reg.id,
             user_id=reg.user_id,
-            user_name=user_name,
+            user_name=f"{last_name} {first_name}" if last_name is not None else "不明",
             event_id=reg.event_id,
             dog_id=reg.dog_id,
             dog_name=dog_name,
-            registered_at=datetime.utcnow()  # TODO: registered_atフィールド追加後に実装
-        ))
-    
-    return responses
+            registered_at=reg.registered_at
+        )
+        for reg, last_name, first_name, dog_name in participant_rows(db, event_id)
+    ]
 
 @app.put("/admin/events/{event_id}/cancel")
 async def cancel_event(
@@ -1022,6 +1531,12 @@ async def cancel_event(
     
     event.status = "closed"
     event.updated_at = datetime.utcnow()
+    invalidate_calendar_dates(db, [event.event_date])
+    # 参加者への中止通知を登録し、送信はコミット後にジョブで行う
+    notification = notify_event(
+        db, event_id, "event_cancelled", "イベント中止のお知らせ", f"「{event.title}」は中止になりました。",
+        created_by=current_admin.id
+    )
     db.commit()
     
     # 管理者ログを記録
@@ -1034,7 +1549,7 @@ async def cancel_event(
         db=db
     )
     
-    return {"message": "イベントをキャンセルしました"}
+    return {"message": "イベントをキャンセルしました", "notification_id": notification.id}
 
 @app.post("/admin/events/{event_id}/notify")
 async def notify_event_participants(
@@ -1044,18 +1559,19 @@ async def notify_event_participants(
     db=Depends(get_db)
 ):
     """イベント参加者への通知"""
-    from db_control.models import Event as DbEvent, EventRegistration
+    from db_control.models import Event as DbEvent
     
     event = db.query(DbEvent).filter(DbEvent.id == event_id).first()
     if not event:
         raise HTTPException(status_code=404, detail="イベントが見つかりません")
     
-    registrations = db.query(EventRegistration).filter(
-        EventRegistration.event_id == event_id
-    ).all()
-    
-    # TODO: 実際の通知送信処理を実装
-    # ここではログ記録のみ
+    # 宛先を登録して送信はジョブで行い、登録後すぐに応答する
+    notification = notify_event(
+        db, event_id, "event_notification", f"「{event.title}」のお知らせ", message,
+        created_by=current_admin.id
+    )
+    participants_count = notification.recipient_count
+    db.commit()
     
     # 管理者ログを記録
     await log_admin_action(
@@ -1063,11 +1579,11 @@ async def notify_event_participants(
         action="event_notification_sent",
         target_type="event",
         target_id=event_id,
-        details=f"参加者{len(registrations)}名に通知: {message[:50]}",
+        details=f"参加者{participants_count}名に通知: {message[:50]}",
         db=db
     )
     
-    return {"message": f"{len(registrations)}名の参加者に通知を送信しました"}
+    return {"message": f"{participants_count}名の参加者への通知を受け付けました", "notification_id": notification.id}
 
 # 投稿管理（完全実装）
 @app.get("/admin/posts", response_model=List[PostManagementResponse])
@@ -1109,6 +1625,244 @@ async def get_posts_for_admin(
     
     return responses
 
+POST_EXPORT_FIELDS = [
+    "id", "user_id", "user_name", "status", "content", "admin_notes",
+    "likes_count", "comments_count", "created_at", "updated_at"
+]
+
+# /admin/posts/{post_id} より前に定義する
+@app.get("/admin/posts/export")
+async def export_posts(
+    export_format: str = Query("csv", alias="format"),
+    status: Optional[str] = None,
+    current_admin = Depends(get_current_admin_user),
+    db=Depends(get_db)
+):
+    """投稿一覧のエクスポート（いいね・コメント数付き、CSV / NDJSON をストリーミング）"""
+    from sqlalchemy import func, select
+    
+    def build_query(export_db):
+        # 件数は相関サブクエリで取得し、行ごとの追加クエリを発行しない
+        likes_count = select(func.count(DbLike.id)).where(
+            DbLike.post_id == DbPost.id
+        ).correlate(DbPost).scalar_subquery()
+        comments_count = select(func.count(DbComment.id)).where(
+            DbComment.post_id == DbPost.id
+        ).correlate(DbPost).scalar_subquery()
+        query = export_db.query(
+            DbPost.id, DbPost.user_id, DbUser.last_name, DbUser.first_name, DbPost.status,
+            DbPost.content, DbPost.admin_notes, likes_count.label("likes_count"),
+            comments_count.label("comments_count"), DbPost.created_at, DbPost.updated_at
+        ).outerjoin(DbUser, DbUser.id == DbPost.user_id)
+        if status:
+            query = query.filter(DbPost.status == status)
+        return query.order_by(DbPost.created_at.desc())
+    
+    def serialize(row):
+        data = row._asdict()
+        last_name, first_name = data.pop("last_name"), data.pop("first_name")
+        data["user_name"] = f"{last_name} {first_name}" if last_name or first_name else "不明"
+        return data
+    
+    response = streaming_export(build_query, serialize, POST_EXPORT_FIELDS, export_format, "posts")
+    
+    # 管理者ログを記録
+    await log_admin_action(
+        admin_user_id=current_admin.id,
+        action="posts_exported",
+        target_type="post",
+        target_id=None,
+        details=f"投稿一覧をエクスポート（{export_format}）",
+        db=db
+    )
+    
+    return response
+
+# 一括モデレーションで受け付ける最大件数
+MAX_BULK_MODERATION = 500
+
+# action ごとの (更新後のステータス, 操作ログの action, 操作ログの詳細, 結果メッセージ)
+POST_MODERATION_ACTIONS = {
+    "hide": (PostStatus.rejected, "post_hidden", "投稿を非表示に設定", "投稿を非表示にしました"),
+    "show": (PostStatus.approved, "post_shown", "投稿を表示に設定", "投稿を表示にしました"),
+}
+
+@app.post("/admin/posts/bulk-moderate", response_model=PostBulkModerationResponse)
+async def bulk_moderate_posts(
+    request: PostBulkModerationRequest,
+    current_admin = Depends(get_current_admin_user),
+    db=Depends(get_db)
+):
+    """投稿の一括ステータス変更・削除（1トランザクション、結果は投稿ごとに返す）"""
+    from sqlalchemy import insert
+    
+    if request.action not in ("status", "hide", "show", "delete"):
+        raise HTTPException(status_code=400, detail="action は status, hide, show, delete のいずれかを指定してください")
+    if request.action == "status" and request.status is None:
+        raise HTTPException(status_code=400, detail="action=status の場合は status を指定してください")
+    if not request.post_ids:
+        raise HTTPException(status_code=400, detail="対象の投稿を指定してください")
+    if len(request.post_ids) > MAX_BULK_MODERATION:
+        raise HTTPException(status_code=400, detail=f"一度に処理できるのは{MAX_BULK_MODERATION}件までです")
+    
+    if request.action == "delete":
+        log_action, log_details, message = "post_deleted", "投稿を削除", "投稿を削除しました"
+    elif request.action == "status":
+        log_action = "post_status_updated"
+        log_details = f"投稿ステータスを{request.status.value}に更新: {request.admin_notes or 'なし'}"
+        message = "投稿ステータスを更新しました"
+    else:
+        _, log_action, log_details, message = POST_MODERATION_ACTIONS[request.action]
+    
+    existing = {
+        post_id for (post_id,) in db.query(DbPost.id).filter(DbPost.id.in_(request.post_ids))
+    }
+    results = []
+    target_ids = []
+    for post_id in request.post_ids:
+        if post_id in target_ids:
+            results.append(PostModerationResult(post_id=post_id, success=False, message="同じ投稿が複数指定されています"))
+        elif post_id not in existing:
+            results.append(PostModerationResult(post_id=post_id, success=False, message="投稿が見つかりません"))
+        else:
+            target_ids.append(post_id)
+            results.append(PostModerationResult(post_id=post_id, success=True, message=message))
+    
+    if target_ids:
+        if request.action == "delete":
+            delete_rows(db, "posts", target_ids)
+        else:
+            values = {**CLEARED_CLAIM, DbPost.updated_at: datetime.utcnow()}
+            if request.action == "status":
+                values[DbPost.status] = PostStatus(request.status.value)
+                values[DbPost.admin_notes] = request.admin_notes
+            else:
+                values[DbPost.status] = POST_MODERATION_ACTIONS[request.action][0]
+            db.query(DbPost).filter(DbPost.id.in_(target_ids)).update(values, synchronize_session=False)
+        # 操作ログも同じトランザクションでまとめて書き込む
+        db.execute(insert(AdminLog), [
+            build_admin_log_row(
+                admin_user_id=current_admin.id,
+                action=log_action,
+                target_type="post",
+                target_id=post_id,
+                details=log_details
+            )
+            for post_id in target_ids
+        ])
+        db.commit()
+    
+    return PostBulkModerationResponse(
+        action=request.action,
+        succeeded=len(target_ids),
+        failed=len(results) - len(target_ids),
+        results=results
+    )
+
+# モデレーションキュー
+def _moderation_queue_item(post, last_name: Optional[str], first_name: Optional[str]) -> ModerationQueueItem:
+    return ModerationQueueItem(
+        id=post.id,
+        user_id=post.user_id,
+        user_name=f"{last_name} {first_name}" if last_name is not None else "不明",
+        content=post.content,
+        status=post.status,
+        claimed_by=post.claimed_by,
+        claim_expires_at=post.claim_expires_at,
+        created_at=post.created_at
+    )
+
+@app.get("/admin/moderation/queue", response_model=ModerationQueueResponse)
+async def get_moderation_queue(
+    status: str = "pending",
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    include_claimed: bool = False,
+    current_admin = Depends(get_current_admin_user),
+    db=Depends(get_db)
+):
+    """モデレーションキュー（古い順、next_cursor によるキーセットページネーション）
+
+    他の管理者が確保中の投稿は include_claimed=true の場合のみ含める。
+    """
+    try:
+        post_status = PostStatus(status)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="無効なステータスです")
+    try:
+        rows, next_cursor = queue_page(db, current_admin.id, post_status, cursor, limit, include_claimed)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return ModerationQueueResponse(
+        items=[_moderation_queue_item(*row) for row in rows],
+        next_cursor=next_cursor
+    )
+
+@app.post("/admin/moderation/claim", response_model=ModerationClaimResponse)
+async def claim_moderation_posts(
+    request: ModerationClaimRequest,
+    current_admin = Depends(get_current_admin_user),
+    db=Depends(get_db)
+):
+    """キューの先頭から投稿を期限付きで確保（期限内は他の管理者のキューに表示されない）"""
+    posts, expires_at = claim_posts(
+        db, current_admin.id, PostStatus(request.status.value), request.limit
+    )
+    users = {
+        u.id: u for u in db.query(DbUser).filter(DbUser.id.in_({p.user_id for p in posts}))
+    } if posts else {}
+    return ModerationClaimResponse(
+        items=[
+            _moderation_queue_item(
+                p,
+                users[p.user_id].last_name if p.user_id in users else None,
+                users[p.user_id].first_name if p.user_id in users else None
+            )
+            for p in posts
+        ],
+        claim_expires_at=expires_at
+    )
+
+@app.post("/admin/moderation/release")
+async def release_moderation_posts(
+    request: ModerationReleaseRequest,
+    current_admin = Depends(get_current_admin_user),
+    db=Depends(get_db)
+):
+    """確保中の投稿を解放"""
+    released = release_posts(db, current_admin.id, request.post_ids)
+    return {"message": f"{released}件の投稿を解放しました", "released": released}
+
+# /admin/posts/{post_id} より前に定義する
+@app.get("/admin/posts/most-reported", response_model=List[ReportedPostResponse])
+async def get_most_reported_posts(
+    status: str = "reported",
+    limit: int = Query(50, ge=1, le=200),
+    current_admin = Depends(get_current_admin_user),
+    db=Depends(get_db)
+):
+    """通報件数の多い順の投稿（審査の優先順位付け用）"""
+    try:
+        post_status = PostStatus(status)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="無効なステータスです")
+    
+    posts = db.query(DbPost).filter(
+        DbPost.status == post_status,
+        DbPost.report_count > 0
+    ).order_by(DbPost.report_count.desc()).limit(limit).all()
+    return [
+        ReportedPostResponse(
+            id=p.id,
+            user_id=p.user_id,
+            content=p.content,
+            status=p.status,
+            report_count=p.report_count,
+            created_at=p.created_at
+        )
+        for p in posts
+    ]
+
 @app.get("/admin/posts/stats")
 async def get_posts_stats(
     current_admin = Depends(get_current_admin_user),
@@ -1182,6 +1936,8 @@ async def update_post_status(
     
     post.status = request.status
     post.admin_notes = request.admin_notes
+    post.claimed_by = None
+    post.claim_expires_at = None
     post.updated_at = datetime.utcnow()
     
     db.commit()
@@ -1209,12 +1965,8 @@ async def delete_post(
     if not post:
         raise HTTPException(status_code=404, detail="投稿が見つかりません")
     
-    # 関連データも削除
-    db.query(DbComment).filter(DbComment.post_id == post_id).delete()
-    db.query(DbLike).filter(DbLike.post_id == post_id).delete()
-    db.query(PostHashtag).filter(PostHashtag.post_id == post_id).delete()
-    
-    db.delete(post)
+    # 関連データ（コメント・いいね・画像など）もまとめて削除
+    delete_rows(db, "posts", [post_id])
     db.commit()
     
     # 管理者ログを記録
@@ -1241,6 +1993,8 @@ async def hide_post(
         raise HTTPException(status_code=404, detail="投稿が見つかりません")
     
     post.status = "rejected"
+    post.claimed_by = None
+    post.claim_expires_at = None
     post.updated_at = datetime.utcnow()
     
     db.commit()
@@ -1269,6 +2023,8 @@ async def show_post(
         raise HTTPException(status_code=404, detail="投稿が見つかりません")
     
     post.status = "approved"
+    post.claimed_by = None
+    post.claim_expires_at = None
     post.updated_at = datetime.utcnow()
     
     db.commit()
@@ -1285,15 +2041,38 @@ async def show_post(
     
     return {"message": "投稿を表示にしました"}
 
-@app.get("/admin/posts/{post_id}/reports")
+@app.get("/admin/posts/{post_id}/reports", response_model=PostReportListResponse)
 async def get_post_reports(
     post_id: str,
     current_admin = Depends(get_current_admin_user),
     db=Depends(get_db)
 ):
     """投稿の通報一覧取得"""
-    # TODO: 通報テーブル実装後に対応
-    return {"reports": [], "message": "通報機能は今後実装予定です"}
+    post = db.query(DbPost).filter(DbPost.id == post_id).first()
+    if not post:
+        raise HTTPException(status_code=404, detail="投稿が見つかりません")
+    
+    rows = db.query(PostReport, DbUser.last_name, DbUser.first_name).outerjoin(
+        DbUser, DbUser.id == PostReport.user_id
+    ).filter(PostReport.post_id == post_id).order_by(PostReport.created_at.desc()).all()
+    
+    return PostReportListResponse(
+        post_id=post.id,
+        status=post.status,
+        report_count=post.report_count,
+        reports=[
+            PostReportResponse(
+                id=report.id,
+                post_id=report.post_id,
+                user_id=report.user_id,
+                user_name=f"{last_name} {first_name}" if last_name is not None else "不明",
+                reason=report.reason,
+                comment=report.comment,
+                created_at=report.created_at
+            )
+            for report, last_name, first_name in rows
+        ]
+    )
 
 @app.post("/admin/posts/{post_id}/admin-comment")
 async def add_admin_comment(
@@ -1359,14 +2138,22 @@ async def apply_registration(
     """新規利用申請（ユーザー登録申請）- FormData対応"""
     from uuid import uuid4
 
-    # メールアドレスの重複チェック
-    existing_user = db.query(DbUser).filter(DbUser.email == email).first()
+    # 住所を結合
+    full_address = f"{prefecture} {city} {street} {building or ''}".strip()
+    fingerprints = application_fingerprints(email, phoneNumber, full_address, dogName, dogBreed, city)
+    if fingerprints["email_normalized"] is None:
+        raise HTTPException(status_code=400, detail="メールアドレスを入力してください")
+
+    # メールアドレスの重複チェック（正規化済みメールのインデックスで検索）
+    existing_user = db.query(DbUser.id).filter(
+        DbUser.email_normalized == fingerprints["email_normalized"]
+    ).first()
     if existing_user:
         raise HTTPException(status_code=400, detail="このメールアドレスは既に登録されています")
 
     # 既存申請の確認
-    existing_application = db.query(Application).filter(
-        Application.user_email == email,
+    existing_application = db.query(Application.id).filter(
+        Application.email_normalized == fingerprints["email_normalized"],
         Application.status == ApplicationStatus.pending
     ).first()
     if existing_application:
@@ -1389,9 +2176,6 @@ async def apply_registration(
     name_parts = fullName.split(' ', 1)
     last_name = name_parts[0]
     first_name = name_parts[1] if len(name_parts) > 1 else ''
-    
-    # 住所を結合
-    full_address = f"{prefecture} {city} {street} {building or ''}".strip()
 
     # 申請データを作成
     application = Application(
@@ -1414,11 +2198,14 @@ async def apply_registration(
         vaccine_certificate=certificate_url,
         request_date=applicationDate,
         status=ApplicationStatus.pending,
+        **fingerprints,
         created_at=datetime.utcnow(),
         updated_at=datetime.utcnow()
     )
 
     db.add(application)
+    # 電話番号・住所・犬の情報が一致するユーザー・申請を重複候補として保存
+    record_duplicate_candidates(db, application)
     db.commit()
     db.refresh(application)
 
@@ -1536,6 +2323,7 @@ async def update_user_profile(
         current_user.prefecture = request.prefecture
     if request.city is not None:
         current_user.city = request.city
+    refresh_user_fingerprints(current_user)
     
     db.commit()
     db.refresh(current_user)
@@ -1572,6 +2360,11 @@ async def add_dog(
 ):
     """犬の登録 (db_control)"""
     from uuid import uuid4
+    
+    max_dogs = get_setting("max_dogs_per_user")
+    if max_dogs and db.query(DbDog).filter(DbDog.owner_id == current_user.id).count() >= max_dogs:
+        raise HTTPException(status_code=400, detail=f"登録できる犬は{max_dogs}頭までです")
+    
     dog = DbDog(
         id=str(uuid4()),
         owner_id=current_user.id,
@@ -1641,7 +2434,8 @@ async def delete_dog(
     if not dog:
         raise HTTPException(status_code=404, detail="犬が見つかりません")
     
-    db.delete(dog)
+    # ワクチン接種記録と画像ファイルもまとめて削除
+    delete_rows(db, "dogs", [dog_id])
     db.commit()
     return {"message": "削除しました"}
 
@@ -1744,11 +2538,12 @@ async def get_posts(
     search: Optional[str] = None,
     db=Depends(get_db)
 ):
-    """投稿一覧取得 (db_control)"""
-    query = db.query(DbPost)
+    """投稿一覧取得 (db_control)（承認済みのみ）"""
+    # (status, created_at, id) インデックスで承認済みを新しい順に取得
+    query = db.query(DbPost).filter(DbPost.status == PostStatus.approved)
     if search:
         query = query.filter(DbPost.content.contains(search))
-    posts = query.order_by(DbPost.created_at.desc()).all()
+    posts = query.order_by(DbPost.created_at.desc(), DbPost.id.desc()).all()
     responses: List[PostDbResponse] = []
     for p in posts:
         comments_count = db.query(DbComment).filter(DbComment.post_id == p.id).count()
@@ -1769,24 +2564,13 @@ async def get_posts_feed(
     current_user = Depends(get_current_user),
     db=Depends(get_db)
 ):
-    """詳細な投稿フィード取得（画像、ハッシュタグ、ユーザー情報付き）"""
-    query = db.query(DbPost)
-    
-    # ハッシュタグ検索
-    if hashtag:
-        hashtag_obj = db.query(DbHashtag).filter(DbHashtag.tag == hashtag).first()
-        if hashtag_obj:
-            post_ids = db.query(DbPostHashtag.post_id).filter(
-                DbPostHashtag.hashtag_id == hashtag_obj.id
-            ).subquery()
-            query = query.filter(DbPost.id.in_(post_ids))
-    
-    # テキスト検索
-    if search:
-        query = query.filter(DbPost.content.contains(search))
-    
-    # ページネーション
-    posts = query.order_by(DbPost.created_at.desc()).offset(offset).limit(limit).all()
+    """詳細な投稿フィード取得（画像、ハッシュタグ、ユーザー情報付き）
+
+    表示するのは承認済みの投稿と自分の審査待ちの投稿のみ。
+    """
+    posts = visible_posts(
+        db, current_user.id, limit=limit, offset=offset, search=search, hashtag=hashtag
+    )
     
     responses: List[PostDetailResponse] = []
     for post in posts:
@@ -1841,7 +2625,6 @@ async def create_post(
 ):
     """投稿作成 (画像アップロード・ハッシュタグ対応)"""
     from uuid import uuid4
-    import re
     
     # 投稿を作成
     post = DbPost(
@@ -1875,32 +2658,8 @@ async def create_post(
                 )
                 db.add(post_image)
     
-    # ハッシュタグ処理
-    if hashtags:
-        # カンマ区切りまたはスペース区切りのハッシュタグを処理
-        tag_list = re.split(r'[,\s]+', hashtags)
-        for tag_str in tag_list:
-            if tag_str:
-                # #を除去
-                tag_name = tag_str.lstrip('#').strip()
-                if tag_name:
-                    # 既存のハッシュタグを検索または作成
-                    hashtag = db.query(DbHashtag).filter(DbHashtag.tag == tag_name).first()
-                    if not hashtag:
-                        hashtag = DbHashtag(
-                            id=str(uuid4()),
-                            tag=tag_name
-                        )
-                        db.add(hashtag)
-                        db.flush()
-                    
-                    # PostHashtagリレーションを作成
-                    post_hashtag = DbPostHashtag(
-                        id=str(uuid4()),
-                        post_id=post.id,
-                        hashtag_id=hashtag.id
-                    )
-                    db.add(post_hashtag)
+    # ハッシュタグの登録・関連付け（作成直後の応答・一覧に含まれるよう同じトランザクションで行う）
+    link_hashtags(db, post.id, hashtags)
     
     db.commit()
     db.refresh(post)
@@ -2037,25 +2796,81 @@ async def add_comment(
         created_at=comment.created_at,
     )
 
-# イベント関連 (db_control)
-@app.get("/events", response_model=List[EventDbResponse])
-async def get_events(
-    upcoming_only: bool = True,
+# 通報理由
+POST_REPORT_REASONS = ("spam", "inappropriate", "harassment", "other")
+
+@app.post("/posts/{post_id}/report")
+async def report_post(
+    post_id: str,
+    request: PostReportRequest,
     current_user = Depends(get_current_user),
     db=Depends(get_db)
 ):
-    """イベント一覧取得（参加状況付き）"""
-    query = db.query(DbEvent)
+    """投稿の通報（1ユーザー1投稿につき1回。通報数がしきい値に達すると自動で非表示）"""
+    from uuid import uuid4
+    from sqlalchemy.exc import IntegrityError
     
-    if upcoming_only:
-        # 今日以降のイベントのみ
-        query = query.filter(DbEvent.event_date >= date.today())
+    if request.reason not in POST_REPORT_REASONS:
+        raise HTTPException(status_code=400, detail="reason は spam, inappropriate, harassment, other のいずれかを指定してください")
     
-    events = query.order_by(DbEvent.event_date, DbEvent.start_time).all()
+    post = db.query(DbPost.id, DbPost.user_id).filter(DbPost.id == post_id).first()
+    if not post:
+        raise HTTPException(status_code=404, detail="投稿が見つかりません")
+    if post.user_id == current_user.id:
+        raise HTTPException(status_code=400, detail="自分の投稿は通報できません")
     
-    responses = []
-    for event in events:
-        # 参加者数を取得
+    db.add(PostReport(
+        id=str(uuid4()),
+        post_id=post_id,
+        user_id=current_user.id,
+        reason=request.reason,
+        comment=request.comment,
+        created_at=datetime.utcnow()
+    ))
+    try:
+        db.flush()
+    except IntegrityError:
+        # (post_id, user_id) の一意制約で重複通報を防ぐ
+        db.rollback()
+        raise HTTPException(status_code=400, detail="この投稿は既に通報済みです")
+    
+    # 通報数の加算と自動非表示を同じトランザクションで行う
+    db.query(DbPost).filter(DbPost.id == post_id).update(
+        {DbPost.report_count: DbPost.report_count + 1}, synchronize_session=False
+    )
+    threshold = get_setting("post_report_auto_hide_threshold", 0)
+    if threshold and threshold > 0:
+        db.query(DbPost).filter(
+            DbPost.id == post_id,
+            DbPost.report_count >= threshold,
+            DbPost.status.in_([PostStatus.pending, PostStatus.approved])
+        ).update(
+            {**CLEARED_CLAIM, DbPost.status: PostStatus.reported, DbPost.updated_at: datetime.utcnow()},
+            synchronize_session=False
+        )
+    db.commit()
+    
+    return {"message": "通報を受け付けました"}
+
+# イベント関連 (db_control)
+@app.get("/events", response_model=List[EventDbResponse])
+async def get_events(
+    upcoming_only: bool = True,
+    current_user = Depends(get_current_user),
+    db=Depends(get_db)
+):
+    """イベント一覧取得（参加状況付き）"""
+    query = db.query(DbEvent)
+    
+    if upcoming_only:
+        # 今日以降のイベントのみ
+        query = query.filter(DbEvent.event_date >= date.today())
+    
+    events = query.order_by(DbEvent.event_date, DbEvent.start_time).all()
+    
+    responses = []
+    for event in events:
+        # 参加者数を取得
         participants_count = db.query(DbEventRegistration).filter(
             DbEventRegistration.event_id == event.id
         ).count()
@@ -2085,6 +2900,25 @@ async def get_events(
     
     return responses
 
+def _event_detail_response(event, participants_count: int, user_registrations) -> EventDetailResponse:
+    return EventDetailResponse(
+        id=event.id,
+        title=event.title,
+        description=event.description,
+        event_date=event.event_date,
+        start_time=event.start_time.strftime("%H:%M") if event.start_time else "",
+        end_time=event.end_time.strftime("%H:%M") if event.end_time else "",
+        location=event.location,
+        capacity=event.capacity or 0,
+        fee=event.fee or 0,
+        status=event.status.value if event.status else "reception",
+        current_participants=participants_count,
+        is_registered=len(user_registrations) > 0,
+        my_dogs_registered=[reg.dog_id for reg in user_registrations if reg.dog_id],
+        created_at=event.created_at,
+        updated_at=event.updated_at
+    )
+
 @app.get("/events/{event_id}", response_model=EventDetailResponse)
 async def get_event_detail(
     event_id: str,
@@ -2107,25 +2941,61 @@ async def get_event_detail(
         DbEventRegistration.user_id == current_user.id
     ).all()
     
-    is_registered = len(user_registrations) > 0
-    my_dogs_registered = [reg.dog_id for reg in user_registrations if reg.dog_id]
+    return _event_detail_response(event, participants_count, user_registrations)
+
+def _participant_name(last_name: Optional[str], first_name: Optional[str]) -> str:
+    name = f"{last_name or ''} {first_name or ''}".strip()
+    return name or "不明"
+
+@app.get("/events/{event_id}/view", response_model=EventViewResponse)
+async def get_event_view(
+    event_id: str,
+    current_user = Depends(get_current_user),
+    db=Depends(get_db)
+):
+    """イベント画面用の集約ビュー（詳細・定員・参加者・自分の犬を1回で返す）
+
+    イベントと参加者は結合した1クエリ、自分の犬は1クエリで取得する。
+    """
+    view = load_event_view(db, event_id, current_user.id)
+    if view is None:
+        raise HTTPException(status_code=404, detail="イベントが見つかりません")
     
-    return EventDetailResponse(
-        id=event.id,
-        title=event.title,
-        description=event.description,
-        event_date=event.event_date,
-        start_time=event.start_time.strftime("%H:%M") if event.start_time else "",
-        end_time=event.end_time.strftime("%H:%M") if event.end_time else "",
-        location=event.location,
-        capacity=event.capacity or 0,
-        fee=event.fee or 0,
-        status=event.status.value if event.status else "reception",
-        current_participants=participants_count,
-        is_registered=is_registered,
-        my_dogs_registered=my_dogs_registered,
-        created_at=event.created_at,
-        updated_at=event.updated_at
+    event = view.event
+    registered = len(view.participants)
+    my_registrations = [reg for reg, *_ in view.participants if reg.user_id == current_user.id]
+    my_dog_ids = {reg.dog_id for reg in my_registrations if reg.dog_id}
+    capacity = event.capacity or 0
+    
+    return EventViewResponse(
+        event=_event_detail_response(event, registered, my_registrations),
+        capacity=EventCapacityResponse(
+            capacity=capacity,
+            registered=registered,
+            remaining=max(capacity - registered, 0) if capacity else None,
+            is_full=bool(capacity) and registered >= capacity
+        ),
+        participants=[
+            EventParticipantResponse(
+                id=reg.id,
+                user_id=reg.user_id,
+                user_name=_participant_name(last_name, first_name),
+                dog_id=reg.dog_id,
+                dog_name=dog_name,
+                registered_at=reg.registered_at
+            )
+            for reg, last_name, first_name, dog_name in view.participants
+        ],
+        my_dogs=[
+            EventViewDog(
+                id=d.id,
+                name=d.name,
+                breed=d.breed,
+                avatar_url=d.avatar_url,
+                is_registered=d.id in my_dog_ids
+            )
+            for d in view.viewer_dogs
+        ]
     )
 
 @app.post("/events/{event_id}/register")
@@ -2157,6 +3027,7 @@ async def register_for_event(
     
     # 新規登録
     from uuid import uuid4
+    registered_at = datetime.utcnow()
     for dog_id in request.dog_ids:
         # 犬の所有権確認
         dog = db.query(DbDog).filter(
@@ -2171,7 +3042,8 @@ async def register_for_event(
             id=str(uuid4()),
             user_id=current_user.id,
             event_id=event_id,
-            dog_id=dog_id
+            dog_id=dog_id,
+            registered_at=registered_at
         )
         db.add(registration)
     
@@ -2181,10 +3053,12 @@ async def register_for_event(
             id=str(uuid4()),
             user_id=current_user.id,
             event_id=event_id,
-            dog_id=None
+            dog_id=None,
+            registered_at=registered_at
         )
         db.add(registration)
     
+    invalidate_calendar_dates(db, [event.event_date])
     db.commit()
     
     return {"message": "イベントに参加登録しました", "event_id": event_id}
@@ -2209,6 +3083,8 @@ async def cancel_event_registration(
     for reg in registrations:
         db.delete(reg)
     
+    event_date = db.query(DbEvent.event_date).filter(DbEvent.id == event_id).scalar()
+    invalidate_calendar_dates(db, [event_date])
     db.commit()
     
     return {"message": "参加をキャンセルしました", "event_id": event_id}
@@ -2224,43 +3100,26 @@ async def get_event_participants(
     if not event:
         raise HTTPException(status_code=404, detail="イベントが見つかりません")
     
-    # 参加登録を取得
-    registrations = db.query(DbEventRegistration).filter(
-        DbEventRegistration.event_id == event_id
-    ).all()
-    
-    responses = []
-    for reg in registrations:
-        # ユーザー情報取得
-        user = db.query(DbUser).filter(DbUser.id == reg.user_id).first()
-        user_name = f"{user.last_name or ''} {user.first_name or ''}".strip() if user else "不明"
-        
-        # 犬情報取得（該当する場合）
-        dog_name = None
-        if reg.dog_id:
-            dog = db.query(DbDog).filter(DbDog.id == reg.dog_id).first()
-            dog_name = dog.name if dog else None
-        
-        responses.append(EventParticipantResponse(
+    # 参加登録を参加者名・犬名付きで取得（1クエリ）
+    return [
+        EventParticipantResponse(
             id=reg.id,
             user_id=reg.user_id,
-            user_name=user_name,
+            user_name=_participant_name(last_name, first_name),
             dog_id=reg.dog_id,
             dog_name=dog_name,
-            registered_at=datetime.utcnow()  # EventRegistrationにregistered_atがない場合の仮値
-        ))
-    
-    return responses
+            registered_at=reg.registered_at
+        )
+        for reg, last_name, first_name, dog_name in participant_rows(db, event_id)
+    ]
 
-@app.get("/calendar/{year}/{month}")
-async def get_calendar(year: int, month: int):
-    """カレンダー情報取得"""
-    # 実際の実装ではデータベースから取得
-    return {
-        "year": year,
-        "month": month,
-        "days": []  # カレンダーの日付情報
-    }
+@app.get("/calendar/{year}/{month}", response_model=CalendarMonthResponse)
+async def get_calendar(year: int, month: int, db=Depends(get_db)):
+    """カレンダー情報取得（営業時間・特別休業日・イベント件数・残り枠）"""
+    min_year, max_year = calendar_year_range()
+    if not 1 <= month <= 12 or not min_year <= year <= max_year:
+        raise HTTPException(status_code=400, detail="年月の指定が正しくありません")
+    return CalendarMonthResponse(**get_calendar_month(db, year, month))
 
 # 入場管理関連 (db_control)
 @app.get("/entry/qrcode", response_model=QRCodeResponse)
@@ -2342,6 +3201,10 @@ async def enter_dogrun(
     """ドッグラン入場記録"""
     from uuid import uuid4
     
+    # 営業時間外の入場を拒否（コンパイル済みスケジュールを参照するためDBアクセスなし）
+    if ENFORCE_BUSINESS_HOURS_ON_ENTRY and not get_schedule(db).is_open_at(park_now()):
+        raise HTTPException(status_code=400, detail="営業時間外のため入場できません")
+    
     # 既に入場中かチェック
     last_entry = db.query(DbEntryLog).filter(
         DbEntryLog.user_id == current_user.id
@@ -2357,6 +3220,8 @@ async def enter_dogrun(
         action=EntryAction.entry,
         occurred_at=datetime.utcnow()
     )
+    # 集計テーブルを同じトランザクションで更新
+    record_entry(db, current_user.id, entry_log.occurred_at)
     db.add(entry_log)
     
     # 犬の情報を取得
@@ -2407,6 +3272,7 @@ async def exit_dogrun(
         occurred_at=datetime.utcnow()
     )
     db.add(exit_log)
+    record_exit(db, current_user.id, last_entry.occurred_at, exit_log.occurred_at)
     db.commit()
     
     # 滞在時間を計算
@@ -2476,9 +3342,7 @@ async def get_entry_history(
     db=Depends(get_db)
 ):
     """入退場履歴取得（自分の履歴）"""
-    logs = db.query(DbEntryLog).filter(
-        DbEntryLog.user_id == current_user.id
-    ).order_by(DbEntryLog.occurred_at.desc()).limit(limit).all()
+    logs = user_entry_history(db, current_user.id, limit)
     
     history = []
     for log in logs:
@@ -2497,26 +3361,114 @@ async def get_entry_history(
     
     return history
 
+@app.get("/entry/forecast", response_model=OccupancyForecastResponse)
+async def get_occupancy_forecast(
+    target_date: Optional[date] = None,
+    db=Depends(get_db)
+):
+    """時間帯別の混雑予測取得"""
+    if target_date is None:
+        target_date = to_local(datetime.utcnow()).date()
+    return OccupancyForecastResponse(**get_forecast(db, target_date))
+
+@app.get("/admin/entry/analytics", response_model=EntryAnalyticsResponse)
+async def get_entry_analytics(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    current_admin = Depends(get_current_admin_user),
+    db=Depends(get_db)
+):
+    """入退場分析（混雑時間帯・平均滞在時間）"""
+    from datetime import timedelta
+
+    if end_date is None:
+        end_date = to_local(datetime.utcnow()).date()
+    if start_date is None:
+        start_date = end_date - timedelta(days=29)
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="開始日は終了日以前を指定してください")
+
+    return EntryAnalyticsResponse(**get_visit_analytics(db, start_date, end_date))
+
 # お知らせ関連
 @app.get("/notices", response_model=List[NoticeManagementResponse])
-async def get_notices(db=Depends(get_db)):
-    """お知らせ一覧取得"""
-    notices = db.query(Notice).order_by(Notice.created_at.desc()).all()
-    return [NoticeManagementResponse.from_orm(notice) for notice in notices]
+async def get_notices(request: Request, db=Depends(get_db)):
+    """公開中のお知らせ一覧（新しい順）
+
+    全員に同じ内容を返すため、レスポンスをキャッシュして ETag で 304 を返す。
+    お知らせの更新時にキャッシュを無効化する。
+    """
+    from pydantic import TypeAdapter
+    
+    def render() -> bytes:
+        notices = db.query(Notice).filter(
+            Notice.status == NoticeStatus.published
+        ).order_by(Notice.created_at.desc()).all()
+        return TypeAdapter(List[NoticeManagementResponse]).dump_json(
+            [_notice_management_response(n) for n in notices]
+        )
+    return cached_response(request, db, "notices", render)
+
+@app.get("/notices/inbox", response_model=NoticeInboxResponse)
+async def get_notice_inbox(
+    cursor: Optional[str] = None,
+    limit: int = 20,
+    unread_only: bool = False,
+    current_user = Depends(get_current_user),
+    db=Depends(get_db)
+):
+    """お知らせの受信箱（新しい順、next_cursor によるキーセットページネーション）"""
+    try:
+        rows, next_cursor = inbox_page(db, current_user.id, cursor, limit, unread_only)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return NoticeInboxResponse(
+        items=[
+            NoticeInboxItem(
+                id=notice.id,
+                title=notice.title,
+                content=notice.content,
+                category=notice.category,
+                priority=notice.priority.value if notice.priority else None,
+                delivered_at=receipt.created_at,
+                read_at=receipt.read_at,
+                is_read=receipt.read_at is not None
+            )
+            for notice, receipt in rows
+        ],
+        next_cursor=next_cursor,
+        unread_count=current_user.unread_notice_count or 0
+    )
+
+@app.get("/notices/unread-count", response_model=NoticeUnreadCountResponse)
+async def get_unread_notice_count(
+    current_user = Depends(get_current_user)
+):
+    """未読のお知らせ数（頻繁なポーリング用。ユーザーの行の未読数を返すだけで集計しない）"""
+    return NoticeUnreadCountResponse(unread_count=current_user.unread_notice_count or 0)
+
+@app.put("/notices/read-all")
+async def mark_all_notices_as_read(
+    current_user = Depends(get_current_user),
+    db=Depends(get_db)
+):
+    """受信箱のお知らせをすべて既読にする"""
+    marked = mark_all_notices_read(db, current_user.id)
+    db.commit()
+    return {"message": f"{marked}件を既読にしました", "marked": marked}
 
 @app.put("/notices/{notice_id}/read")
 async def mark_notice_as_read(
-    notice_id: int,
+    notice_id: str,
+    current_user = Depends(get_current_user),
     db=Depends(get_db)
 ):
     """お知らせを既読にする"""
-    notice = db.query(Notice).filter(Notice.id == notice_id).first()
-    if not notice:
+    marked = mark_notice_read(db, current_user.id, notice_id)
+    if marked is None:
         raise HTTPException(status_code=404, detail="お知らせが見つかりません")
-
-    notice.read = True
     db.commit()
-    return {"message": "既読にしました"}
+    return {"message": "既読にしました" if marked else "既に既読です"}
 
 # 入場関連
 @app.post("/entry/scan")
@@ -2543,10 +3495,231 @@ async def exit_dog_run(current_user = Depends(get_current_user)):
 
 # タグ関連
 @app.get("/tags", response_model=List[TagResponse])
-async def get_tags(db=Depends(get_db)):
-    """タグ一覧取得"""
-    tags = db.query(Tag).all()
-    return [TagResponse.from_orm(tag) for tag in tags]
+async def get_tags(request: Request, db=Depends(get_db)):
+    """タグ一覧取得（レスポンスをキャッシュして ETag で 304 を返す）"""
+    from pydantic import TypeAdapter
+    
+    def render() -> bytes:
+        tags = db.query(Tag).order_by(Tag.label).all()
+        return TypeAdapter(List[TagResponse]).dump_json([TagResponse.from_orm(tag) for tag in tags])
+    return cached_response(request, db, "tags", render)
+
+@app.post("/admin/tags", response_model=TagResponse)
+async def create_tag(
+    request: TagCreateRequest,
+    current_admin = Depends(get_current_admin_user),
+    db=Depends(get_db)
+):
+    """タグ作成"""
+    from uuid import uuid4
+    from sqlalchemy.exc import IntegrityError
+    
+    label = request.label.strip()
+    if not label:
+        raise HTTPException(status_code=400, detail="タグ名を入力してください")
+    if db.query(Tag.id).filter(Tag.label == label).first():
+        raise HTTPException(status_code=400, detail="同じ名前のタグが既に存在します")
+    
+    tag = Tag(id=str(uuid4()), label=label)
+    db.add(tag)
+    invalidate_response_cache(db, "tags")
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="同じ名前のタグが既に存在します")
+    
+    # 管理者ログを記録
+    await log_admin_action(
+        admin_user_id=current_admin.id,
+        action="tag_created",
+        target_type="tag",
+        target_id=tag.id,
+        details=f"タグを作成: {label}",
+        db=db
+    )
+    
+    return TagResponse(id=tag.id, label=label)
+
+@app.delete("/admin/tags/{tag_id}")
+async def delete_tag(
+    tag_id: str,
+    current_admin = Depends(get_current_admin_user),
+    db=Depends(get_db)
+):
+    """タグ削除"""
+    tag = db.query(Tag).filter(Tag.id == tag_id).first()
+    if not tag:
+        raise HTTPException(status_code=404, detail="タグが見つかりません")
+    
+    label = tag.label
+    db.delete(tag)
+    invalidate_response_cache(db, "tags")
+    db.commit()
+    
+    # 管理者ログを記録
+    await log_admin_action(
+        admin_user_id=current_admin.id,
+        action="tag_deleted",
+        target_type="tag",
+        target_id=tag_id,
+        details=f"タグを削除: {label}",
+        db=db
+    )
+    
+    return {"message": "タグを削除しました"}
+
+# ===== お知らせ管理API =====
+
+def _notice_management_response(notice) -> NoticeManagementResponse:
+    return NoticeManagementResponse(
+        id=notice.id,
+        title=notice.title,
+        content=notice.content or "",
+        category=notice.category,
+        priority=notice.priority.value if notice.priority else "low",
+        status=notice.status.value if notice.status else "published",
+        posted_at=notice.created_at,
+        updated_at=notice.updated_at
+    )
+
+@app.get("/admin/notices", response_model=List[NoticeManagementResponse])
+async def get_notices_for_admin(
+    status: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    current_admin = Depends(get_current_admin_user),
+    db=Depends(get_db)
+):
+    """お知らせ一覧（管理者用、新しい順）"""
+    query = db.query(Notice)
+    if status:
+        try:
+            query = query.filter(Notice.status == NoticeStatus(status))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="無効なステータスです")
+    notices = query.order_by(Notice.created_at.desc()).limit(limit).all()
+    return [_notice_management_response(n) for n in notices]
+
+@app.post("/admin/notices", response_model=NoticeManagementResponse)
+async def create_notice(
+    request: NoticeCreateRequest,
+    publish: bool = True,
+    current_admin = Depends(get_current_admin_user),
+    db=Depends(get_db)
+):
+    """お知らせ作成（publish=true の場合は公開して全ユーザーの受信箱に配信）"""
+    from db_control.models import NoticePriority as DbNoticePriority
+    from uuid import uuid4
+    
+    now = datetime.utcnow()
+    notice = Notice(
+        id=str(uuid4()),
+        title=request.title,
+        content=request.content,
+        category=request.category,
+        priority=DbNoticePriority(request.priority.value),
+        status=NoticeStatus.draft,
+        created_at=now,
+        updated_at=now
+    )
+    db.add(notice)
+    db.flush()
+    delivered = publish_notice(db, notice.id) if publish else 0
+    invalidate_response_cache(db, "notices")
+    db.commit()
+    db.refresh(notice)
+    
+    # 管理者ログを記録
+    await log_admin_action(
+        admin_user_id=current_admin.id,
+        action="notice_created",
+        target_type="notice",
+        target_id=notice.id,
+        details=f"お知らせを作成: {notice.title}" + (f"（{delivered}名に配信）" if publish else ""),
+        db=db
+    )
+    
+    return _notice_management_response(notice)
+
+@app.put("/admin/notices/{notice_id}", response_model=NoticeManagementResponse)
+async def update_notice(
+    notice_id: str,
+    request: NoticeUpdateRequest,
+    current_admin = Depends(get_current_admin_user),
+    db=Depends(get_db)
+):
+    """お知らせ更新
+
+    公開にすると全ユーザーの受信箱に配信し、下書き・アーカイブに戻すと受信箱から取り除く。
+    """
+    from db_control.models import NoticePriority as DbNoticePriority
+    
+    notice = db.query(Notice).filter(Notice.id == notice_id).first()
+    if not notice:
+        raise HTTPException(status_code=404, detail="お知らせが見つかりません")
+    
+    if request.title is not None:
+        notice.title = request.title
+    if request.content is not None:
+        notice.content = request.content
+    if request.category is not None:
+        notice.category = request.category
+    if request.priority is not None:
+        notice.priority = DbNoticePriority(request.priority.value)
+    notice.updated_at = datetime.utcnow()
+    db.flush()
+    
+    if request.status is not None:
+        new_status = NoticeStatus(request.status.value)
+        if new_status == NoticeStatus.published:
+            publish_notice(db, notice_id)
+        elif notice.status != new_status:
+            retract_notice(db, notice_id)
+            notice.status = new_status
+    invalidate_response_cache(db, "notices")
+    db.commit()
+    db.refresh(notice)
+    
+    # 管理者ログを記録
+    await log_admin_action(
+        admin_user_id=current_admin.id,
+        action="notice_updated",
+        target_type="notice",
+        target_id=notice_id,
+        details=f"お知らせを更新: {notice.title}",
+        db=db
+    )
+    
+    return _notice_management_response(notice)
+
+@app.delete("/admin/notices/{notice_id}")
+async def delete_notice(
+    notice_id: str,
+    current_admin = Depends(get_current_admin_user),
+    db=Depends(get_db)
+):
+    """お知らせ削除（受信箱からも取り除く）"""
+    notice = db.query(Notice).filter(Notice.id == notice_id).first()
+    if not notice:
+        raise HTTPException(status_code=404, detail="お知らせが見つかりません")
+    
+    title = notice.title
+    retract_notice(db, notice_id)
+    db.delete(notice)
+    invalidate_response_cache(db, "notices")
+    db.commit()
+    
+    # 管理者ログを記録
+    await log_admin_action(
+        admin_user_id=current_admin.id,
+        action="notice_deleted",
+        target_type="notice",
+        target_id=notice_id,
+        details=f"お知らせを削除: {title}",
+        db=db
+    )
+    
+    return {"message": "お知らせを削除しました"}
 
 # ===== 営業時間管理API =====
 
@@ -2568,10 +3741,12 @@ async def update_business_hours(
     """営業時間一括更新"""
     from datetime import time
     
+    # 曜日ごとの営業時間は1クエリでまとめて取得
+    business_hours = {bh.day_of_week: bh for bh in db.query(BusinessHour).all()}
     for update in updates:
         day_of_week = update.get("day_of_week")
         if day_of_week is not None:
-            bh = db.query(BusinessHour).filter(BusinessHour.day_of_week == day_of_week).first()
+            bh = business_hours.get(day_of_week)
             if bh:
                 bh.is_open = update.get("is_open", bh.is_open)
                 if update.get("open_time"):
@@ -2583,7 +3758,9 @@ async def update_business_hours(
                 bh.special_note = update.get("special_note", bh.special_note)
                 bh.updated_at = datetime.utcnow()
     
+    invalidate_calendar_all(db)
     db.commit()
+    invalidate_schedule()
     
     # 管理者ログを記録
     await log_admin_action(
@@ -2597,67 +3774,106 @@ async def update_business_hours(
     
     return {"message": "営業時間を更新しました"}
 
-@app.get("/admin/business-hours/today", response_model=TodayBusinessHoursResponse)
-async def get_today_business_hours(
+def _parse_opening_hours(is_open: bool, open_time: Optional[str], close_time: Optional[str], label: str):
+    """営業時間の入力を検証して time に変換（不正な場合は 400）"""
+    try:
+        opens, closes = parse_hhmm(open_time), parse_hhmm(close_time)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"{label}: {e}")
+    if is_open and opens and closes and opens >= closes:
+        raise HTTPException(status_code=400, detail=f"{label}: 終了時刻は開始時刻より後にしてください")
+    return opens, closes
+
+@app.put("/admin/business-hours/bulk")
+async def bulk_update_business_hours(
+    request: BusinessHourBulkUpdateRequest,
     current_admin = Depends(get_current_admin_user),
     db=Depends(get_db)
 ):
-    """本日の営業時間取得"""
-    from datetime import date as dt_date
-    
-    today = dt_date.today()
-    day_of_week = today.weekday()  # 月曜=0, 日曜=6
-    # SQLの曜日形式に変換（日曜=0, 月曜=1）
-    sql_day_of_week = (day_of_week + 1) % 7
+    """営業時間一括登録（1週間分をまとめてUPSERT）"""
+    from uuid import uuid4
     
-    # 通常の営業時間を取得
-    business_hour = db.query(BusinessHour).filter(
-        BusinessHour.day_of_week == sql_day_of_week
-    ).first()
+    # 入力はすべてメモリ上で検証してから1文で反映する
+    seen = set()
+    rows = []
+    now = datetime.utcnow()
+    for item in request.days:
+        if not 0 <= item.day_of_week <= 6:
+            raise HTTPException(status_code=400, detail=f"曜日が不正です: {item.day_of_week}")
+        if item.day_of_week in seen:
+            raise HTTPException(status_code=400, detail=f"曜日が重複しています: {item.day_of_week}")
+        seen.add(item.day_of_week)
+        open_time, close_time = _parse_opening_hours(
+            item.is_open, item.open_time, item.close_time, DAY_NAMES[item.day_of_week]
+        )
+        rows.append({
+            "id": str(uuid4()),
+            "day_of_week": item.day_of_week,
+            "is_open": item.is_open,
+            "open_time": open_time,
+            "close_time": close_time,
+            "special_note": item.special_note,
+            "created_at": now,
+            "updated_at": now,
+        })
+    if not rows:
+        raise HTTPException(status_code=400, detail="更新する曜日を指定してください")
+    
+    upsert_rows(
+        db, BusinessHour.__table__, rows,
+        key_columns=["day_of_week"],
+        update_columns=["is_open", "open_time", "close_time", "special_note", "updated_at"]
+    )
+    invalidate_calendar_all(db)
+    db.commit()
+    invalidate_schedule()
     
-    # 特別休業日チェック
-    special_holiday = db.query(SpecialHoliday).filter(
-        SpecialHoliday.holiday_date == today
-    ).first()
+    # 管理者ログを記録
+    await log_admin_action(
+        admin_user_id=current_admin.id,
+        action="business_hours_bulk_updated",
+        target_type="business_hours",
+        target_id=None,
+        details=f"営業時間を一括更新: {'・'.join(DAY_NAMES[r['day_of_week']] for r in rows)}",
+        db=db
+    )
     
-    day_names = ["日曜日", "月曜日", "火曜日", "水曜日", "木曜日", "金曜日", "土曜日"]
-    
-    if special_holiday:
-        return TodayBusinessHoursResponse(
-            date=today,
-            day_of_week=sql_day_of_week,
-            day_name=day_names[sql_day_of_week],
-            is_open=special_holiday.is_open,
-            open_time=str(special_holiday.open_time) if special_holiday.open_time else None,
-            close_time=str(special_holiday.close_time) if special_holiday.close_time else None,
-            special_note=special_holiday.note,
-            is_holiday=True,
-            holiday_name=special_holiday.holiday_name
-        )
-    elif business_hour:
-        return TodayBusinessHoursResponse(
-            date=today,
-            day_of_week=sql_day_of_week,
-            day_name=day_names[sql_day_of_week],
-            is_open=business_hour.is_open,
-            open_time=str(business_hour.open_time) if business_hour.open_time else None,
-            close_time=str(business_hour.close_time) if business_hour.close_time else None,
-            special_note=business_hour.special_note,
-            is_holiday=False,
-            holiday_name=None
-        )
-    else:
-        return TodayBusinessHoursResponse(
-            date=today,
-            day_of_week=sql_day_of_week,
-            day_name=day_names[sql_day_of_week],
-            is_open=False,
-            open_time=None,
-            close_time=None,
-            special_note="営業時間が設定されていません",
-            is_holiday=False,
-            holiday_name=None
-        )
+    return {"message": "営業時間を更新しました", "updated": len(rows)}
+
+def _today_business_hours_response(hours) -> TodayBusinessHoursResponse:
+    """コンパイル済みスケジュールの営業情報をレスポンスに変換"""
+    return TodayBusinessHoursResponse(
+        date=hours.date,
+        day_of_week=hours.day_of_week,
+        day_name=hours.day_name,
+        is_open=hours.is_open,
+        open_time=str(hours.open_time) if hours.open_time else None,
+        close_time=str(hours.close_time) if hours.close_time else None,
+        special_note=hours.note,
+        is_holiday=hours.is_holiday,
+        holiday_name=hours.holiday_name
+    )
+
+@app.get("/admin/business-hours/today", response_model=TodayBusinessHoursResponse)
+async def get_today_business_hours(
+    current_admin = Depends(get_current_admin_user),
+    db=Depends(get_db)
+):
+    """本日の営業時間取得"""
+    schedule = get_schedule(db)
+    return _today_business_hours_response(schedule.hours_for(park_now().date()))
+
+@app.get("/business-hours/status", response_model=BusinessStatusResponse)
+async def get_business_status(db=Depends(get_db)):
+    """現在の営業状況（営業中か・本日の営業時間・次の営業開始）"""
+    schedule = get_schedule(db)
+    now = park_now()
+    return BusinessStatusResponse(
+        now=now,
+        is_open_now=schedule.is_open_at(now),
+        today=_today_business_hours_response(schedule.hours_for(now.date())),
+        next_opening=schedule.next_opening(now)
+    )
 
 @app.get("/admin/special-holidays", response_model=List[SpecialHolidayResponse])
 async def get_special_holidays(
@@ -2707,7 +3923,9 @@ async def create_special_holiday(
     )
     
     db.add(holiday)
+    invalidate_calendar_dates(db, [holiday.holiday_date])
     db.commit()
+    invalidate_schedule()
     db.refresh(holiday)
     
     # 管理者ログを記録
@@ -2722,6 +3940,120 @@ async def create_special_holiday(
     
     return SpecialHolidayResponse.from_orm(holiday)
 
+# 一括登録で受け付ける最大件数
+MAX_BULK_HOLIDAYS = 1000
+
+async def _bulk_upsert_special_holidays(
+    items: List[SpecialHolidayCreateRequest],
+    overwrite: bool,
+    current_admin,
+    db,
+    source: str
+) -> SpecialHolidayBulkResponse:
+    """特別休業日をまとめて検証し、1文のUPSERTと1件の管理者ログで反映"""
+    from uuid import uuid4
+    
+    if not items:
+        raise HTTPException(status_code=400, detail="登録する日付を指定してください")
+    if len(items) > MAX_BULK_HOLIDAYS:
+        raise HTTPException(status_code=400, detail=f"一度に登録できるのは{MAX_BULK_HOLIDAYS}件までです")
+    
+    rows = {}
+    now = datetime.utcnow()
+    for item in items:
+        if item.holiday_date in rows:
+            raise HTTPException(status_code=400, detail=f"日付が重複しています: {item.holiday_date}")
+        open_time, close_time = _parse_opening_hours(
+            item.is_open, item.open_time, item.close_time, str(item.holiday_date)
+        )
+        rows[item.holiday_date] = {
+            "id": str(uuid4()),
+            "holiday_date": item.holiday_date,
+            "holiday_name": item.holiday_name,
+            "is_open": item.is_open,
+            "open_time": open_time,
+            "close_time": close_time,
+            "note": item.note,
+            "created_at": now,
+            "updated_at": now,
+        }
+    
+    # 登録済みの日付は1クエリで確認（新規・更新件数の集計とスキップ判定に使用）
+    existing = {
+        d for (d,) in db.query(SpecialHoliday.holiday_date).filter(
+            SpecialHoliday.holiday_date.in_(list(rows))
+        ).all()
+    }
+    skipped = []
+    if not overwrite:
+        skipped = sorted(existing)
+        for d in skipped:
+            del rows[d]
+    
+    upsert_rows(
+        db, SpecialHoliday.__table__, list(rows.values()),
+        key_columns=["holiday_date"],
+        update_columns=["holiday_name", "is_open", "open_time", "close_time", "note", "updated_at"]
+    )
+    invalidate_calendar_dates(db, rows.keys())
+    db.commit()
+    invalidate_schedule()
+    
+    created = len(rows) - len(existing & rows.keys())
+    updated = len(rows) - created
+    
+    # 管理者ログを記録
+    await log_admin_action(
+        admin_user_id=current_admin.id,
+        action="special_holidays_bulk_upserted",
+        target_type="special_holiday",
+        target_id=None,
+        details=f"特別休業日を一括登録（{source}）: 新規{created}件, 更新{updated}件, スキップ{len(skipped)}件",
+        db=db
+    )
+    
+    return SpecialHolidayBulkResponse(
+        message="特別休業日を一括登録しました",
+        created=created,
+        updated=updated,
+        skipped=skipped
+    )
+
+@app.post("/admin/special-holidays/bulk", response_model=SpecialHolidayBulkResponse)
+async def bulk_create_special_holidays(
+    request: SpecialHolidayBulkRequest,
+    current_admin = Depends(get_current_admin_user),
+    db=Depends(get_db)
+):
+    """特別休業日一括登録"""
+    return await _bulk_upsert_special_holidays(
+        request.holidays, request.overwrite, current_admin, db, source="一括登録"
+    )
+
+@app.post("/admin/special-holidays/import-ical", response_model=SpecialHolidayBulkResponse)
+async def import_special_holidays_ical(
+    file: UploadFile = File(...),
+    overwrite: bool = Form(True),
+    current_admin = Depends(get_current_admin_user),
+    db=Depends(get_db)
+):
+    """iCalendar（.ics）ファイルから特別休業日を一括登録（終日休業として登録）"""
+    content = await file.read()
+    try:
+        parsed = parse_ical_holidays(content.decode("utf-8-sig"), max_days=MAX_BULK_HOLIDAYS)
+    except (UnicodeDecodeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"iCalendarファイルを読み込めません: {e}")
+    
+    # 同じ日付の重複イベントは先頭の名称を採用
+    items = {}
+    for holiday_date, name in parsed:
+        items.setdefault(holiday_date, SpecialHolidayCreateRequest(
+            holiday_date=holiday_date, holiday_name=name, is_open=False
+        ))
+    return await _bulk_upsert_special_holidays(
+        list(items.values()), overwrite, current_admin, db, source=file.filename or "iCal"
+    )
+
 @app.put("/admin/special-holidays/{holiday_id}", response_model=SpecialHolidayResponse)
 async def update_special_holiday(
     holiday_id: str,
@@ -2757,7 +4089,9 @@ async def update_special_holiday(
     
     holiday.updated_at = datetime.utcnow()
     
+    invalidate_calendar_dates(db, [holiday.holiday_date])
     db.commit()
+    invalidate_schedule()
     db.refresh(holiday)
     
     # 管理者ログを記録
@@ -2784,8 +4118,10 @@ async def delete_special_holiday(
         raise HTTPException(status_code=404, detail="特別休業日が見つかりません")
     
     holiday_date = holiday.holiday_date
+    invalidate_calendar_dates(db, [holiday_date])
     db.delete(holiday)
     db.commit()
+    invalidate_schedule()
     
     # 管理者ログを記録
     await log_admin_action(
@@ -2799,6 +4135,358 @@ async def delete_special_holiday(
     
     return {"message": "特別休業日を削除しました"}
 
+# ===== 管理者操作ログAPI =====
+
+# 操作ログ一覧の1ページあたりの最大件数
+MAX_ADMIN_LOG_PAGE_SIZE = 200
+
+ADMIN_LOG_EXPORT_FIELDS = [
+    "id", "created_at", "admin_user_id", "admin_user_name", "action",
+    "target_type", "target_id", "details", "ip_address", "user_agent"
+]
+
+def _filter_admin_logs(
+    query,
+    admin_user_id: Optional[str],
+    action: Optional[str],
+    target_type: Optional[str],
+    target_id: Optional[str],
+    since: Optional[datetime],
+    until: Optional[datetime]
+):
+    """操作ログの絞り込み条件（各条件は admin_logs の複合インデックスに対応）"""
+    if admin_user_id:
+        query = query.filter(AdminLog.admin_user_id == admin_user_id)
+    if action:
+        query = query.filter(AdminLog.action == action)
+    if target_type:
+        query = query.filter(AdminLog.target_type == target_type)
+    if target_id:
+        query = query.filter(AdminLog.target_id == target_id)
+    if since:
+        query = query.filter(AdminLog.created_at >= since)
+    if until:
+        query = query.filter(AdminLog.created_at < until)
+    return query
+
+def _admin_log_query(db):
+    return db.query(AdminLog, AdminUser.last_name, AdminUser.first_name).outerjoin(
+        AdminUser, AdminUser.id == AdminLog.admin_user_id
+    )
+
+def _admin_log_row(row) -> dict:
+    log, last_name, first_name = row
+    return {
+        "id": log.id,
+        "admin_user_id": log.admin_user_id,
+        "admin_user_name": f"{last_name or ''} {first_name or ''}".strip(),
+        "action": log.action,
+        "target_type": log.target_type,
+        "target_id": log.target_id,
+        "details": log.details,
+        "ip_address": log.ip_address,
+        "user_agent": log.user_agent,
+        "created_at": log.created_at,
+    }
+
+@app.get("/admin/logs", response_model=AdminLogListResponse)
+async def get_admin_logs(
+    admin_user_id: Optional[str] = None,
+    action: Optional[str] = None,
+    target_type: Optional[str] = None,
+    target_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    current_admin = Depends(get_current_admin_user),
+    db=Depends(get_db)
+):
+    """操作ログ一覧（新しい順、next_cursor によるキーセットページネーション）"""
+    limit = max(1, min(limit, MAX_ADMIN_LOG_PAGE_SIZE))
+    query = _filter_admin_logs(
+        _admin_log_query(db), admin_user_id, action, target_type, target_id, since, until
+    )
+    if cursor:
+        try:
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        query = query.filter(or_(
+            AdminLog.created_at < cursor_created_at,
+            and_(AdminLog.created_at == cursor_created_at, AdminLog.id < cursor_id)
+        ))
+    
+    rows = query.order_by(AdminLog.created_at.desc(), AdminLog.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1][0]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    
+    return AdminLogListResponse(
+        items=[AdminLogResponse(**_admin_log_row(row)) for row in rows],
+        next_cursor=next_cursor
+    )
+
+@app.get("/admin/logs/export")
+async def export_admin_logs(
+    export_format: str = Query("csv", alias="format"),
+    admin_user_id: Optional[str] = None,
+    action: Optional[str] = None,
+    target_type: Optional[str] = None,
+    target_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    current_admin = Depends(get_current_admin_user),
+    db=Depends(get_db)
+):
+    """操作ログのエクスポート（CSV / NDJSON をストリーミング）"""
+    def build_query(export_db):
+        return _filter_admin_logs(
+            _admin_log_query(export_db), admin_user_id, action, target_type, target_id, since, until
+        ).order_by(AdminLog.created_at.desc(), AdminLog.id.desc())
+    
+    response = streaming_export(
+        build_query,
+        _admin_log_row,
+        ADMIN_LOG_EXPORT_FIELDS,
+        export_format,
+        "admin_logs"
+    )
+    
+    # 管理者ログを記録
+    await log_admin_action(
+        admin_user_id=current_admin.id,
+        action="admin_logs_exported",
+        target_type="admin_logs",
+        target_id=None,
+        details=f"操作ログをエクスポート（{export_format}）",
+        db=db
+    )
+    
+    return response
+
+@app.get("/admin/logs/stats", response_model=AuditLogStatsResponse)
+async def get_admin_log_stats(
+    current_admin = Depends(get_current_admin_user)
+):
+    """操作ログ書き込みキューの状態（破棄・失敗件数など）"""
+    return AuditLogStatsResponse(**audit_writer.stats())
+
+# ===== ジョブキュー管理API =====
+
+def _job_response(job) -> JobResponse:
+    return JobResponse(
+        id=job.id,
+        job_type=job.job_type,
+        payload=job.payload,
+        status=job.status.value,
+        attempts=job.attempts,
+        max_attempts=job.max_attempts,
+        run_at=job.run_at,
+        last_error=job.last_error,
+        created_at=job.created_at,
+        updated_at=job.updated_at,
+        finished_at=job.finished_at
+    )
+
+@app.get("/admin/jobs/stats", response_model=JobStatsResponse)
+async def get_job_stats(
+    current_admin = Depends(get_current_admin_user),
+    db=Depends(get_db)
+):
+    """ジョブキューの種別・ステータスごとの件数とワーカーの状態"""
+    from sqlalchemy import func
+    
+    counts = {}
+    rows = db.query(Job.job_type, Job.status, func.count(Job.id)).group_by(Job.job_type, Job.status)
+    for job_type, job_status, count in rows:
+        counts.setdefault(job_type, {})[job_status.value] = count
+    return JobStatsResponse(
+        counts=counts,
+        workers=worker_pool.size,
+        running=worker_pool.running,
+        job_types=registered_job_types()
+    )
+
+@app.get("/admin/jobs", response_model=List[JobResponse])
+async def get_jobs(
+    status: Optional[str] = None,
+    job_type: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    current_admin = Depends(get_current_admin_user),
+    db=Depends(get_db)
+):
+    """ジョブ一覧（新しい順。status=dead でデッドレターを確認）"""
+    query = db.query(Job)
+    if status:
+        try:
+            query = query.filter(Job.status == JobStatus(status))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="無効なステータスです")
+    if job_type:
+        query = query.filter(Job.job_type == job_type)
+    jobs_list = query.order_by(Job.created_at.desc()).limit(limit).all()
+    return [_job_response(j) for j in jobs_list]
+
+@app.post("/admin/jobs/{job_id}/retry", response_model=JobResponse)
+async def retry_job(
+    job_id: str,
+    current_admin = Depends(get_current_admin_user),
+    db=Depends(get_db)
+):
+    """デッドレターのジョブを再実行待ちに戻す"""
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="ジョブが見つかりません")
+    if job.status != JobStatus.dead:
+        raise HTTPException(status_code=400, detail="再実行できるのは停止中（dead）のジョブのみです")
+    
+    job.status = JobStatus.pending
+    job.attempts = 0
+    job.run_at = datetime.utcnow()
+    job.finished_at = None
+    job.updated_at = datetime.utcnow()
+    db.commit()
+    worker_pool.wake()
+    db.refresh(job)
+    
+    # 管理者ログを記録
+    await log_admin_action(
+        admin_user_id=current_admin.id,
+        action="job_retried",
+        target_type="job",
+        target_id=job_id,
+        details=f"ジョブを再実行: {job.job_type}",
+        db=db
+    )
+    
+    return _job_response(job)
+
+# ===== 通知の送信状況API =====
+
+@app.get("/admin/notifications", response_model=List[NotificationResponse])
+async def get_notifications(
+    event_id: Optional[str] = None,
+    kind: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    current_admin = Depends(get_current_admin_user),
+    db=Depends(get_db)
+):
+    """送信した通知の一覧（新しい順、宛先のステータス別件数付き）"""
+    query = db.query(Notification)
+    if event_id:
+        query = query.filter(Notification.event_id == event_id)
+    if kind:
+        query = query.filter(Notification.kind == kind)
+    notifications = query.order_by(Notification.created_at.desc(), Notification.id.desc()).limit(limit).all()
+    counts = delivery_counts(db, [n.id for n in notifications])
+    return [
+        NotificationResponse(
+            id=n.id,
+            kind=n.kind,
+            subject=n.subject,
+            body=n.body,
+            event_id=n.event_id,
+            created_by=n.created_by,
+            recipient_count=n.recipient_count,
+            delivery_counts=counts[n.id],
+            created_at=n.created_at
+        )
+        for n in notifications
+    ]
+
+@app.get("/admin/notifications/{notification_id}/deliveries", response_model=List[NotificationDeliveryResponse])
+async def get_notification_deliveries(
+    notification_id: str,
+    status: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    current_admin = Depends(get_current_admin_user),
+    db=Depends(get_db)
+):
+    """通知の宛先ごとの送信状況（status=failed で失敗した宛先を確認）"""
+    if not db.query(Notification.id).filter(Notification.id == notification_id).first():
+        raise HTTPException(status_code=404, detail="通知が見つかりません")
+    
+    query = db.query(NotificationDelivery, DbUser.last_name, DbUser.first_name).outerjoin(
+        DbUser, DbUser.id == NotificationDelivery.user_id
+    ).filter(NotificationDelivery.notification_id == notification_id)
+    if status:
+        try:
+            query = query.filter(NotificationDelivery.status == DeliveryStatus(status))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="無効なステータスです")
+    rows = query.order_by(NotificationDelivery.id).offset(offset).limit(limit).all()
+    return [
+        NotificationDeliveryResponse(
+            id=d.id,
+            user_id=d.user_id,
+            user_name=f"{last_name} {first_name}" if last_name is not None else "不明",
+            channel=d.channel,
+            recipient=d.recipient,
+            status=d.status.value,
+            attempts=d.attempts,
+            last_error=d.last_error,
+            sent_at=d.sent_at,
+            updated_at=d.updated_at
+        )
+        for d, last_name, first_name in rows
+    ]
+
+# ===== アップロードファイル管理API =====
+
+@app.get("/admin/uploads/gc", response_model=UploadGcResponse)
+async def get_upload_gc_result(
+    current_admin = Depends(get_current_admin_user)
+):
+    """このワーカーで直近に実行したアップロードファイル GC の結果"""
+    return UploadGcResponse(result=last_upload_gc_result())
+
+@app.post("/admin/uploads/gc", response_model=UploadGcResponse)
+async def run_upload_gc(
+    dry_run: bool = True,
+    background: bool = False,
+    grace_hours: Optional[float] = None,
+    current_admin = Depends(get_current_admin_user),
+    db=Depends(get_db)
+):
+    """参照されていないアップロードファイルの削除
+
+    既定は dry_run（削除せず対象件数のみ集計）。background=true の場合はジョブとして実行する。
+    """
+    if grace_hours is not None and grace_hours < 0:
+        raise HTTPException(status_code=400, detail="猶予期間は0以上で指定してください")
+    
+    if background:
+        job_id = schedule_upload_gc(db, dry_run=dry_run, grace_hours=grace_hours)
+        if job_id is None:
+            raise HTTPException(status_code=409, detail="実行中のアップロードファイル GC があります")
+        db.commit()
+        response = UploadGcResponse(job_id=job_id)
+    else:
+        options = {"grace_hours": grace_hours} if grace_hours is not None else {}
+        stats = await asyncio.get_running_loop().run_in_executor(
+            None, lambda: collect_orphaned_uploads(db, dry_run=dry_run, **options)
+        )
+        response = UploadGcResponse(result=stats.as_dict())
+    
+    if not dry_run:
+        await log_admin_action(
+            admin_user_id=current_admin.id,
+            action="upload_gc_run",
+            target_type="upload",
+            target_id=response.job_id,
+            details=(
+                "アップロードファイル GC を登録" if background
+                else f"アップロードファイル GC: {response.result.deleted}件削除"
+            ),
+            db=db
+        )
+    
+    return response
+
 # ===== システム設定管理API =====
 
 @app.get("/admin/settings", response_model=List[SystemSettingResponse])
@@ -2810,6 +4498,27 @@ async def get_system_settings(
     settings = db.query(SystemSetting).order_by(SystemSetting.category, SystemSetting.setting_key).all()
     return [SystemSettingResponse.from_orm(s) for s in settings]
 
+# /admin/settings/{category} より前に定義する
+@app.get("/admin/settings/snapshots", response_model=List[SettingsSnapshotResponse])
+async def get_settings_snapshots(
+    current_admin = Depends(get_current_admin_user)
+):
+    """設定スナップショット一覧（新しい順）"""
+    return [SettingsSnapshotResponse(**s) for s in list_snapshots()]
+
+@app.get("/admin/settings/snapshots/diff", response_model=SettingsSnapshotDiffResponse)
+async def diff_settings_snapshots(
+    from_id: str,
+    to_id: Optional[str] = None,
+    current_admin = Depends(get_current_admin_user),
+    db=Depends(get_db)
+):
+    """スナップショット間（to_id 省略時は現在の設定）の差分"""
+    try:
+        return SettingsSnapshotDiffResponse(**diff_snapshots(db, from_id, to_id))
+    except SnapshotNotFoundError as e:
+        raise HTTPException(status_code=404, detail=f"スナップショットが見つかりません: {e}")
+
 @app.get("/admin/settings/{category}", response_model=SystemSettingsCategoryResponse)
 async def get_settings_by_category(
     category: str,
@@ -2842,19 +4551,17 @@ async def update_system_setting(
         raise HTTPException(status_code=404, detail="設定が見つかりません")
     
     # 型チェック
-    if setting.setting_type == "number":
-        try:
-            int(request.setting_value)
-        except ValueError:
-            raise HTTPException(status_code=400, detail="数値を入力してください")
-    elif setting.setting_type == "boolean":
-        if request.setting_value.lower() not in ["true", "false"]:
-            raise HTTPException(status_code=400, detail="true または false を入力してください")
+    try:
+        coerce_setting_value(setting.setting_type, request.setting_value)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     setting.setting_value = request.setting_value
     setting.updated_at = datetime.utcnow()
     
+    bump_settings_version(db)
     db.commit()
+    reload_settings(db)
     
     # 管理者ログを記録
     await log_admin_action(
@@ -2873,54 +4580,68 @@ async def backup_settings(
     current_admin = Depends(get_current_admin_user),
     db=Depends(get_db)
 ):
-    """設定バックアップ"""
-    import json
-    from uuid import uuid4
-    
-    settings = db.query(SystemSetting).all()
-    
-    backup_data = {
-        "timestamp": datetime.utcnow().isoformat(),
-        "admin_id": current_admin.id,
-        "settings": [
-            {
-                "key": s.setting_key,
-                "value": s.setting_value,
-                "type": s.setting_type,
-                "category": s.category,
-                "description": s.description,
-                "is_public": s.is_public
-            }
-            for s in settings
-        ]
-    }
-    
-    backup_id = str(uuid4())
-    file_path = f"backups/settings_{backup_id}.json"
-    
-    # バックアップディレクトリ作成
-    os.makedirs("backups", exist_ok=True)
-    
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(backup_data, f, ensure_ascii=False, indent=2)
+    """設定バックアップ（圧縮スナップショットとして保存）"""
+    snapshot = create_snapshot(db, current_admin.id)
+    file_path = (SNAPSHOT_DIR / snapshot["file_name"]).as_posix()
     
     # 管理者ログを記録
     await log_admin_action(
         admin_user_id=current_admin.id,
         action="settings_backup",
         target_type="system_settings",
-        target_id=backup_id,
+        target_id=snapshot["snapshot_id"],
         details=f"設定をバックアップ: {file_path}",
         db=db
     )
     
     return SystemSettingsBackupResponse(
-        backup_id=backup_id,
-        created_at=datetime.utcnow(),
-        settings_count=len(settings),
+        backup_id=snapshot["snapshot_id"],
+        created_at=snapshot["created_at"],
+        settings_count=snapshot["settings_count"],
         file_path=file_path
     )
 
+@app.post("/admin/settings/snapshots/{snapshot_id}/restore", response_model=SettingsSnapshotRestoreResponse)
+async def restore_settings_snapshot(
+    snapshot_id: str,
+    current_admin = Depends(get_current_admin_user),
+    db=Depends(get_db)
+):
+    """設定スナップショットから復元（1トランザクション）"""
+    # 復元前スナップショットの作成で古いスナップショットが削除されることがあるため、
+    # 復元対象は先に読み込んで検証しておく
+    try:
+        rows = load_snapshot(snapshot_id)
+    except SnapshotNotFoundError:
+        raise HTTPException(status_code=404, detail="スナップショットが見つかりません")
+    except SnapshotCorruptedError as e:
+        raise HTTPException(status_code=409, detail=f"スナップショットが破損しています: {e}")
+
+    # 復元前の状態を残しておく（内容が同じならファイルは共有される）
+    pre_restore = create_snapshot(db, current_admin.id, label="pre_restore")
+    result = restore_snapshot(db, snapshot_id, rows=rows)
+    
+    if result["changed_keys"]:
+        bump_settings_version(db)
+    db.commit()
+    reload_settings(db)
+    
+    # 管理者ログを記録
+    await log_admin_action(
+        admin_user_id=current_admin.id,
+        action="settings_restored",
+        target_type="system_settings",
+        target_id=snapshot_id,
+        details=f"設定をスナップショットから復元: {len(result['changed_keys'])}件変更",
+        db=db
+    )
+    
+    return SettingsSnapshotRestoreResponse(
+        message=f"{len(result['changed_keys'])}件の設定を復元しました",
+        pre_restore_snapshot_id=pre_restore["snapshot_id"],
+        **result
+    )
+
 @app.get("/admin/settings/export")
 async def export_settings(
     current_admin = Depends(get_current_admin_user),
@@ -2945,38 +4666,56 @@ async def export_settings(
     
     return export_data
 
-@app.post("/admin/settings/import")
+@app.post("/admin/settings/import", response_model=SystemSettingsImportResponse)
 async def import_settings(
     request: SystemSettingsImportRequest,
     current_admin = Depends(get_current_admin_user),
     db=Depends(get_db)
 ):
-    """設定インポート"""
-    updated_count = 0
+    """設定インポート（差分を計算し、1トランザクションで一括反映）"""
+    plan = plan_import(db, request.settings)
+    changes = [
+        SettingChangeResponse(key=c.key, old_value=c.old_value, new_value=c.new_value)
+        for c in plan.changes
+    ]
     
-    for key, data in request.settings.items():
-        setting = db.query(SystemSetting).filter(
-            SystemSetting.setting_key == key
-        ).first()
-        
-        if setting:
-            setting.setting_value = data.get("value")
-            setting.updated_at = datetime.utcnow()
-            updated_count += 1
+    def report(message: str, updated_count: int = 0) -> SystemSettingsImportResponse:
+        return SystemSettingsImportResponse(
+            message=message,
+            dry_run=request.dry_run,
+            updated_count=updated_count,
+            changes=changes,
+            unchanged=plan.unchanged,
+            unknown_keys=plan.unknown_keys,
+            errors=plan.errors
+        )
     
-    db.commit()
+    if request.dry_run:
+        return report(f"{len(plan.changes)}件の設定が変更されます（未反映）")
     
-    # 管理者ログを記録
-    await log_admin_action(
-        admin_user_id=current_admin.id,
-        action="settings_imported",
-        target_type="system_settings",
-        target_id=None,
-        details=f"{updated_count}件の設定をインポート",
-        db=db
-    )
+    # 1件でも不正な値があれば何も反映しない
+    if plan.errors:
+        raise HTTPException(
+            status_code=400,
+            detail={"message": "不正な設定値があります", "errors": plan.errors}
+        )
+    
+    updated_count = apply_import(db, plan)
+    db.commit()
+    if updated_count:
+        reload_settings(db)
+        
+        # 管理者ログを記録
+        await log_admin_action(
+            admin_user_id=current_admin.id,
+            action="settings_imported",
+            target_type="system_settings",
+            target_id=None,
+            details=f"{updated_count}件の設定をインポート: {', '.join(c.key for c in plan.changes)}",
+            db=db
+        )
     
-    return {"message": f"{updated_count}件の設定をインポートしました"}
+    return report(f"{updated_count}件の設定をインポートしました", updated_count)
 
 # ヘルスチェック
 @app.get("/health")
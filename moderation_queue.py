@@ -0,0 +1,121 @@
+"""
+投稿のモデレーションキュー
+
+審査対象の投稿を posts の (status, created_at, id) インデックスで古い順に取り出す。
+管理者は一定数の投稿を期限付きで確保（claim）でき、確保中の投稿は他の管理者の
+キューに表示されないため、複数人で同じ投稿を重複して審査しない。期限が切れた確保は
+自動的に無効になり、別の管理者が確保できる。
+"""
+
+import os
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from db_control.models import Post, PostStatus, User
+from utils import decode_cursor, encode_cursor
+
+# 確保の有効期間（秒）
+MODERATION_LEASE_SECONDS = int(os.getenv("MODERATION_LEASE_SECONDS", "600"))
+# 1ページ・1回の確保の最大件数
+MAX_MODERATION_BATCH = 100
+
+# 審査済みの投稿から確保を外すときの更新値
+CLEARED_CLAIM = {Post.claimed_by: None, Post.claim_expires_at: None}
+
+
+def _available_to(admin_id: str, now: datetime):
+    """未確保・確保期限切れ・自分が確保中のいずれか"""
+    return or_(
+        Post.claimed_by.is_(None),
+        Post.claim_expires_at < now,
+        Post.claimed_by == admin_id
+    )
+
+
+def queue_page(
+    db: Session,
+    admin_id: str,
+    status: PostStatus = PostStatus.pending,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    include_claimed: bool = False
+) -> Tuple[List[Tuple[Post, Optional[str], Optional[str]]], Optional[str]]:
+    """キューの1ページ（古い順）を (投稿, 姓, 名) のリストと次ページのカーソルで返す
+
+    投稿者名は同じクエリで結合して取得する。include_claimed=False の場合は他の管理者が
+    確保中の投稿を除く。カーソルが不正な場合は ValueError。
+    """
+    limit = max(1, min(limit, MAX_MODERATION_BATCH))
+    query = db.query(Post, User.last_name, User.first_name).outerjoin(
+        User, User.id == Post.user_id
+    ).filter(Post.status == status)
+    if not include_claimed:
+        query = query.filter(_available_to(admin_id, datetime.utcnow()))
+    if cursor:
+        cursor_created_at, cursor_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            Post.created_at > cursor_created_at,
+            and_(Post.created_at == cursor_created_at, Post.id > cursor_id)
+        ))
+
+    rows = query.order_by(Post.created_at, Post.id).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1][0]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return rows, next_cursor
+
+
+def claim_posts(
+    db: Session,
+    admin_id: str,
+    status: PostStatus = PostStatus.pending,
+    limit: int = 20
+) -> Tuple[List[Post], datetime]:
+    """キューの先頭から最大 limit 件を確保し、確保できた投稿と期限を返す（コミットも行う）
+
+    候補の取得後、確保可能な行だけを条件付き UPDATE で更新するため、同時に確保した
+    他の管理者と同じ投稿を取り合っても二重には確保されない。自分が確保中の投稿は期限を延長する。
+    """
+    limit = max(1, min(limit, MAX_MODERATION_BATCH))
+    now = datetime.utcnow()
+    # DB によっては秒未満が切り捨てられるため、比較に使う期限は秒単位にする
+    expires_at = (now + timedelta(seconds=MODERATION_LEASE_SECONDS)).replace(microsecond=0)
+
+    candidate_ids = [
+        post_id for (post_id,) in db.query(Post.id).filter(
+            Post.status == status,
+            _available_to(admin_id, now)
+        ).order_by(Post.created_at, Post.id).limit(limit)
+    ]
+    if candidate_ids:
+        db.query(Post).filter(
+            Post.id.in_(candidate_ids),
+            Post.status == status,
+            _available_to(admin_id, now)
+        ).update(
+            {Post.claimed_by: admin_id, Post.claim_expires_at: expires_at},
+            synchronize_session=False
+        )
+        db.commit()
+
+    posts = db.query(Post).filter(
+        Post.id.in_(candidate_ids),
+        Post.claimed_by == admin_id,
+        Post.claim_expires_at == expires_at
+    ).order_by(Post.created_at, Post.id).all() if candidate_ids else []
+    return posts, expires_at
+
+
+def release_posts(db: Session, admin_id: str, post_ids: Optional[List[str]] = None) -> int:
+    """自分が確保中の投稿を解放（post_ids 省略時はすべて。コミットも行う）"""
+    query = db.query(Post).filter(Post.claimed_by == admin_id)
+    if post_ids is not None:
+        query = query.filter(Post.id.in_(post_ids))
+    count = query.update(CLEARED_CLAIM, synchronize_session=False)
+    db.commit()
+    return count
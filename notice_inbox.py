@@ -0,0 +1,182 @@
+"""
+お知らせの受信箱（ユーザーごとの既読状態）
+
+お知らせを公開すると、その時点の全ユーザーに notice_receipts の行を INSERT ... SELECT で
+配信し、users.unread_notice_count を同じトランザクションで1ずつ増やす。既読にすると
+受信箱の行と未読数を条件付き UPDATE で更新するため、未読数は件数を数え直さずに保たれ、
+ポーリング用の未読数 API はユーザーの行を読むだけで済む。
+公開後に作成されたユーザーには、作成時に deliver_published_notices() で公開中のお知らせを配信する。
+
+受信箱は notice_receipts の (user_id, created_at, notice_id) インデックスを新しい順に読み、
+お知らせ本文を主キーで結合する1クエリで返す。アーカイブ・削除したお知らせは
+受信箱から取り除き、未読だったユーザーの未読数を減らす。
+"""
+
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, case, func, literal, or_, select, update
+from sqlalchemy.orm import Session
+
+from db_control.models import Notice, NoticeReceipt, NoticeStatus, User
+from utils import decode_cursor, encode_cursor
+
+# 受信箱の1ページの最大件数
+MAX_INBOX_PAGE_SIZE = 100
+
+
+def _decremented(count: int):
+    """未読数を count 減らした値（0 未満にはしない）"""
+    return case(
+        (User.unread_notice_count > count, User.unread_notice_count - count),
+        else_=0
+    )
+
+
+def publish_notice(db: Session, notice_id: str) -> int:
+    """お知らせを公開して全ユーザーに配信（戻り値は配信数。コミットは呼び出し元）
+
+    公開済みのお知らせに対しては何もしない。ステータスの更新を条件付きで行うため、
+    同時に公開しても二重に配信されない。
+    """
+    now = datetime.utcnow()
+    published = db.execute(
+        update(Notice).where(
+            Notice.id == notice_id,
+            or_(Notice.status.is_(None), Notice.status != NoticeStatus.published)
+        ).values(status=NoticeStatus.published, updated_at=now)
+    ).rowcount
+    if not published:
+        return 0
+
+    # 未公開のお知らせの受信は存在しない（アーカイブ時に取り除く）ため、全ユーザーに新規に配信する
+    delivered = db.execute(
+        NoticeReceipt.__table__.insert().from_select(
+            ["user_id", "notice_id", "created_at"],
+            select(User.id, literal(notice_id), literal(now))
+        )
+    ).rowcount
+    db.execute(
+        update(User).where(
+            User.id.in_(select(NoticeReceipt.user_id).where(NoticeReceipt.notice_id == notice_id))
+        ).values(unread_notice_count=User.unread_notice_count + 1)
+    )
+    return delivered
+
+
+def deliver_published_notices(db: Session, user_ids: Sequence[str]) -> int:
+    """作成したユーザーに公開中のお知らせを配信（戻り値は配信数。コミットは呼び出し元）
+
+    ユーザーの作成と同じトランザクションで呼ぶ。受信日時はお知らせの作成日時とし、
+    受信箱で他のお知らせと同じ順に並ぶようにする。
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return 0
+    delivered = db.execute(
+        NoticeReceipt.__table__.insert().from_select(
+            ["user_id", "notice_id", "created_at"],
+            select(User.id, Notice.id, func.coalesce(Notice.created_at, literal(datetime.utcnow()))).where(
+                User.id.in_(user_ids),
+                Notice.status == NoticeStatus.published
+            )
+        )
+    ).rowcount
+    if delivered:
+        db.execute(
+            update(User).where(User.id.in_(user_ids)).values(
+                unread_notice_count=select(func.count()).select_from(NoticeReceipt).where(
+                    NoticeReceipt.user_id == User.id,
+                    NoticeReceipt.read_at.is_(None)
+                ).scalar_subquery()
+            )
+        )
+    return delivered
+
+
+def retract_notice(db: Session, notice_id: str) -> int:
+    """お知らせを全ユーザーの受信箱から取り除く（戻り値は取り除いた数。コミットは呼び出し元）"""
+    db.execute(
+        update(User).where(
+            User.id.in_(select(NoticeReceipt.user_id).where(
+                NoticeReceipt.notice_id == notice_id,
+                NoticeReceipt.read_at.is_(None)
+            ))
+        ).values(unread_notice_count=_decremented(1))
+    )
+    return db.execute(
+        NoticeReceipt.__table__.delete().where(NoticeReceipt.notice_id == notice_id)
+    ).rowcount
+
+
+def inbox_page(
+    db: Session,
+    user_id: str,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+    unread_only: bool = False
+) -> Tuple[List[Tuple[Notice, NoticeReceipt]], Optional[str]]:
+    """受信箱の1ページ（新しい順）を (お知らせ, 受信) のリストと次ページのカーソルで返す
+
+    カーソルが不正な場合は ValueError。
+    """
+    limit = max(1, min(limit, MAX_INBOX_PAGE_SIZE))
+    query = db.query(Notice, NoticeReceipt).join(
+        NoticeReceipt, NoticeReceipt.notice_id == Notice.id
+    ).filter(NoticeReceipt.user_id == user_id)
+    if unread_only:
+        query = query.filter(NoticeReceipt.read_at.is_(None))
+    if cursor:
+        cursor_created_at, cursor_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            NoticeReceipt.created_at < cursor_created_at,
+            and_(NoticeReceipt.created_at == cursor_created_at, NoticeReceipt.notice_id < cursor_id)
+        ))
+
+    rows = query.order_by(
+        NoticeReceipt.created_at.desc(), NoticeReceipt.notice_id.desc()
+    ).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1][1]
+        next_cursor = encode_cursor(last.created_at, last.notice_id)
+    return rows, next_cursor
+
+
+def mark_read(db: Session, user_id: str, notice_id: str) -> Optional[bool]:
+    """お知らせを既読にする（コミットは呼び出し元）
+
+    既読にした場合は True、既に既読の場合は False、受信箱にない場合は None。
+    """
+    marked = db.execute(
+        update(NoticeReceipt).where(
+            NoticeReceipt.user_id == user_id,
+            NoticeReceipt.notice_id == notice_id,
+            NoticeReceipt.read_at.is_(None)
+        ).values(read_at=datetime.utcnow())
+    ).rowcount
+    if marked:
+        db.execute(
+            update(User).where(User.id == user_id).values(unread_notice_count=_decremented(1))
+        )
+        return True
+    received = db.query(NoticeReceipt.notice_id).filter(
+        NoticeReceipt.user_id == user_id, NoticeReceipt.notice_id == notice_id
+    ).first()
+    return False if received else None
+
+
+def mark_all_read(db: Session, user_id: str) -> int:
+    """受信箱のお知らせをすべて既読にする（戻り値は既読にした数。コミットは呼び出し元）"""
+    marked = db.execute(
+        update(NoticeReceipt).where(
+            NoticeReceipt.user_id == user_id,
+            NoticeReceipt.read_at.is_(None)
+        ).values(read_at=datetime.utcnow())
+    ).rowcount
+    if marked:
+        db.execute(
+            update(User).where(User.id == user_id).values(unread_notice_count=_decremented(marked))
+        )
+    return marked
@@ -0,0 +1,276 @@
+"""
+ユーザーへの通知の一斉送信
+
+通知を作成すると、notifications に本文、notification_deliveries に宛先ごとの送信状況を
+登録し、宛先を NOTIFICATION_BATCH_SIZE 件ずつに分けたジョブ（notification_batch）を
+同じトランザクションで登録する。送信はジョブキューのワーカーが行うため、参加者が多い
+イベントでもリクエストはすぐに応答できる。
+
+送信先はシンクで差し替えられる（NOTIFICATION_SINK: log / file / smtp）。file はローカルの
+JSON Lines ファイル、smtp は開発用の SMTP サーバー（python -m aiosmtpd -n など）への送信を想定した
+代替実装。送信はプロセスごとに NOTIFICATION_RATE_PER_SECOND 件/秒に制限する。
+送信に失敗した宛先が残るとジョブを失敗させ、ジョブキューのバックオフで再送する
+（送信済みの宛先は再送しない）。
+"""
+
+import json
+import logging
+import os
+import smtplib
+import threading
+import time
+from datetime import datetime
+from email.message import EmailMessage
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from uuid import uuid4
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from db_control.models import (
+    DeliveryStatus, EventRegistration, Notification, NotificationDelivery, User
+)
+from job_queue import enqueue_jobs, job_handler
+
+logger = logging.getLogger(__name__)
+
+# 1ジョブで送信する宛先数
+NOTIFICATION_BATCH_SIZE = int(os.getenv("NOTIFICATION_BATCH_SIZE", "50"))
+# プロセスごとの送信レート上限（件/秒、0 の場合は制限しない）
+NOTIFICATION_RATE_PER_SECOND = float(os.getenv("NOTIFICATION_RATE_PER_SECOND", "10"))
+# 送信先のシンク
+NOTIFICATION_SINK = os.getenv("NOTIFICATION_SINK", "log")
+NOTIFICATION_OUTBOX_DIR = Path(os.getenv("NOTIFICATION_OUTBOX_DIR", "notification_outbox"))
+NOTIFICATION_SMTP_HOST = os.getenv("NOTIFICATION_SMTP_HOST", "localhost")
+NOTIFICATION_SMTP_PORT = int(os.getenv("NOTIFICATION_SMTP_PORT", "1025"))
+NOTIFICATION_FROM = os.getenv("NOTIFICATION_FROM", "noreply@example.com")
+
+
+class NotificationDeliveryError(Exception):
+    """送信に失敗した宛先が残っている（ジョブをリトライさせる）"""
+
+
+# ── 送信先（シンク） ───────────────────────────────────
+
+class LogSink:
+    """ログ出力のみ（既定）"""
+    name = "log"
+
+    def send(self, recipient: str, subject: str, body: str):
+        logger.info("notification to <%s>: %s / %s", recipient, subject, body[:100])
+
+
+class FileSink:
+    """日付ごとの JSON Lines ファイルに追記"""
+    name = "file"
+
+    def __init__(self, directory: Path = NOTIFICATION_OUTBOX_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def send(self, recipient: str, subject: str, body: str):
+        now = datetime.utcnow()
+        line = json.dumps(
+            {"to": recipient, "subject": subject, "body": body, "sent_at": now.isoformat()},
+            ensure_ascii=False
+        )
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(self.directory / f"outbox-{now:%Y%m%d}.jsonl", "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+class SmtpSink:
+    """SMTP サーバーへ送信（開発用のデバッグサーバーを想定）"""
+    name = "smtp"
+
+    def __init__(self, host: str = NOTIFICATION_SMTP_HOST, port: int = NOTIFICATION_SMTP_PORT):
+        self.host = host
+        self.port = port
+
+    def send(self, recipient: str, subject: str, body: str):
+        message = EmailMessage()
+        message["From"] = NOTIFICATION_FROM
+        message["To"] = recipient
+        message["Subject"] = subject
+        message.set_content(body)
+        with smtplib.SMTP(self.host, self.port, timeout=10) as smtp:
+            smtp.send_message(message)
+
+
+SINKS: Dict[str, Callable[[], Any]] = {
+    "log": LogSink,
+    "file": FileSink,
+    "smtp": SmtpSink,
+}
+_sink = None
+_sink_lock = threading.Lock()
+
+
+def register_sink(name: str, factory: Callable[[], Any]):
+    """シンクを追加（NOTIFICATION_SINK で選択できる）"""
+    SINKS[name] = factory
+
+
+def get_sink():
+    """NOTIFICATION_SINK のシンク（プロセス内で共有）"""
+    global _sink
+    with _sink_lock:
+        if _sink is None:
+            if NOTIFICATION_SINK not in SINKS:
+                raise ValueError(f"未登録の通知シンクです: {NOTIFICATION_SINK}")
+            _sink = SINKS[NOTIFICATION_SINK]()
+        return _sink
+
+
+class RateLimiter:
+    """トークンバケットによる送信レートの制限（スレッド間で共有）"""
+
+    def __init__(self, rate_per_second: float):
+        self.rate = rate_per_second
+        self._tokens = max(rate_per_second, 1.0)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(max(self.rate, 1.0), self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+rate_limiter = RateLimiter(NOTIFICATION_RATE_PER_SECOND)
+
+
+# ── 通知の作成 ─────────────────────────────────────────
+
+def _enqueue_batches(db: Session, notification_id: str, delivery_ids: List[str]) -> int:
+    return enqueue_jobs(db, "notification_batch", [
+        {"notification_id": notification_id, "delivery_ids": delivery_ids[i:i + NOTIFICATION_BATCH_SIZE]}
+        for i in range(0, len(delivery_ids), NOTIFICATION_BATCH_SIZE)
+    ])
+
+
+def create_notification(
+    db: Session,
+    kind: str,
+    subject: str,
+    body: str,
+    user_ids: Iterable[str],
+    event_id: Optional[str] = None,
+    created_by: Optional[str] = None
+) -> Notification:
+    """通知と宛先を登録し、送信ジョブを登録（コミットは呼び出し元で行う）"""
+    user_ids = list(dict.fromkeys(user_ids))
+    now = datetime.utcnow()
+    notification = Notification(
+        id=str(uuid4()),
+        kind=kind,
+        subject=subject,
+        body=body,
+        event_id=event_id,
+        created_by=created_by,
+        recipient_count=len(user_ids),
+        created_at=now
+    )
+    db.add(notification)
+    db.flush()
+
+    rows = [
+        {
+            "id": str(uuid4()),
+            "notification_id": notification.id,
+            "user_id": user_id,
+            "status": DeliveryStatus.pending,
+            "attempts": 0,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for user_id in user_ids
+    ]
+    if rows:
+        db.execute(insert(NotificationDelivery), rows)
+        _enqueue_batches(db, notification.id, [row["id"] for row in rows])
+    return notification
+
+
+def notify_event(
+    db: Session,
+    event_id: str,
+    kind: str,
+    subject: str,
+    body: str,
+    created_by: Optional[str] = None
+) -> Notification:
+    """イベントの参加登録者全員への通知（コミットは呼び出し元で行う）"""
+    user_ids = db.execute(
+        select(EventRegistration.user_id).where(EventRegistration.event_id == event_id).distinct()
+    ).scalars().all()
+    return create_notification(db, kind, subject, body, user_ids, event_id=event_id, created_by=created_by)
+
+
+def delivery_counts(db: Session, notification_ids: List[str]) -> Dict[str, Dict[str, int]]:
+    """通知ごとのステータス別の宛先数"""
+    counts: Dict[str, Dict[str, int]] = {notification_id: {} for notification_id in notification_ids}
+    if not notification_ids:
+        return counts
+    rows = db.query(
+        NotificationDelivery.notification_id, NotificationDelivery.status, func.count(NotificationDelivery.id)
+    ).filter(
+        NotificationDelivery.notification_id.in_(notification_ids)
+    ).group_by(NotificationDelivery.notification_id, NotificationDelivery.status)
+    for notification_id, status, count in rows:
+        counts[notification_id][status.value] = count
+    return counts
+
+
+# ── 送信ジョブ ─────────────────────────────────────────
+
+@job_handler("notification_batch")
+def deliver_notification_batch(db: Session, payload: Dict[str, Any]):
+    """宛先のバッチへの送信
+
+    送信ごとにコミットして送信済みを確定するため、途中で失敗してリトライされても
+    送信済みの宛先には再送しない。
+    """
+    notification = db.get(Notification, payload["notification_id"])
+    if notification is None:
+        return
+    rows = db.query(NotificationDelivery, User.email).join(
+        User, User.id == NotificationDelivery.user_id
+    ).filter(
+        NotificationDelivery.id.in_(payload["delivery_ids"]),
+        NotificationDelivery.status != DeliveryStatus.sent
+    ).all()
+
+    sink = get_sink()
+    failed = 0
+    for delivery, email in rows:
+        rate_limiter.acquire()
+        delivery.attempts += 1
+        delivery.channel = sink.name
+        delivery.recipient = email
+        try:
+            sink.send(email, notification.subject, notification.body)
+        except Exception as e:
+            failed += 1
+            delivery.status = DeliveryStatus.failed
+            delivery.last_error = f"{type(e).__name__}: {e}"
+        else:
+            delivery.status = DeliveryStatus.sent
+            delivery.last_error = None
+            delivery.sent_at = datetime.utcnow()
+        delivery.updated_at = datetime.utcnow()
+        db.commit()
+
+    if failed:
+        raise NotificationDeliveryError(f"{len(rows)}件中{failed}件の送信に失敗しました")
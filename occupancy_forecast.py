@@ -0,0 +1,222 @@
+"""
+曜日×時間帯ごとの混雑予測
+
+entry_hourly_rollups を日単位で差分学習し、予測値を occupancy_forecasts に
+事前計算しておく。/entry/forecast はこのテーブルを読むだけで応答する。
+"""
+
+import asyncio
+import logging
+import math
+import os
+from datetime import datetime, date, timedelta
+from typing import Optional
+from uuid import uuid4
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from business_schedule import get_schedule
+from database import SessionLocal
+from db_control.models import EntryHourlyRollup, OccupancyForecast
+from entry_analytics import DAY_NAMES, sql_day_of_week, to_local
+
+logger = logging.getLogger(__name__)
+
+# 初回学習で遡る日数
+HISTORY_DAYS = int(os.getenv("FORECAST_HISTORY_DAYS", "56"))
+# 1日ごとの減衰率（古い実績ほど重みを下げる。0.98 で半減期は約34日）
+DAILY_DECAY = float(os.getenv("FORECAST_DAILY_DECAY", "0.98"))
+# バックグラウンド再学習の間隔（秒）
+RETRAIN_INTERVAL_SECONDS = int(os.getenv("FORECAST_RETRAIN_INTERVAL_SECONDS", "3600"))
+
+
+def _occupancy_from_entries(expected_entries: np.ndarray, average_stay_hours: np.ndarray) -> np.ndarray:
+    """時間帯別の入場数と平均滞在時間から在場者数を推定（曜日ごとに畳み込み）"""
+    occupancy = np.zeros_like(expected_entries)
+    for dow in range(7):
+        stay = average_stay_hours[dow]
+        if stay <= 0:
+            continue
+        # 入場から j 時間後にまだ在場している割合
+        offsets = np.arange(math.ceil(stay))
+        kernel = np.clip(stay - offsets, 0.0, 1.0)
+        occupancy[dow] = np.convolve(expected_entries[dow], kernel)[:24]
+    return occupancy
+
+
+def train_incremental(db: Session, today: Optional[date] = None) -> int:
+    """前回学習日の翌日から昨日までの集計を取り込み、予測値を更新する
+
+    戻り値は新たに学習した日数。
+    """
+    today = today or to_local(datetime.utcnow()).date()
+    end = today - timedelta(days=1)
+
+    rows = {
+        (r.day_of_week, r.hour_of_day): r
+        for r in db.query(OccupancyForecast).all()
+    }
+    trained_through = min(
+        (r.trained_through for r in rows.values() if r.trained_through), default=None
+    )
+    start = trained_through + timedelta(days=1) if trained_through else end - timedelta(days=HISTORY_DAYS - 1)
+    if start > end:
+        return 0
+
+    entries_sum = np.zeros((7, 24))
+    stays_sum = np.zeros((7, 24))
+    stay_seconds_sum = np.zeros((7, 24))
+    sample_days = np.zeros((7, 24))
+    for (dow, hour), r in rows.items():
+        entries_sum[dow, hour] = r.entries_sum
+        stays_sum[dow, hour] = r.completed_stays_sum
+        stay_seconds_sum[dow, hour] = r.stay_seconds_sum
+        sample_days[dow, hour] = r.sample_days
+
+    # 既存の累積値を経過日数分だけ減衰
+    days_added = (end - start).days + 1
+    decay = DAILY_DECAY ** days_added
+    entries_sum *= decay
+    stays_sum *= decay
+    stay_seconds_sum *= decay
+    sample_days *= decay
+
+    # 休業日は実績がないため学習対象から除外する（営業時間が未設定の曜日は対象にする）
+    schedule = get_schedule(db)
+    open_days = []
+    day = start
+    while day <= end:
+        day_hours = schedule.hours_for(day)
+        if day_hours.is_open or not day_hours.configured:
+            open_days.append(day)
+        day += timedelta(days=1)
+    if open_days:
+        # 新しい日ほど重みを大きくする（end の重みが 1）
+        day_weight = {day: DAILY_DECAY ** (end - day).days for day in open_days}
+        for day, weight in day_weight.items():
+            sample_days[sql_day_of_week(day)] += weight
+
+        rollups = db.query(
+            EntryHourlyRollup.bucket_date,
+            EntryHourlyRollup.day_of_week,
+            EntryHourlyRollup.hour_of_day,
+            EntryHourlyRollup.entries,
+            EntryHourlyRollup.completed_stays,
+            EntryHourlyRollup.total_stay_seconds
+        ).filter(
+            EntryHourlyRollup.bucket_date.between(start, end)
+        ).all()
+        rollups = [r for r in rollups if r[0] in day_weight]
+
+        if rollups:
+            weights = np.array([day_weight[r[0]] for r in rollups])
+            dows = np.array([r[1] for r in rollups])
+            hours = np.array([r[2] for r in rollups])
+            values = np.array([r[3:] for r in rollups], dtype=float) * weights[:, None]
+            np.add.at(entries_sum, (dows, hours), values[:, 0])
+            np.add.at(stays_sum, (dows, hours), values[:, 1])
+            np.add.at(stay_seconds_sum, (dows, hours), values[:, 2])
+
+    expected_entries = np.divide(
+        entries_sum, sample_days, out=np.zeros_like(entries_sum), where=sample_days > 0
+    )
+    # 平均滞在時間は曜日単位で算出（データがなければ全体平均）
+    stays_by_dow = stays_sum.sum(axis=1)
+    overall_stay = stay_seconds_sum.sum() / stays_sum.sum() / 3600 if stays_sum.sum() > 0 else 0.0
+    average_stay_hours = np.where(
+        stays_by_dow > 0,
+        stay_seconds_sum.sum(axis=1) / np.maximum(stays_by_dow, 1e-9) / 3600,
+        overall_stay
+    )
+    expected_occupancy = _occupancy_from_entries(expected_entries, average_stay_hours)
+
+    now = datetime.utcnow()
+    for dow in range(7):
+        for hour in range(24):
+            values = dict(
+                entries_sum=float(entries_sum[dow, hour]),
+                completed_stays_sum=float(stays_sum[dow, hour]),
+                stay_seconds_sum=float(stay_seconds_sum[dow, hour]),
+                sample_days=float(sample_days[dow, hour]),
+                expected_entries=round(float(expected_entries[dow, hour]), 2),
+                expected_occupancy=round(float(expected_occupancy[dow, hour]), 2),
+                trained_through=end,
+                trained_at=now,
+            )
+            row = rows.get((dow, hour))
+            if row is None:
+                db.add(OccupancyForecast(
+                    id=str(uuid4()), day_of_week=dow, hour_of_day=hour, **values
+                ))
+                continue
+            # 他のワーカーが先に同じ期間を学習していたら二重計上になるので中断
+            updated = db.query(OccupancyForecast).filter(
+                OccupancyForecast.id == row.id,
+                OccupancyForecast.trained_through == row.trained_through
+            ).update(values, synchronize_session=False)
+            if not updated:
+                db.rollback()
+                return 0
+
+    db.commit()
+    return days_added
+
+
+def get_forecast(db: Session, target_date: date) -> dict:
+    """指定日の時間帯別混雑予測を事前計算テーブルから取得"""
+    hours_info = get_schedule(db).hours_for(target_date)
+    dow = hours_info.day_of_week
+    is_open, open_time, close_time = hours_info.is_open, hours_info.open_time, hours_info.close_time
+
+    rows = db.query(OccupancyForecast).filter(
+        OccupancyForecast.day_of_week == dow
+    ).order_by(OccupancyForecast.hour_of_day).all()
+
+    open_hour = open_time.hour if open_time else 0
+    close_hour = (close_time.hour + (1 if close_time.minute else 0)) if close_time else 24
+
+    hours = []
+    for r in rows:
+        # 営業時間が未設定の曜日は時間帯で絞り込まない
+        in_business = (is_open and open_hour <= r.hour_of_day < close_hour) or not hours_info.configured
+        hours.append({
+            "hour": r.hour_of_day,
+            "expected_entries": r.expected_entries if in_business else 0.0,
+            "expected_occupancy": r.expected_occupancy if in_business else 0.0,
+        })
+
+    peak = max(hours, key=lambda h: h["expected_occupancy"], default=None)
+    return {
+        "date": target_date,
+        "day_of_week": dow,
+        "day_name": DAY_NAMES[dow],
+        "is_open": is_open,
+        "open_time": open_time.strftime("%H:%M") if open_time else None,
+        "close_time": close_time.strftime("%H:%M") if close_time else None,
+        "peak_hour": peak["hour"] if peak and peak["expected_occupancy"] > 0 else None,
+        "trained_at": rows[0].trained_at if rows else None,
+        "hours": hours,
+    }
+
+
+def _retrain_once() -> int:
+    db = SessionLocal()
+    try:
+        return train_incremental(db)
+    except Exception:
+        db.rollback()
+        logger.exception("occupancy forecast training failed")
+        return 0
+    finally:
+        db.close()
+
+
+async def run_retrain_loop():
+    """一定間隔で差分学習を行うバックグラウンドタスク"""
+    loop = asyncio.get_running_loop()
+    while True:
+        trained_days = await loop.run_in_executor(None, _retrain_once)
+        if trained_days:
+            logger.info("occupancy forecast trained with %d new day(s)", trained_days)
+        await asyncio.sleep(RETRAIN_INTERVAL_SECONDS)
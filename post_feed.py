@@ -0,0 +1,76 @@
+"""
+公開範囲を考慮した投稿フィード
+
+フィードに表示するのは承認済みの投稿と、閲覧者自身の審査待ちの投稿のみ。
+「承認済み」と「自分の審査待ち」を OR でまとめるとインデックスが使えないため、
+それぞれを (status, created_at, id) / (user_id, status, created_at) インデックスで
+新しい順に必要件数だけ取り出し、UNION ALL で結合してから並べ直す。
+却下・非表示の投稿がどれだけ増えても読む行数はページの件数分に収まる。
+"""
+
+from typing import List, Optional
+
+from sqlalchemy import select, union_all
+from sqlalchemy.orm import Session
+
+from db_control.models import Hashtag, Post, PostHashtag, PostStatus
+
+# フィードの1ページの最大件数
+MAX_FEED_PAGE_SIZE = 100
+
+
+def _branch(conditions, window: int):
+    return select(Post.id, Post.created_at).where(*conditions).order_by(
+        Post.created_at.desc(), Post.id.desc()
+    ).limit(window).subquery()
+
+
+def visible_post_ids(
+    db: Session,
+    viewer_id: Optional[str],
+    limit: int = 20,
+    offset: int = 0,
+    search: Optional[str] = None,
+    hashtag: Optional[str] = None
+) -> List[str]:
+    """閲覧者に表示できる投稿IDを新しい順に取得
+
+    viewer_id が None の場合（未ログイン）は承認済みのみ。
+    """
+    limit = max(1, min(limit, MAX_FEED_PAGE_SIZE))
+    # 各ブランチから offset + limit 件取れば結合後のページを必ず含む
+    window = offset + limit
+
+    filters = []
+    if search:
+        filters.append(Post.content.contains(search))
+    if hashtag:
+        filters.append(Post.id.in_(
+            select(PostHashtag.post_id).join(
+                Hashtag, Hashtag.id == PostHashtag.hashtag_id
+            ).where(Hashtag.tag == hashtag)
+        ))
+
+    branches = [_branch([Post.status == PostStatus.approved, *filters], window)]
+    if viewer_id:
+        branches.append(_branch(
+            [Post.user_id == viewer_id, Post.status == PostStatus.pending, *filters], window
+        ))
+
+    combined = union_all(*[select(b.c.id, b.c.created_at) for b in branches]).subquery()
+    rows = db.execute(
+        select(combined.c.id).order_by(
+            combined.c.created_at.desc(), combined.c.id.desc()
+        ).offset(offset).limit(limit)
+    ).all()
+    return [row.id for row in rows]
+
+
+def visible_posts(db: Session, viewer_id: Optional[str], **kwargs) -> List[Post]:
+    """visible_post_ids() の投稿を同じ順序で取得"""
+    ids = visible_post_ids(db, viewer_id, **kwargs)
+    if not ids:
+        return []
+    posts = {p.id: p for p in db.query(Post).filter(Post.id.in_(ids))}
+    return [posts[post_id] for post_id in ids if post_id in posts]
+
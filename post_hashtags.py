@@ -0,0 +1,57 @@
+"""
+投稿のハッシュタグの登録・関連付け
+
+投稿作成時に同じトランザクションで呼び、作成直後の応答や一覧にハッシュタグが含まれるようにする。
+"""
+
+import re
+from typing import List, Optional
+from uuid import uuid4
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from db_control.models import Hashtag, PostHashtag
+
+
+def parse_hashtags(hashtags: Optional[str]) -> List[str]:
+    """カンマ区切りまたはスペース区切りのハッシュタグを重複なしのタグ名のリストに変換"""
+    tag_names = []
+    for tag_str in re.split(r'[,\s]+', hashtags or ""):
+        tag_name = tag_str.lstrip('#').strip()
+        if tag_name and tag_name not in tag_names:
+            tag_names.append(tag_name)
+    return tag_names
+
+
+def link_hashtags(db: Session, post_id: str, hashtags: Optional[str]):
+    """投稿のハッシュタグを登録・関連付け（コミットは呼び出し元で行う）
+
+    既存のハッシュタグは1クエリで取得し、未登録のものだけ追加する。別のリクエストが同時に
+    同じハッシュタグを追加した場合はそちらを使う。既に関連付け済みのハッシュタグは追加しない。
+    """
+    tag_names = parse_hashtags(hashtags)
+    if not tag_names:
+        return
+
+    hashtags_by_name = {h.tag: h for h in db.query(Hashtag).filter(Hashtag.tag.in_(tag_names))}
+    for tag_name in tag_names:
+        if tag_name in hashtags_by_name:
+            continue
+        hashtag = Hashtag(id=str(uuid4()), tag=tag_name)
+        try:
+            with db.begin_nested():
+                db.add(hashtag)
+        except IntegrityError:
+            hashtag = db.query(Hashtag).filter(Hashtag.tag == tag_name).one()
+        hashtags_by_name[tag_name] = hashtag
+
+    linked = {
+        hashtag_id for (hashtag_id,) in
+        db.query(PostHashtag.hashtag_id).filter(PostHashtag.post_id == post_id)
+    }
+    for tag_name in tag_names:
+        hashtag_id = hashtags_by_name[tag_name].id
+        if hashtag_id not in linked:
+            db.add(PostHashtag(id=str(uuid4()), post_id=post_id, hashtag_id=hashtag_id))
+            linked.add(hashtag_id)
@@ -0,0 +1,147 @@
+"""
+読み取り中心の公開 API のレスポンスキャッシュ
+
+お知らせ一覧・タグ一覧のように全員に同じ内容を返し、更新の少ない API のレスポンスを
+シリアライズ済みのバイト列と ETag のままプロセス内に保持する。キャッシュがあればリクエストは
+DB にアクセスせず、If-None-Match が一致すれば本文なしの 304 を返す。
+
+更新処理は invalidate() を同じトランザクションで呼ぶ。cache_versions の世代番号を進め、
+コミット時に自プロセスのキャッシュを破棄する。他のワーカーは世代番号をポーリングして
+古くなったキャッシュを破棄する（最大 RESPONSE_CACHE_POLL_SECONDS 秒の遅れ）。
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+from fastapi import Request, Response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from cache_versions import bump_version, get_version, get_versions
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# 他ワーカーの更新を検知するポーリング間隔（秒）
+RESPONSE_CACHE_POLL_SECONDS = float(os.getenv("RESPONSE_CACHE_POLL_SECONDS", "5"))
+# クライアントには毎回 ETag で再検証させる
+CACHE_CONTROL = "public, no-cache"
+
+# コミット時に破棄するキャッシュ名（Session.info のキー）
+_INVALIDATE_KEY = "response_cache_invalidate"
+
+
+@dataclass(frozen=True)
+class _Entry:
+    version: int
+    body: bytes
+    etag: str
+
+
+_entries: Dict[str, _Entry] = {}
+_lock = threading.Lock()
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # 弱い比較（W/ の有無を区別しない）
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def _respond(request: Request, entry: _Entry, media_type: str) -> Response:
+    headers = {"ETag": entry.etag, "Cache-Control": CACHE_CONTROL}
+    if _matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type=media_type, headers=headers)
+
+
+def cached_response(
+    request: Request,
+    db: Session,
+    name: str,
+    render: Callable[[], bytes],
+    media_type: str = "application/json"
+) -> Response:
+    """name のキャッシュからレスポンスを返す（なければ render() で作成して保持）"""
+    with _lock:
+        entry = _entries.get(name)
+    if entry is None:
+        # 世代番号を先に読む（作成中に更新されても次のポーリングで破棄される）
+        version = get_version(db, name)
+        body = render()
+        entry = _Entry(version=version, body=body, etag=_etag(body))
+        with _lock:
+            current = _entries.get(name)
+            if current is None or current.version <= version:
+                _entries[name] = entry
+    return _respond(request, entry, media_type)
+
+
+def invalidate(db: Session, *names: str):
+    """キャッシュを無効化（更新と同じトランザクションで呼ぶ。コミット時に自プロセスのキャッシュも破棄）"""
+    for name in names:
+        bump_version(db, name)
+    db.info.setdefault(_INVALIDATE_KEY, set()).update(names)
+
+
+def drop(*names: str):
+    """自プロセスのキャッシュを破棄"""
+    with _lock:
+        for name in names:
+            _entries.pop(name, None)
+
+
+@event.listens_for(Session, "after_commit")
+def _drop_after_commit(session: Session):
+    names = session.info.pop(_INVALIDATE_KEY, None)
+    if names:
+        drop(*names)
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_after_rollback(session: Session):
+    session.info.pop(_INVALIDATE_KEY, None)
+
+
+def drop_stale(db: Session) -> int:
+    """DB 上の世代番号が進んだキャッシュを破棄（戻り値は破棄した数）"""
+    with _lock:
+        cached = {name: entry.version for name, entry in _entries.items()}
+    if not cached:
+        return 0
+    versions = get_versions(db, cached)
+    stale = [name for name, version in cached.items() if versions[name] != version]
+    drop(*stale)
+    return len(stale)
+
+
+def _poll_once() -> int:
+    db = SessionLocal()
+    try:
+        return drop_stale(db)
+    except Exception:
+        logger.exception("response cache version poll failed")
+        return 0
+    finally:
+        db.close()
+
+
+async def run_response_cache_poll_loop():
+    """他ワーカーでの更新を検知してキャッシュを破棄するバックグラウンドタスク"""
+    loop = asyncio.get_running_loop()
+    while True:
+        dropped = await loop.run_in_executor(None, _poll_once)
+        if dropped:
+            logger.info("dropped %d stale response cache entries", dropped)
+        await asyncio.sleep(RESPONSE_CACHE_POLL_SECONDS)
@@ -71,6 +71,12 @@ class AdminUserUpdateRequest(BaseModel):
     is_active: Optional[bool] = None
 
 # 申請管理
+class DuplicateCandidate(BaseModel):
+    kind: str                      # user / application
+    id: str
+    status: Optional[str] = None   # kind=application の場合の申請ステータス
+    reasons: List[str]             # 一致した項目（email / phone / address / dog）
+
 class ApplicationResponse(BaseModel):
     id: str
     user_id: Optional[str] = None
@@ -88,16 +94,43 @@ class ApplicationResponse(BaseModel):
     approved_by: Optional[str] = None
     approved_at: Optional[datetime] = None
     rejection_reason: Optional[str] = None
+    duplicate_candidates: List[DuplicateCandidate] = []
     created_at: datetime
     updated_at: datetime
 
     class Config:
         from_attributes = True
 
+class ApplicationListResponse(BaseModel):
+    items: List[ApplicationResponse]
+    next_cursor: Optional[str] = None  # 次のページがない場合は None
+
 class ApplicationUpdateRequest(BaseModel):
     admin_notes: Optional[str] = None
     rejection_reason: Optional[str] = None
 
+class ApplicationReviewItem(BaseModel):
+    application_id: str
+    decision: str  # approve, reject
+    admin_notes: Optional[str] = None
+    rejection_reason: Optional[str] = None
+
+class ApplicationBulkReviewRequest(BaseModel):
+    items: List[ApplicationReviewItem]
+
+class ApplicationReviewResult(BaseModel):
+    application_id: str
+    decision: str
+    success: bool
+    message: str
+    user_id: Optional[str] = None  # 承認でユーザーを作成した場合
+
+class ApplicationBulkReviewResponse(BaseModel):
+    approved: int
+    rejected: int
+    failed: int
+    results: List[ApplicationReviewResult]
+
 # 新規申請作成（ユーザー登録申請）
 class ApplicationCreateRequest(BaseModel):
     # ユーザー情報
@@ -147,6 +180,82 @@ class AdminLogResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class AdminLogListResponse(BaseModel):
+    items: List[AdminLogResponse]
+    next_cursor: Optional[str] = None  # 次のページがない場合は None
+
+class AuditLogStatsResponse(BaseModel):
+    queued: int  # 書き込み待ちの件数
+    enqueued: int
+    written: int
+    dropped: int  # キュー満杯で破棄した件数
+    failed: int  # 書き込みに失敗した件数
+    batches: int
+    running: bool
+    last_flush_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+
+# ジョブキュー
+class JobResponse(BaseModel):
+    id: str
+    job_type: str
+    payload: Optional[str] = None  # JSON
+    status: str  # pending / running / succeeded / dead
+    attempts: int
+    max_attempts: int
+    run_at: datetime
+    last_error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+
+class JobStatsResponse(BaseModel):
+    counts: Dict[str, Dict[str, int]]  # ジョブ種別 → ステータス → 件数
+    workers: int
+    running: bool
+    job_types: List[str]
+
+class NotificationResponse(BaseModel):
+    id: str
+    kind: str
+    subject: str
+    body: str
+    event_id: Optional[str] = None
+    created_by: Optional[str] = None
+    recipient_count: int
+    delivery_counts: Dict[str, int]  # ステータス → 宛先数
+    created_at: datetime
+
+class NotificationDeliveryResponse(BaseModel):
+    id: str
+    user_id: str
+    user_name: str
+    channel: Optional[str] = None
+    recipient: Optional[str] = None
+    status: str  # pending / sent / failed
+    attempts: int
+    last_error: Optional[str] = None
+    sent_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class UploadGcResultResponse(BaseModel):
+    dry_run: bool
+    grace_hours: float
+    scanned: int
+    recent: int  # 猶予期間内のため残したファイル数
+    referenced: int
+    deleted: int  # dry_run の場合は削除対象の件数
+    deleted_bytes: int
+    failed: int
+    queries: int
+    started_at: datetime
+    elapsed_seconds: float
+    files_per_second: float
+
+class UploadGcResponse(BaseModel):
+    result: Optional[UploadGcResultResponse] = None  # 同期実行した場合・直近の実行結果
+    job_id: Optional[str] = None  # バックグラウンド実行の場合
+
 # 投稿管理
 class PostManagementResponse(BaseModel):
     id: str
@@ -167,6 +276,71 @@ class PostStatusUpdateRequest(BaseModel):
     status: PostStatus
     admin_notes: Optional[str] = None
 
+class ModerationQueueItem(BaseModel):
+    id: str
+    user_id: str
+    user_name: str
+    content: Optional[str] = None
+    status: PostStatus
+    claimed_by: Optional[str] = None
+    claim_expires_at: Optional[datetime] = None
+    created_at: datetime
+
+class ModerationQueueResponse(BaseModel):
+    items: List[ModerationQueueItem]
+    next_cursor: Optional[str] = None  # 次のページがない場合は None
+
+class ModerationClaimRequest(BaseModel):
+    status: PostStatus = PostStatus.pending
+    limit: int = 20
+
+class ModerationClaimResponse(BaseModel):
+    items: List[ModerationQueueItem]
+    claim_expires_at: datetime
+
+class ModerationReleaseRequest(BaseModel):
+    post_ids: Optional[List[str]] = None  # 省略時は確保中のすべて
+
+class PostReportResponse(BaseModel):
+    id: str
+    post_id: str
+    user_id: str
+    user_name: str
+    reason: str
+    comment: Optional[str] = None
+    created_at: datetime
+
+class PostReportListResponse(BaseModel):
+    post_id: str
+    status: PostStatus
+    report_count: int
+    reports: List[PostReportResponse]
+
+class ReportedPostResponse(BaseModel):
+    id: str
+    user_id: str
+    content: Optional[str] = None
+    status: PostStatus
+    report_count: int
+    created_at: datetime
+
+class PostBulkModerationRequest(BaseModel):
+    post_ids: List[str]
+    action: str  # status, hide, show, delete
+    status: Optional[PostStatus] = None  # action=status の場合に指定
+    admin_notes: Optional[str] = None  # action=status の場合のみ保存
+
+class PostModerationResult(BaseModel):
+    post_id: str
+    success: bool
+    message: str
+
+class PostBulkModerationResponse(BaseModel):
+    action: str
+    succeeded: int
+    failed: int
+    results: List[PostModerationResult]
+
 # ユーザー管理（拡張）
 class UserStatsResponse(BaseModel):
     total_users: int
@@ -249,7 +423,7 @@ class EventRegistrationResponse(BaseModel):
     event_id: str
     dog_id: Optional[str] = None
     dog_name: Optional[str] = None
-    registered_at: datetime
+    registered_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
@@ -334,6 +508,26 @@ class SpecialHolidayUpdateRequest(BaseModel):
     close_time: Optional[str] = None
     note: Optional[str] = None
 
+class BusinessHourBulkItem(BaseModel):
+    day_of_week: int  # 0:日曜, 1:月曜, ..., 6:土曜
+    is_open: bool
+    open_time: Optional[str] = None
+    close_time: Optional[str] = None
+    special_note: Optional[str] = None
+
+class BusinessHourBulkUpdateRequest(BaseModel):
+    days: List[BusinessHourBulkItem]
+
+class SpecialHolidayBulkRequest(BaseModel):
+    holidays: List[SpecialHolidayCreateRequest]
+    overwrite: bool = True  # False の場合、登録済みの日付はスキップ
+
+class SpecialHolidayBulkResponse(BaseModel):
+    message: str
+    created: int
+    updated: int
+    skipped: List[date] = []
+
 class TodayBusinessHoursResponse(BaseModel):
     date: date
     day_of_week: int
@@ -345,6 +539,12 @@ class TodayBusinessHoursResponse(BaseModel):
     is_holiday: bool
     holiday_name: Optional[str] = None
 
+class BusinessStatusResponse(BaseModel):
+    now: datetime  # 現地時刻
+    is_open_now: bool
+    today: TodayBusinessHoursResponse
+    next_opening: Optional[datetime] = None  # 営業中の場合は現在時刻
+
 # 設定管理
 class SystemSettingResponse(BaseModel):
     id: str
@@ -373,8 +573,47 @@ class SystemSettingsBackupResponse(BaseModel):
     settings_count: int
     file_path: str
 
+class SettingsSnapshotResponse(BaseModel):
+    snapshot_id: str
+    created_at: datetime
+    label: str  # manual, pre_restore
+    admin_id: Optional[str] = None
+    content_hash: str
+    file_name: str
+    settings_count: int
+    size_bytes: int
+
+class SettingsSnapshotDiffResponse(BaseModel):
+    from_id: str
+    to_id: Optional[str] = None  # None の場合は現在の設定との比較
+    added: List[str]
+    removed: List[str]
+    changed: List[str]
+
+class SettingsSnapshotRestoreResponse(BaseModel):
+    message: str
+    snapshot_id: str
+    pre_restore_snapshot_id: str
+    changed_keys: List[str]
+    extra_keys: List[str]  # スナップショットに含まれない現在の設定（変更しない）
+
 class SystemSettingsImportRequest(BaseModel):
     settings: dict
+    dry_run: bool = False  # True の場合は差分の確認のみで反映しない
+
+class SettingChangeResponse(BaseModel):
+    key: str
+    old_value: Optional[str] = None
+    new_value: Optional[str] = None
+
+class SystemSettingsImportResponse(BaseModel):
+    message: str
+    dry_run: bool
+    updated_count: int
+    changes: List[SettingChangeResponse]
+    unchanged: List[str]
+    unknown_keys: List[str]
+    errors: Dict[str, str]
 
 # 統計情報
 class DashboardStatsResponse(BaseModel):
@@ -580,6 +819,10 @@ class PostDetailResponse(BaseModel):
 class CreateCommentDbRequest(BaseModel):
     content: str
 
+class PostReportRequest(BaseModel):
+    reason: str  # spam, inappropriate, harassment, other
+    comment: Optional[str] = None
+
 class CommentDbResponse(BaseModel):
     id: str
     post_id: str
@@ -636,11 +879,30 @@ class EventParticipantResponse(BaseModel):
     user_name: str
     dog_id: Optional[str] = None
     dog_name: Optional[str] = None
-    registered_at: datetime
+    registered_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
 
+class EventCapacityResponse(BaseModel):
+    capacity: int  # 0 の場合は定員なし
+    registered: int
+    remaining: Optional[int] = None  # 定員なしの場合は None
+    is_full: bool
+
+class EventViewDog(BaseModel):
+    id: str
+    name: str
+    breed: Optional[str] = None
+    avatar_url: Optional[str] = None
+    is_registered: bool  # このイベントに登録済みか
+
+class EventViewResponse(BaseModel):
+    event: EventDetailResponse
+    capacity: EventCapacityResponse
+    participants: List[EventParticipantResponse]
+    my_dogs: List[EventViewDog]  # 閲覧者が参加登録できる犬
+
 # ==== 入場管理スキーマ ====
 class QRCodeResponse(BaseModel):
     qr_code: str  # Base64エンコードされたQRコード画像
@@ -677,6 +939,93 @@ class EntryHistoryResponse(BaseModel):
     class Config:
         from_attributes = True
 
+# カレンダー
+class CalendarDayResponse(BaseModel):
+    date: date
+    day_of_week: int  # 0:日曜, 1:月曜, ..., 6:土曜
+    is_open: bool
+    open_time: Optional[str] = None
+    close_time: Optional[str] = None
+    is_holiday: bool = False
+    holiday_name: Optional[str] = None
+    note: Optional[str] = None
+    event_count: int = 0
+    remaining_capacity: Optional[int] = None  # 受付中イベントの残り枠合計
+
+class CalendarMonthResponse(BaseModel):
+    year: int
+    month: int
+    days: List[CalendarDayResponse] = []
+
+# 入退場分析（集計テーブルから算出）
+class HourlyVisitStats(BaseModel):
+    hour: int  # 0-23（現地時刻）
+    entries: int
+    unique_visitors: int
+    average_stay_minutes: Optional[float] = None
+
+class WeekdayVisitStats(BaseModel):
+    day_of_week: int  # 0:日曜, 1:月曜, ..., 6:土曜
+    day_name: str
+    average_entries: float
+    average_stay_minutes: Optional[float] = None
+
+class DailyVisitStats(BaseModel):
+    date: date
+    entries: int
+    exits: int
+    unique_visitors: int
+    average_stay_minutes: Optional[float] = None
+
+class EntryAnalyticsResponse(BaseModel):
+    start_date: date
+    end_date: date
+    total_entries: int
+    total_exits: int
+    total_unique_visitors: int
+    average_stay_minutes: Optional[float] = None
+    busiest_hours: List[HourlyVisitStats] = []  # 入場数の多い順
+    weekday_stats: List[WeekdayVisitStats] = []
+    daily: List[DailyVisitStats] = []
+
+# 混雑予測
+class HourlyForecast(BaseModel):
+    hour: int  # 0-23（現地時刻）
+    expected_entries: float
+    expected_occupancy: float  # 予想在場者数
+
+class OccupancyForecastResponse(BaseModel):
+    date: date
+    day_of_week: int
+    day_name: str
+    is_open: bool
+    open_time: Optional[str] = None
+    close_time: Optional[str] = None
+    peak_hour: Optional[int] = None
+    trained_at: Optional[datetime] = None
+    hours: List[HourlyForecast] = []
+
+class NoticeInboxItem(BaseModel):
+    id: str
+    title: str
+    content: Optional[str] = None
+    category: Optional[str] = None
+    priority: Optional[NoticePriority] = None
+    delivered_at: datetime
+    read_at: Optional[datetime] = None
+    is_read: bool
+
+class NoticeInboxResponse(BaseModel):
+    items: List[NoticeInboxItem]
+    next_cursor: Optional[str] = None  # 次のページがない場合は None
+    unread_count: int
+
+class NoticeUnreadCountResponse(BaseModel):
+    unread_count: int
+
+class TagCreateRequest(BaseModel):
+    label: str
+
 class TagResponse(BaseModel):
     id: str
     label: str
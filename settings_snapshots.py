@@ -0,0 +1,253 @@
+"""
+システム設定のスナップショット
+
+設定一式を gzip 圧縮した JSON として内容ハッシュ名で保存し、manifest.json に
+スナップショットの一覧とキーごとのハッシュを記録する。一覧・差分は manifest のみで
+計算し、スナップショット本体を読むのは復元時だけ。同じ内容のスナップショットは
+ファイルを共有し、保持件数を超えた古いものは自動で削除する。
+
+manifest の読み書きとファイルの削除は、同じディレクトリを使う複数のワーカープロセス間で
+ロックファイル（SETTINGS_SNAPSHOT_DIR/.lock）により排他する。
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+from sqlalchemy.orm import Session
+
+from database import upsert_rows
+from db_control.models import SystemSetting
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+SNAPSHOT_DIR = Path(os.getenv("SETTINGS_SNAPSHOT_DIR", "backups/snapshots"))
+MANIFEST_PATH = SNAPSHOT_DIR / "manifest.json"
+LOCK_PATH = SNAPSHOT_DIR / ".lock"
+# 保持するスナップショットの件数
+SNAPSHOT_RETENTION = int(os.getenv("SETTINGS_SNAPSHOT_RETENTION", "30"))
+
+_lock = threading.Lock()
+
+
+@contextmanager
+def _locked():
+    """プロセス内のスレッド間と、他のワーカープロセスとの間で manifest の操作を排他する"""
+    with _lock:
+        SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+        with open(LOCK_PATH, "a+b") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class SnapshotNotFoundError(Exception):
+    """指定IDのスナップショットが manifest にない"""
+
+
+class SnapshotCorruptedError(Exception):
+    """スナップショット本体が見つからない、または内容ハッシュが一致しない"""
+
+
+def _serialize(setting: SystemSetting) -> Dict[str, Any]:
+    return {
+        "key": setting.setting_key,
+        "value": setting.setting_value,
+        "type": setting.setting_type,
+        "category": setting.category,
+        "description": setting.description,
+        "is_public": bool(setting.is_public),
+    }
+
+
+def _canonical(data: Any) -> bytes:
+    return json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def _key_hash(row: Dict[str, Any]) -> str:
+    return hashlib.sha256(_canonical(row)).hexdigest()[:16]
+
+
+def _current_rows(db: Session) -> List[Dict[str, Any]]:
+    settings = db.query(SystemSetting).order_by(SystemSetting.setting_key).all()
+    return [_serialize(s) for s in settings]
+
+
+def _read_manifest() -> List[Dict[str, Any]]:
+    if not MANIFEST_PATH.exists():
+        return []
+    with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)["snapshots"]
+
+
+def _write_manifest(entries: List[Dict[str, Any]]):
+    # 書き込み途中のファイルを読まれないよう一時ファイルから置き換える
+    tmp_path = MANIFEST_PATH.with_suffix(".json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"snapshots": entries}, f, ensure_ascii=False)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+
+def _prune(entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """保持件数を超えた古いエントリを除き、参照されなくなったファイルを削除"""
+    kept = entries[-SNAPSHOT_RETENTION:] if SNAPSHOT_RETENTION > 0 else entries
+    referenced = {e["file_name"] for e in kept}
+    for e in entries[:len(entries) - len(kept)]:
+        if e["file_name"] not in referenced:
+            (SNAPSHOT_DIR / e["file_name"]).unlink(missing_ok=True)
+            referenced.add(e["file_name"])
+    return kept
+
+
+def _summary(entry: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in entry.items() if k != "key_hashes"}
+
+
+def create_snapshot(db: Session, admin_id: Optional[str], label: str = "manual") -> Dict[str, Any]:
+    """現在の設定をスナップショットとして保存（同じ内容ならファイルを再利用）"""
+    rows = _current_rows(db)
+    payload = _canonical(rows)
+    content_hash = hashlib.sha256(payload).hexdigest()
+    file_name = f"{content_hash[:16]}.json.gz"
+
+    with _locked():
+        file_path = SNAPSHOT_DIR / file_name
+        if not file_path.exists():
+            tmp_path = file_path.with_suffix(".tmp")
+            with gzip.open(tmp_path, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, file_path)
+
+        entry = {
+            "snapshot_id": str(uuid4()),
+            "created_at": datetime.utcnow().isoformat(),
+            "label": label,
+            "admin_id": admin_id,
+            "content_hash": content_hash,
+            "file_name": file_name,
+            "settings_count": len(rows),
+            "size_bytes": file_path.stat().st_size,
+            "key_hashes": {row["key"]: _key_hash(row) for row in rows},
+        }
+        entries = _prune(_read_manifest() + [entry])
+        _write_manifest(entries)
+    return _summary(entry)
+
+
+def list_snapshots() -> List[Dict[str, Any]]:
+    """スナップショット一覧（新しい順、manifest のみ参照）"""
+    with _locked():
+        entries = _read_manifest()
+    return [_summary(e) for e in reversed(entries)]
+
+
+def _find_entry(entries: List[Dict[str, Any]], snapshot_id: str) -> Dict[str, Any]:
+    for e in entries:
+        if e["snapshot_id"] == snapshot_id:
+            return e
+    raise SnapshotNotFoundError(snapshot_id)
+
+
+def _get_entry(snapshot_id: str) -> Dict[str, Any]:
+    with _locked():
+        entries = _read_manifest()
+    return _find_entry(entries, snapshot_id)
+
+
+def _diff_hashes(old: Dict[str, str], new: Dict[str, str]) -> Dict[str, List[str]]:
+    return {
+        "added": sorted(new.keys() - old.keys()),
+        "removed": sorted(old.keys() - new.keys()),
+        "changed": sorted(k for k in old.keys() & new.keys() if old[k] != new[k]),
+    }
+
+
+def diff_snapshots(db: Session, from_id: str, to_id: Optional[str] = None) -> Dict[str, Any]:
+    """2つのスナップショット（to_id 省略時は現在の設定）のキー単位の差分"""
+    old = _get_entry(from_id)["key_hashes"]
+    if to_id:
+        new = _get_entry(to_id)["key_hashes"]
+    else:
+        new = {row["key"]: _key_hash(row) for row in _current_rows(db)}
+    return {"from_id": from_id, "to_id": to_id, **_diff_hashes(old, new)}
+
+
+def load_snapshot(snapshot_id: str) -> List[Dict[str, Any]]:
+    """スナップショット本体を読み込み、内容ハッシュを検証"""
+    # 読み込み中に他のプロセスの保持件数超過による削除が走らないよう、ロックしたまま読む
+    with _locked():
+        entry = _find_entry(_read_manifest(), snapshot_id)
+        file_path = SNAPSHOT_DIR / entry["file_name"]
+        if not file_path.exists():
+            raise SnapshotCorruptedError(f"{entry['file_name']} が見つかりません")
+        with gzip.open(file_path, "rb") as f:
+            payload = f.read()
+    if hashlib.sha256(payload).hexdigest() != entry["content_hash"]:
+        raise SnapshotCorruptedError(f"{entry['file_name']} の内容ハッシュが一致しません")
+    return json.loads(payload)
+
+
+def restore_snapshot(
+    db: Session,
+    snapshot_id: str,
+    rows: Optional[List[Dict[str, Any]]] = None
+) -> Dict[str, Any]:
+    """スナップショットの内容を1文のUPSERTで復元（コミットは呼び出し元で行う）
+
+    変更のあったキーのみ書き込む。スナップショットにないキーは削除せず extra_keys として返す。
+    rows に load_snapshot() で読み込み済みの内容を渡した場合はファイルを読み直さない。
+    """
+    if rows is None:
+        rows = load_snapshot(snapshot_id)
+    existing = {s.setting_key: s for s in db.query(SystemSetting).all()}
+    now = datetime.utcnow()
+
+    changed = []
+    for row in rows:
+        current = existing.get(row["key"])
+        if current is not None and _key_hash(_serialize(current)) == _key_hash(row):
+            continue
+        changed.append({
+            "id": current.id if current else str(uuid4()),
+            "setting_key": row["key"],
+            "setting_value": row["value"],
+            "setting_type": row["type"],
+            "category": row["category"],
+            "description": row["description"],
+            "is_public": row["is_public"],
+            "created_at": current.created_at if current else now,
+            "updated_at": now,
+        })
+
+    upsert_rows(
+        db, SystemSetting.__table__, changed,
+        key_columns=["setting_key"],
+        update_columns=["setting_value", "setting_type", "category", "description", "is_public", "updated_at"]
+    )
+    snapshot_keys = {row["key"] for row in rows}
+    return {
+        "snapshot_id": snapshot_id,
+        "changed_keys": sorted(r["setting_key"] for r in changed),
+        "extra_keys": sorted(existing.keys() - snapshot_keys),
+    }
@@ -0,0 +1,252 @@
+"""
+型付きシステム設定ストア
+
+system_settings の全行をプロセス起動時に一度読み込み、setting_type に従って
+型変換した値をメモリ上に保持する。get_setting() は辞書参照のみで DB にはアクセスしない。
+
+設定を更新する処理は bump_settings_version() を同じトランザクションで呼び、
+コミット後に reload_settings() で自プロセスのキャッシュを更新する。
+他のワーカーは cache_versions の世代番号をポーリングして変更を検知し、再読み込みする。
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from cache_versions import bump_version, get_version
+from database import SessionLocal
+from db_control.models import SystemSetting
+
+logger = logging.getLogger(__name__)
+
+# cache_versions 上の名前
+VERSION_NAME = "system_settings"
+# 他ワーカーの更新を検知するポーリング間隔（秒）
+SETTINGS_POLL_SECONDS = float(os.getenv("SETTINGS_POLL_SECONDS", "5"))
+
+
+@dataclass(frozen=True)
+class SettingDefinition:
+    """アプリが参照する設定の型と既定値（DBに行がない場合に使用）"""
+    key: str
+    setting_type: str
+    default: Any
+    category: str
+    description: str
+
+
+# アプリのコードから参照する設定
+REGISTRY: Dict[str, SettingDefinition] = {
+    d.key: d for d in [
+        SettingDefinition("site_name", "string", "里山ドッグラン", "general", "サイト名"),
+        SettingDefinition("max_dogs_per_user", "number", 5, "general", "ユーザーあたりの最大登録犬数"),
+        SettingDefinition("max_dogs_in_park", "number", 20, "general", "同時入場可能な最大犬数"),
+        SettingDefinition("reservation_required", "boolean", False, "general", "事前予約の必須化"),
+        SettingDefinition("maintenance_mode", "boolean", False, "maintenance", "メンテナンスモード"),
+        SettingDefinition(
+            "maintenance_message", "string", "システムメンテナンス中です。しばらくお待ちください。",
+            "maintenance", "メンテナンス時の表示メッセージ"
+        ),
+        SettingDefinition("enable_email_notifications", "boolean", True, "notification", "メール通知の有効化"),
+        SettingDefinition(
+            "post_report_auto_hide_threshold", "number", 3, "moderation",
+            "この件数の通報で投稿を自動的に非表示（reported）にする（0で無効）"
+        ),
+    ]
+}
+
+
+def coerce_setting_value(setting_type: Optional[str], raw: Optional[str]) -> Any:
+    """文字列の設定値を setting_type に従って変換（不正な値は ValueError）"""
+    if raw is None:
+        return None
+    if setting_type == "number":
+        try:
+            return int(raw)
+        except ValueError:
+            raise ValueError("数値を入力してください")
+    if setting_type == "boolean":
+        if raw.lower() not in ["true", "false"]:
+            raise ValueError("true または false を入力してください")
+        return raw.lower() == "true"
+    if setting_type == "json":
+        try:
+            return json.loads(raw)
+        except ValueError:
+            raise ValueError("JSON形式で入力してください")
+    return raw
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    version: int
+    values: Dict[str, Any]
+
+
+_snapshot: Optional[_Snapshot] = None
+_lock = threading.Lock()
+
+
+def _build_snapshot(db: Session) -> _Snapshot:
+    # 世代番号を先に読む（行の読み込み中に更新されても次のポーリングで再読み込みされる）
+    version = get_version(db, VERSION_NAME)
+    values = {key: d.default for key, d in REGISTRY.items()}
+    for s in db.query(SystemSetting).all():
+        definition = REGISTRY.get(s.setting_key)
+        setting_type = s.setting_type or (definition.setting_type if definition else None)
+        try:
+            values[s.setting_key] = coerce_setting_value(setting_type, s.setting_value)
+        except ValueError:
+            # 不正な値が保存されていても起動は継続し、既定値を使う
+            logger.warning("invalid value for setting %s: %r", s.setting_key, s.setting_value)
+    return _Snapshot(version=version, values=values)
+
+
+def reload_settings(db: Session):
+    """DBから設定を読み込み直す（設定更新のコミット後に呼ぶ）"""
+    global _snapshot
+    snapshot = _build_snapshot(db)
+    with _lock:
+        # 並行して新しい世代を読み込んでいた場合は古いもので上書きしない
+        if _snapshot is None or snapshot.version >= _snapshot.version:
+            _snapshot = snapshot
+
+
+def load_settings():
+    """設定を読み込む（失敗した場合は既定値で継続し、ポーリングで再試行する）"""
+    global _snapshot
+    db = SessionLocal()
+    try:
+        reload_settings(db)
+    except Exception:
+        logger.exception("system settings load failed, using defaults")
+        with _lock:
+            if _snapshot is None:
+                _snapshot = _Snapshot(
+                    version=-1, values={key: d.default for key, d in REGISTRY.items()}
+                )
+    finally:
+        db.close()
+
+
+def _current() -> _Snapshot:
+    if _snapshot is None:
+        load_settings()
+    return _snapshot
+
+
+def get_setting(key: str, default: Any = None) -> Any:
+    """型変換済みの設定値を取得（DBアクセスなし）"""
+    return _current().values.get(key, default)
+
+
+def settings_version() -> int:
+    """現在読み込んでいる設定の世代番号"""
+    return _current().version
+
+
+def bump_settings_version(db: Session):
+    """設定の変更を他のワーカーに通知（更新と同じトランザクションで呼ぶ）"""
+    bump_version(db, VERSION_NAME)
+
+
+def refresh_if_stale(db: Session) -> bool:
+    """DB上の世代番号が進んでいれば再読み込み（再読み込みした場合は True）"""
+    if _snapshot is not None and get_version(db, VERSION_NAME) == _snapshot.version:
+        return False
+    reload_settings(db)
+    return True
+
+
+def _poll_once() -> bool:
+    db = SessionLocal()
+    try:
+        return refresh_if_stale(db)
+    except Exception:
+        logger.exception("settings version poll failed")
+        return False
+    finally:
+        db.close()
+
+
+async def run_version_poll_loop():
+    """他ワーカーでの設定変更を検知して再読み込みするバックグラウンドタスク"""
+    loop = asyncio.get_running_loop()
+    while True:
+        if await loop.run_in_executor(None, _poll_once):
+            logger.info("system settings reloaded (version %d)", settings_version())
+        await asyncio.sleep(SETTINGS_POLL_SECONDS)
+
+
+@dataclass(frozen=True)
+class SettingChange:
+    key: str
+    setting_id: str
+    old_value: Optional[str]
+    new_value: Optional[str]
+
+
+@dataclass
+class ImportPlan:
+    """インポート内容と既存設定の差分"""
+    changes: List[SettingChange] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    unknown_keys: List[str] = field(default_factory=list)
+    errors: Dict[str, str] = field(default_factory=dict)
+
+
+def _to_setting_text(value: Any) -> Optional[str]:
+    """インポート値を system_settings の保存形式（文字列）に変換"""
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def plan_import(db: Session, incoming: Dict[str, Any]) -> ImportPlan:
+    """既存設定を1クエリで読み込み、型検証込みの差分を計算
+
+    incoming はエクスポート形式（{key: {"value": ...}}）と {key: value} の両方を受け付ける。
+    """
+    existing = {s.setting_key: s for s in db.query(SystemSetting).all()}
+    plan = ImportPlan()
+    for key, data in incoming.items():
+        setting = existing.get(key)
+        if setting is None:
+            plan.unknown_keys.append(key)
+            continue
+        new_value = _to_setting_text(data.get("value") if isinstance(data, dict) else data)
+        try:
+            coerce_setting_value(setting.setting_type, new_value)
+        except ValueError as e:
+            plan.errors[key] = str(e)
+            continue
+        if new_value == setting.setting_value:
+            plan.unchanged.append(key)
+            continue
+        plan.changes.append(SettingChange(key, setting.id, setting.setting_value, new_value))
+    return plan
+
+
+def apply_import(db: Session, plan: ImportPlan) -> int:
+    """差分を1回の一括UPDATEで反映（コミットは呼び出し元で行う）"""
+    if not plan.changes:
+        return 0
+    now = datetime.utcnow()
+    db.execute(update(SystemSetting), [
+        {"id": c.setting_id, "setting_value": c.new_value, "updated_at": now}
+        for c in plan.changes
+    ])
+    bump_settings_version(db)
+    return len(plan.changes)
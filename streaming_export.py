@@ -0,0 +1,99 @@
+"""
+一覧データのストリーミングエクスポート
+
+クエリ結果を yield_per（サーバーサイドカーソル）で少しずつ取り出し、CSV / NDJSON に
+変換しながらレスポンスへ書き出す。行数に関係なくメモリ使用量は一定。
+"""
+
+import csv
+import enum
+import io
+import json
+import os
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterator, List
+from urllib.parse import quote
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Query, Session
+
+from database import SessionLocal
+
+# DBから一度に取り出す行数
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+# CSV は何行ごとにまとめて送るか
+CSV_FLUSH_ROWS = 200
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _iter_rows(
+    build_query: Callable[[Session], Query],
+    serialize: Callable[[Any], Dict[str, Any]]
+) -> Iterator[Dict[str, Any]]:
+    # レスポンス送信中も使えるよう、リクエストのセッションとは別に開く
+    db = SessionLocal()
+    try:
+        for row in build_query(db).yield_per(EXPORT_BATCH_SIZE):
+            yield {k: _plain(v) for k, v in serialize(row).items()}
+    finally:
+        db.close()
+
+
+def _csv_chunks(rows: Iterator[Dict[str, Any]], fieldnames: List[str]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames, extrasaction="ignore")
+    # Excel で文字化けしないよう BOM を付ける
+    buffer.write("\ufeff")
+    writer.writeheader()
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= CSV_FLUSH_ROWS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue()
+
+
+def _ndjson_chunks(rows: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + "\n"
+
+
+def streaming_export(
+    build_query: Callable[[Session], Query],
+    serialize: Callable[[Any], Dict[str, Any]],
+    fieldnames: List[str],
+    export_format: str,
+    filename: str
+) -> StreamingResponse:
+    """クエリ結果を CSV / NDJSON でストリーミング返却
+
+    build_query はエクスポート用のセッションを受け取ってクエリを返す関数。
+    """
+    if export_format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format は csv または ndjson を指定してください")
+
+    rows = _iter_rows(build_query, serialize)
+    chunks = _csv_chunks(rows, fieldnames) if export_format == "csv" else _ndjson_chunks(rows)
+    full_name = f"{filename}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.{export_format}"
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f"attachment; filename*=UTF-8''{quote(full_name)}"}
+    )
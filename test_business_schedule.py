@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+営業スケジュール（CompiledSchedule）のテスト
+
+next_open_day の事前計算結果を、hours_for を1日ずつ調べた結果と比較する。
+"""
+
+import itertools
+import random
+from datetime import date, time, timedelta
+
+from business_schedule import CompiledSchedule, _Rule
+
+# 営業日を探す最大日数（曜日ルールに営業日がなければ None になる）
+SCAN_DAYS = 400
+
+
+def _rule(is_open: bool) -> _Rule:
+    return _Rule(is_open, time(9) if is_open else None, time(17) if is_open else None, None)
+
+
+def _scan_next_open_day(schedule: CompiledSchedule, day: date):
+    for k in range(SCAN_DAYS):
+        current = day + timedelta(days=k)
+        if schedule.hours_for(current).is_open:
+            return current
+    return None
+
+
+def _assert_matches_scan(schedule: CompiledSchedule, first: date, days: int):
+    for k in range(days):
+        day = first + timedelta(days=k)
+        assert schedule.next_open_day(day) == _scan_next_open_day(schedule, day), day
+
+
+def test_next_open_day_without_open_weekday_before_special_opening():
+    """曜日ルールに営業日がなくても、後の臨時営業日を返す"""
+    opening = date(2026, 3, 10)
+    schedule = CompiledSchedule({dow: _rule(False) for dow in range(7)}, {opening: _rule(True)})
+
+    assert schedule.next_open_day(date(2026, 1, 1)) == opening
+    assert schedule.next_open_day(opening) == opening
+    assert schedule.next_open_day(opening + timedelta(days=1)) is None
+
+
+def test_next_open_day_matches_day_by_day_scan():
+    """曜日ルール・特別休業日の組み合わせで hours_for を1日ずつ調べた結果と一致する"""
+    rng = random.Random(20260301)
+    base = date(2026, 1, 1)
+    for open_days in itertools.product([False, True], repeat=7):
+        weekly = {dow: _rule(is_open) for dow, is_open in enumerate(open_days)}
+        for _ in range(3):
+            holidays = {
+                base + timedelta(days=rng.randrange(60)): _rule(rng.random() < 0.5)
+                for _ in range(rng.randrange(4))
+            }
+            schedule = CompiledSchedule(weekly, holidays)
+            _assert_matches_scan(schedule, base - timedelta(days=20), 100)
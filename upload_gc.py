@@ -0,0 +1,193 @@
+"""
+参照されなくなったアップロードファイルの削除（GC）
+
+uploads/posts と uploads/vaccine_certificates のファイルを os.scandir で順に読み、
+猶予期間より古いファイルだけを一定件数ずつまとめて DB の参照（PostImage.image_url、
+Application.vaccine_certificate など）と照合する。どのレコードからも参照されていない
+ファイルを削除する。削除済みの投稿や却下された申請、ロールバックされた登録で残ったファイルが対象。
+
+アップロード直後でまだレコードがコミットされていないファイルを消さないよう、
+更新日時が猶予期間内のファイルは照合せずに残す。dry_run では削除せず件数のみ集計する。
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from db_control.models import Application, Dog, Job, JobStatus, PostImage, User, VaccinationRecord
+from job_queue import enqueue_job, job_handler
+from jobs import UPLOAD_ROOT
+
+logger = logging.getLogger(__name__)
+
+# GC 対象のディレクトリ（uploads 配下）
+GC_DIRECTORIES = ["posts", "vaccine_certificates"]
+# ファイルの URL を保持するカラム（いずれかから参照されていれば削除しない）
+REFERENCE_COLUMNS = [
+    PostImage.image_url,
+    Application.vaccine_certificate,
+    VaccinationRecord.image_url,
+    Dog.avatar_url,
+    User.avatar_url,
+]
+# 作成・更新からこの時間（時間）以内のファイルは削除しない
+UPLOAD_GC_GRACE_HOURS = float(os.getenv("UPLOAD_GC_GRACE_HOURS", "24"))
+# 1回の照合クエリで確認するファイル数
+UPLOAD_GC_BATCH_SIZE = int(os.getenv("UPLOAD_GC_BATCH_SIZE", "500"))
+# 定期実行の間隔（時間、0 の場合は定期実行しない）
+UPLOAD_GC_INTERVAL_HOURS = float(os.getenv("UPLOAD_GC_INTERVAL_HOURS", "24"))
+
+# 最後に実行した GC の結果（このプロセスで実行したもの）
+_last_result: Optional[Dict[str, Any]] = None
+_last_result_lock = threading.Lock()
+
+
+@dataclass
+class UploadGcStats:
+    """GC 1回分の集計"""
+    dry_run: bool
+    grace_hours: float
+    scanned: int = 0       # 走査したファイル数
+    recent: int = 0        # 猶予期間内のため照合しなかったファイル数
+    referenced: int = 0    # 参照されていたファイル数
+    deleted: int = 0       # 削除した（dry_run では削除対象の）ファイル数
+    deleted_bytes: int = 0
+    failed: int = 0        # 削除に失敗したファイル数
+    queries: int = 0       # 照合に使ったクエリ数
+    started_at: datetime = field(default_factory=datetime.utcnow)
+    elapsed_seconds: float = 0.0
+    files_per_second: float = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _referenced_urls(db: Session, urls: List[str], stats: UploadGcStats) -> Set[str]:
+    referenced: Set[str] = set()
+    for column in REFERENCE_COLUMNS:
+        stats.queries += 1
+        referenced.update(
+            url for (url,) in db.execute(select(column).where(column.in_(urls)).distinct())
+        )
+    return referenced
+
+
+def _sweep(db: Session, batch: Dict[str, os.DirEntry], stats: UploadGcStats):
+    """猶予期間を過ぎたファイルのうち、参照されていないものを削除"""
+    referenced = _referenced_urls(db, list(batch), stats)
+    for url, entry in batch.items():
+        if url in referenced:
+            stats.referenced += 1
+            continue
+        try:
+            size = entry.stat().st_size
+            if not stats.dry_run:
+                os.unlink(entry.path)
+        except FileNotFoundError:
+            # 別のプロセスが先に削除した
+            continue
+        except OSError as e:
+            stats.failed += 1
+            logger.warning("failed to delete orphaned upload %s: %s", entry.path, e)
+            continue
+        stats.deleted += 1
+        stats.deleted_bytes += size
+
+
+def collect_orphaned_uploads(
+    db: Session,
+    dry_run: bool = False,
+    grace_hours: float = UPLOAD_GC_GRACE_HOURS,
+    batch_size: int = UPLOAD_GC_BATCH_SIZE
+) -> UploadGcStats:
+    """参照されていないアップロードファイルを削除し、集計を返す"""
+    stats = UploadGcStats(dry_run=dry_run, grace_hours=grace_hours)
+    started = time.perf_counter()
+    threshold = time.time() - grace_hours * 3600
+
+    for directory in GC_DIRECTORIES:
+        path = UPLOAD_ROOT / directory
+        if not path.is_dir():
+            continue
+        batch: Dict[str, os.DirEntry] = {}
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                stats.scanned += 1
+                try:
+                    if entry.stat().st_mtime > threshold:
+                        stats.recent += 1
+                        continue
+                except FileNotFoundError:
+                    continue
+                batch[f"/uploads/{directory}/{entry.name}"] = entry
+                if len(batch) >= batch_size:
+                    _sweep(db, batch, stats)
+                    batch = {}
+        if batch:
+            _sweep(db, batch, stats)
+
+    stats.elapsed_seconds = round(time.perf_counter() - started, 3)
+    if stats.elapsed_seconds > 0:
+        stats.files_per_second = round(stats.scanned / stats.elapsed_seconds, 1)
+
+    global _last_result
+    with _last_result_lock:
+        _last_result = stats.as_dict()
+    logger.info("upload gc finished: %s", stats.as_dict())
+    return stats
+
+
+def last_result() -> Optional[Dict[str, Any]]:
+    """このプロセスで最後に実行した GC の集計"""
+    with _last_result_lock:
+        return dict(_last_result) if _last_result else None
+
+
+@job_handler("upload_gc")
+def run_upload_gc(db: Session, payload: Dict[str, Any]):
+    """ジョブとしての GC（payload: dry_run, grace_hours）"""
+    collect_orphaned_uploads(
+        db,
+        dry_run=bool(payload.get("dry_run", False)),
+        grace_hours=float(payload.get("grace_hours", UPLOAD_GC_GRACE_HOURS))
+    )
+
+
+def schedule_upload_gc(db: Session, dry_run: bool = False, grace_hours: Optional[float] = None) -> Optional[str]:
+    """GC ジョブを登録（未完了の GC ジョブがある場合は登録せず None。コミットは呼び出し元）"""
+    pending = db.query(Job.id).filter(
+        Job.job_type == "upload_gc",
+        Job.status.in_([JobStatus.pending, JobStatus.running])
+    ).first()
+    if pending:
+        return None
+    payload: Dict[str, Any] = {"dry_run": dry_run}
+    if grace_hours is not None:
+        payload["grace_hours"] = grace_hours
+    return enqueue_job(db, "upload_gc", payload, max_attempts=1)
+
+
+async def run_upload_gc_loop():
+    """一定間隔で GC ジョブを登録するバックグラウンドタスク"""
+    while True:
+        await asyncio.sleep(UPLOAD_GC_INTERVAL_HOURS * 3600)
+        db = SessionLocal()
+        try:
+            schedule_upload_gc(db)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.warning("failed to schedule upload gc: %s", e)
+        finally:
+            db.close()
@@ -1,8 +1,9 @@
 import re
+import base64
 import hashlib
 import uuid
-from datetime import datetime, timedelta
-from typing import List, Optional
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional, Tuple
 from fastapi import UploadFile
 from config import settings
 
@@ -156,4 +157,68 @@ def validate_weight(weight: str) -> bool:
         weight_value = float(weight.replace('kg', ''))
         return 0.1 <= weight_value <= 100.0  # 0.1kg〜100kg
     except (ValueError, AttributeError):
-        return False 
\ No newline at end of file
+        return False 
+
+def parse_hhmm(value: Optional[str]) -> Optional[time]:
+    """HH:MM 形式の文字列を time に変換（空の場合は None、不正な形式は ValueError）"""
+    if not value:
+        return None
+    match = re.fullmatch(r'(\d{1,2}):(\d{2})(?::\d{2})?', value.strip())
+    if not match:
+        raise ValueError(f"時刻の形式が不正です: {value}")
+    return time(int(match.group(1)), int(match.group(2)))
+
+def _parse_ical_date(value: str) -> date:
+    """DTSTART / DTEND の値（20260101 または 20260101T090000Z）から日付を取得"""
+    return datetime.strptime(value.strip()[:8], "%Y%m%d").date()
+
+def parse_ical_holidays(content: str, max_days: Optional[int] = None) -> List[Tuple[date, Optional[str]]]:
+    """iCalendar（.ics）の VEVENT から日付と名称を抽出
+
+    複数日にまたがる終日イベントは DTEND（その日を含まない）の前日まで展開する。
+    形式が不正な場合、または日付の種類が max_days を超えた時点で ValueError。
+    """
+    # 折り返し行（改行直後が空白・タブ）を連結
+    unfolded = re.sub(r'\r?\n[ \t]', '', content)
+    holidays = []
+    days = set()
+    event = None
+    for line in unfolded.splitlines():
+        line = line.strip()
+        if line.upper() == 'BEGIN:VEVENT':
+            event = {}
+        elif line.upper() == 'END:VEVENT':
+            if event is None or 'DTSTART' not in event:
+                raise ValueError("DTSTART のない VEVENT があります")
+            start = _parse_ical_date(event['DTSTART'])
+            end = _parse_ical_date(event['DTEND']) if 'DTEND' in event else start + timedelta(days=1)
+            summary = event.get('SUMMARY')
+            if summary:
+                # TEXT 値のエスケープ（\, \; \\ \n）を戻す
+                summary = re.sub(r'\\([\\,;nN])', lambda m: ' ' if m.group(1) in 'nN' else m.group(1), summary).strip()
+            current = start
+            while current < max(end, start + timedelta(days=1)):
+                holidays.append((current, summary))
+                days.add(current)
+                if max_days is not None and len(days) > max_days:
+                    raise ValueError(f"日付が{max_days}件を超えています")
+                current += timedelta(days=1)
+            event = None
+        elif event is not None and ':' in line:
+            name, value = line.split(':', 1)
+            event[name.split(';', 1)[0].upper()] = value
+    return holidays
+
+def encode_cursor(created_at: datetime, row_id: str) -> str:
+    """キーセットページネーション用のカーソルを作成（created_at と id の組）"""
+    raw = f"{created_at.isoformat()}|{row_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """カーソルを (created_at, id) に戻す（不正な形式は ValueError）"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = base64.urlsafe_b64decode(padded).decode("utf-8").split("|", 1)
+        return datetime.fromisoformat(created_at), row_id
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("カーソルが不正です") from e